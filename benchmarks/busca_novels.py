@@ -0,0 +1,145 @@
+"""Novel title search: linear difflib scan vs the trigram index (10k / 100k titles)."""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from centralnovel.indice_busca import (  # noqa: E402
+    NOTA_MINIMA,
+    IndiceBusca,
+    carregar_ou_construir,
+    pontuar_titulo,
+)
+
+_PALAVRAS = (
+    "lord of the mysteries shadow slave reverend insanity martial world god emperor "
+    "supreme magus omniscient reader solo leveling return mount hua sect villain "
+    "academy genius swordsman regressor necromancer tower dragon heavenly demon "
+    "rebirth cultivation system legendary mage hunter knight princess dungeon "
+    "infinite apocalypse immortal path blade sky star moon eternal chronicles"
+).split()
+
+
+def gerar_titulos(total, semente):
+    sorteio = random.Random(semente)
+    titulos = []
+    for numero in range(total):
+        palavras = sorteio.sample(_PALAVRAS, sorteio.randint(2, 6))
+        if sorteio.random() < 0.3:
+            palavras.append(str(numero))
+        titulos.append(" ".join(palavras))
+    return titulos
+
+
+def gerar_consultas(titulos, quantidade, semente):
+    sorteio = random.Random(semente)
+    consultas = []
+    for _ in range(quantidade):
+        titulo = sorteio.choice(titulos)
+        palavras = titulo.split()
+        tipo = sorteio.randrange(4)
+        if tipo == 0:
+            consultas.append(titulo)
+        elif tipo == 1:
+            inicio = sorteio.randrange(len(palavras))
+            consultas.append(" ".join(palavras[inicio : inicio + 2]))
+        elif tipo == 2:
+            consultas.append(" ".join(reversed(palavras[:3])))
+        else:
+            posicao = sorteio.randrange(len(titulo))
+            consultas.append(titulo[:posicao] + titulo[posicao + 1 :])
+    return consultas
+
+
+def buscar_linear(titulos, consulta, limite):
+    notas = []
+    for doc, titulo in enumerate(titulos):
+        if not titulo:
+            continue
+        nota = pontuar_titulo(consulta, titulo)
+        if nota >= NOTA_MINIMA:
+            notas.append((nota, doc))
+    notas.sort(key=lambda item: item[0], reverse=True)
+    return notas[:limite]
+
+
+def faixas_exatas(resultado):
+    return [item for item in resultado if item[0] in (100.0, 90.0, 80.0)]
+
+
+def latencias(funcao, consultas):
+    tempos = []
+    resultados = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        resultados.append(funcao(consulta))
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return tempos, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titulos", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--consultas", type=int, default=50)
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=1)
+    args = parser.parse_args()
+
+    for total in args.titulos:
+        titulos = gerar_titulos(total, args.semente)
+        consultas = gerar_consultas(titulos, args.consultas, args.semente)
+
+        inicio = time.perf_counter()
+        indice = IndiceBusca(titulos)
+        construcao = time.perf_counter() - inicio
+        with tempfile.TemporaryDirectory() as pasta:
+            carregar_ou_construir(titulos, pasta)
+            inicio = time.perf_counter()
+            carregar_ou_construir(titulos, pasta)
+            carga = time.perf_counter() - inicio
+
+        tempos_linear, esperados = latencias(
+            lambda consulta: buscar_linear(titulos, consulta, args.limite), consultas
+        )
+        tempos_indice, obtidos = latencias(
+            lambda consulta: indice.buscar(consulta, args.limite), consultas
+        )
+
+        faixas_iguais = sum(
+            faixas_exatas(esperado) == faixas_exatas(obtido)
+            for esperado, obtido in zip(esperados, obtidos)
+        )
+        iguais = sum(esperado == obtido for esperado, obtido in zip(esperados, obtidos))
+
+        print(f"\n{total} titulos | indice: construcao {construcao:.2f} s, carga do disco {carga:.2f} s")
+        print(f"{'busca':<10}{'p50 ms':>10}{'p95 ms':>10}")
+        for nome, tempos in (("linear", tempos_linear), ("indice", tempos_indice)):
+            p95 = tempos[int(len(tempos) * 0.95) - 1]
+            print(f"{nome:<10}{statistics.median(tempos) * 1000:>10.2f}{p95 * 1000:>10.2f}")
+        print(
+            f"faixas 100/90/80 identicas: {faixas_iguais}/{len(consultas)} | "
+            f"top {args.limite} identico: {iguais}/{len(consultas)}"
+        )
+        # Divergencias esperadas so na faixa do difflib: um titulo fora dos CANDIDATOS_BUSCA
+        # mais parecidos por trigramas nao e pontuado, e o proximo colocado ocupa a vaga.
+        for consulta, esperado, obtido in zip(consultas, esperados, obtidos):
+            if esperado != obtido:
+                posicao = next(
+                    (indice for indice, par in enumerate(zip(esperado, obtido)) if par[0] != par[1]),
+                    min(len(esperado), len(obtido)),
+                )
+                print(
+                    f"  difere: {consulta!r} a partir da posicao {posicao + 1} "
+                    f"(linear {esperado[posicao:posicao + 1]}, indice {obtido[posicao:posicao + 1]})"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""End-to-end download benchmark against the local mock server (chapters/min, bytes/s)."""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servidor_mock  # noqa: E402
+
+from centralnovel import async_client, scraper  # noqa: E402
+from centralnovel.config import PDF_ROOT_DIR  # noqa: E402
+from centralnovel.downloader import download_capitulos_novel  # noqa: E402
+from centralnovel.metricas import METRICAS  # noqa: E402
+
+
+def apontar_para(porta):
+    # Os modulos importam AJAX_URL por nome; trocar so config nao basta.
+    url = servidor_mock.url_ajax(porta)
+    scraper.AJAX_URL = url
+    async_client.AJAX_URL = url
+
+
+def tamanho_pasta(pasta):
+    total = 0
+    for raiz, _, arquivos in os.walk(pasta):
+        total += sum(os.path.getsize(os.path.join(raiz, nome)) for nome in arquivos)
+    return total
+
+
+@contextlib.contextmanager
+def pasta_temporaria():
+    # Cache HTTP, manifesto, relatorios e PDFs usam caminhos relativos: nada cai no repositorio.
+    with tempfile.TemporaryDirectory() as pasta:
+        anterior = os.getcwd()
+        os.chdir(pasta)
+        try:
+            yield pasta
+        finally:
+            os.chdir(anterior)
+
+
+def executar(capitulos, backend, simultaneos, rps, limite_kbps, verboso):
+    saida = contextlib.nullcontext() if verboso else contextlib.redirect_stdout(io.StringIO())
+    with pasta_temporaria():
+        inicio = time.perf_counter()
+        with saida:
+            sucesso, falhas = download_capitulos_novel(
+                capitulos,
+                "Benchmark",
+                max_simultaneos=simultaneos,
+                requisicoes_por_segundo=rps,
+                backend=backend,
+                limite_banda_kbps=limite_kbps,
+            )
+        duracao = time.perf_counter() - inicio
+        baixados = tamanho_pasta(PDF_ROOT_DIR)
+    return sucesso, falhas, duracao, baixados, METRICAS.resumo()
+
+
+def imprimir(backend, simultaneos, sucesso, falhas, duracao, baixados, resumo):
+    contadores = resumo["contadores"]
+    transferencia = resumo["etapas"].get("transferencia", {})
+    print(
+        f"{backend:<8}{simultaneos:>5}{sucesso / duracao * 60:>12.1f}"
+        f"{baixados / duracao / (1024 * 1024):>10.2f}"
+        f"{transferencia.get('p50_s', 0) * 1000:>10.1f}{transferencia.get('p95_s', 0) * 1000:>10.1f}"
+        f"{contadores.get('retentativas_token', 0):>8}{contadores.get('retentativas_download', 0):>8}"
+        f"{falhas:>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    servidor_mock.adicionar_argumentos(parser)
+    parser.add_argument("--backend", nargs="+", default=["threads", "async"])
+    parser.add_argument("--simultaneos", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rps", type=float, default=50.0, help="limite inicial por host")
+    parser.add_argument(
+        "--limite-kbps", type=float, default=0, help="limite global do cliente (0 = sem limite)"
+    )
+    parser.add_argument("--verboso", action="store_true", help="mostra a saida do downloader")
+    args = parser.parse_args()
+
+    processo, porta = servidor_mock.iniciar_em_processo(servidor_mock.opcoes_dos_argumentos(args))
+    apontar_para(porta)
+    with pasta_temporaria(), contextlib.redirect_stdout(io.StringIO()):
+        capitulos = scraper.extrair_links_pdf(servidor_mock.url_serie(porta))
+    if len(capitulos) != args.capitulos:
+        print(f"[ERRO] Pagina da serie devolveu {len(capitulos)} de {args.capitulos} capitulos")
+        processo.terminate()
+        return 1
+
+    print(
+        f"{len(capitulos)} capitulos x {args.tamanho_pdf_kb} KB | latencia {args.latencia_ms} ms"
+        f" | banda {args.banda_kbps or 'livre'} KB/s | 429 {args.taxa_429:.0%}"
+        f" | truncamento {args.taxa_truncamento:.0%}"
+    )
+    print(
+        f"{'backend':<8}{'simul':>5}{'cap/min':>12}{'MB/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'ret tok':>8}{'ret pdf':>8}{'falhas':>8}"
+    )
+    for backend in args.backend:
+        if backend == "async" and not async_client.backend_async_disponivel():
+            print(f"{backend:<8} (aiohttp nao instalado)")
+            continue
+        for simultaneos in args.simultaneos:
+            resultado = executar(
+                capitulos, backend, simultaneos, args.rps, args.limite_kbps, args.verboso
+            )
+            imprimir(backend, simultaneos, *resultado)
+    processo.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
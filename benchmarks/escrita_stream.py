@@ -0,0 +1,120 @@
+"""Streaming write throughput: plain iter_content loops vs gravar_resposta."""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from centralnovel.config import TAMANHO_BUFFER_DOWNLOAD  # noqa: E402
+from centralnovel.escrita_stream import gravar_resposta  # noqa: E402
+from centralnovel.integridade import ValidadorPDF  # noqa: E402
+
+
+def _servir(tamanho_mb, fila):
+    corpo = b"%PDF-1.4\n" + os.urandom(tamanho_mb * 1024 * 1024) + b"\n%%EOF\n"
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    fila.put((servidor.server_address[1], len(corpo)))
+    servidor.serve_forever()
+
+
+def iniciar_servidor(tamanho_mb):
+    # Processo separado para que process_time() meca apenas o lado do cliente.
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_servir, args=(tamanho_mb, fila), daemon=True)
+    processo.start()
+    porta, tamanho = fila.get()
+    return processo, porta, tamanho
+
+
+def loop_simples(sessao, url, caminho, tamanho_bloco):
+    with sessao.get(url, stream=True) as response:
+        validador = ValidadorPDF(int(response.headers["Content-Length"]))
+        with open(caminho, "wb") as file_obj:
+            for chunk in response.iter_content(chunk_size=tamanho_bloco):
+                if chunk:
+                    validador.atualizar(chunk)
+                    file_obj.write(chunk)
+    validador.finalizar()
+
+
+def loop_novo(sessao, url, caminho, tamanho_buffer):
+    with sessao.get(url, stream=True) as response:
+        tamanho_total = int(response.headers["Content-Length"])
+        validador = ValidadorPDF(tamanho_total)
+        gravar_resposta(
+            response,
+            caminho,
+            tamanho_total=tamanho_total,
+            validador=validador,
+            tamanho_buffer=tamanho_buffer,
+        )
+    validador.finalizar()
+
+
+def medir(nome, funcao, repeticoes, tamanho):
+    melhor_parede = melhor_cpu = float("inf")
+    for _ in range(repeticoes):
+        inicio_parede = time.perf_counter()
+        inicio_cpu = time.process_time()
+        funcao()
+        melhor_cpu = min(melhor_cpu, time.process_time() - inicio_cpu)
+        melhor_parede = min(melhor_parede, time.perf_counter() - inicio_parede)
+    mb = tamanho / (1024 * 1024)
+    print(
+        f"{nome:<32}{mb / melhor_parede:>10.1f} MB/s{mb / max(melhor_cpu, 1e-9):>12.1f} MB/s/core"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanho-mb", type=int, default=64)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--buffer-kb", type=int, nargs="+", default=[64, 128, 256, 1024])
+    args = parser.parse_args()
+
+    servidor, porta, tamanho = iniciar_servidor(args.tamanho_mb)
+    url = f"http://127.0.0.1:{porta}/capitulo.pdf"
+
+    print(f"Corpo: {tamanho / (1024 * 1024):.1f} MB | servidor local em {url}")
+    print(f"{'modo':<32}{'parede':>15}{'cpu':>17}")
+    with tempfile.TemporaryDirectory() as pasta, requests.Session() as sessao:
+        caminho = os.path.join(pasta, "saida.pdf.part")
+        # Com o mesmo tamanho de bloco, a diferenca para gravar_resposta e so a pre-alocacao.
+        for tamanho_bloco in (8192, TAMANHO_BUFFER_DOWNLOAD):
+            medir(
+                f"iter_content({tamanho_bloco // 1024} KB)",
+                lambda: loop_simples(sessao, url, caminho, tamanho_bloco),
+                args.repeticoes,
+                tamanho,
+            )
+        for buffer_kb in args.buffer_kb:
+            medir(
+                f"gravar_resposta({buffer_kb} KB)",
+                lambda: loop_novo(sessao, url, caminho, buffer_kb * 1024),
+                args.repeticoes,
+                tamanho,
+            )
+    servidor.terminate()
+
+
+if __name__ == "__main__":
+    main()
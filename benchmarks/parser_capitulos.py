@@ -0,0 +1,95 @@
+"""Chapter-list parsing: BeautifulSoup(html.parser) vs the lxml/XPath engine."""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from centralnovel import scraper  # noqa: E402
+
+# Variacoes vistas nas paginas do tema: entidades, &nbsp;, spans internos, comentarios,
+# classes extras, volumes com texto, itens sem PDF e data-id vazio.
+_MODELOS = (
+    '<li data-index="{i}" data-id="{post_id}"><a href="https://centralnovel.com/cap-{n}/">'
+    '<div class="epl-num">Vol. {vol} Cap. {n}</div>'
+    '<div class="epl-title">Capitulo {n} &amp; o retorno</div>'
+    '<div class="epl-date">janeiro 1, 2024</div></a>'
+    '<div class="epl-pdf"><a class="dlpdf" href="https://centralnovel.com/cap-{n}/?pdf=1">'
+    "PDF</a></div></li>",
+    '<li data-id="{post_id}">\n  <a href="https://centralnovel.com/cap-{n}/">\n'
+    '    <div class="epl-num extra">Vol.&nbsp;{vol}\n <span>Cap. {n}</span></div>\n'
+    '    <div class="epl-title"> <!-- rascunho --> Titulo <b>{n}</b>  café </div>\n'
+    "  </a>\n"
+    '  <div class="epl-pdf"><a class="btn dlpdf" href="/cap-{n}/?pdf=1">PDF</a></div>\n</li>',
+    '<li data-id="{post_id}"><div class="epl-num">Volume Extra Cap. {n}</div>'
+    '<div class="epl-title">Especial</div><div class="epl-date"></div>'
+    '<div class="epl-pdf"><a class="dlpdf" href="https://centralnovel.com/extra-{n}/">PDF</a>'
+    "</div></li>",
+    '<li data-id="{post_id}"><div class="epl-num">Cap. {n}</div>'
+    '<div class="epl-title">Sem link</div><div class="epl-pdf"></div></li>',
+    '<li data-id=""><div class="epl-num">Vol. {vol} Cap. {n}</div></li>',
+)
+
+
+def gerar_pagina(total):
+    itens = []
+    for indice, numero in enumerate(range(total, 0, -1)):
+        modelo = _MODELOS[numero % len(_MODELOS)]
+        itens.append(
+            modelo.format(i=indice, post_id=200000 + numero, vol=(numero - 1) // 100 + 1, n=numero)
+        )
+    cabecalho = "".join(
+        f'<div class="widget"><a href="/series/outra-{k}/">Outra novel {k}</a></div>' for k in range(300)
+    )
+    return (
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="UTF-8"><title>Novel</title>'
+        "<script>var x = '<li data-id=\"1\">';</script></head><body>"
+        f'<h1 class="entry-title">Novel</h1>{cabecalho}'
+        f'<div class="eplister"><ul>{"".join(itens)}</ul></div></body></html>'
+    )
+
+
+def medir(funcao, html, repeticoes):
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcao(html)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capitulos", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--arquivo", nargs="*", default=[], help="paginas salvas (HTML)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    paginas = [(f"sintetica {total}", gerar_pagina(total)) for total in args.capitulos]
+    for caminho in args.arquivo:
+        with open(caminho, encoding="utf-8") as file_obj:
+            paginas.append((os.path.basename(caminho), file_obj.read()))
+
+    print(f"{'pagina':<24}{'KB':>8}{'caps':>7}{'bs4 ms':>10}{'lxml ms':>10}{'ganho':>8}  igual")
+    divergencias = 0
+    for nome, html in paginas:
+        tempo_bs4, esperado = medir(scraper._extrair_capitulos_bs4, html, args.repeticoes)
+        tempo_lxml, obtido = medir(scraper.extrair_capitulos_do_html, html, args.repeticoes)
+        igual = esperado == obtido
+        divergencias += not igual
+        print(
+            f"{nome:<24}{len(html.encode('utf-8')) / 1024:>8.0f}{len(esperado):>7}"
+            f"{tempo_bs4 * 1000:>10.1f}{tempo_lxml * 1000:>10.1f}"
+            f"{tempo_bs4 / tempo_lxml:>7.1f}x  {'sim' if igual else 'NAO'}"
+        )
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
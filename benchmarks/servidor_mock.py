@@ -0,0 +1,241 @@
+"""Local stand-in for CentralNovel: series page, admin-ajax token endpoint and PDFs."""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SLUG_SERIE = "novel-de-teste-20240101"
+CAMINHO_AJAX = "/wp-admin/admin-ajax.php"
+
+PADRAO = {
+    "capitulos": 100,
+    "capitulos_por_volume": 50,
+    "tamanho_pdf_kb": 512,
+    "latencia_ms": 0.0,
+    "banda_kbps": 0.0,
+    "taxa_429": 0.0,
+    "retry_after": 1,
+    "taxa_truncamento": 0.0,
+    "semente": 0,
+}
+
+
+def criar_pdf(tamanho):
+    cabecalho = b"%PDF-1.4\n"
+    rodape = b"\n%%EOF\n"
+    miolo = max(0, tamanho - len(cabecalho) - len(rodape))
+    return cabecalho + os.urandom(miolo) + rodape
+
+
+def pagina_serie(opcoes, base_url):
+    itens = []
+    for numero in range(opcoes["capitulos"], 0, -1):
+        volume = (numero - 1) // opcoes["capitulos_por_volume"] + 1
+        post_id = 100000 + numero
+        itens.append(
+            f'<li data-id="{post_id}"><a href="{base_url}/capitulo-{numero}/">'
+            f'<div class="epl-num">Vol. {volume} Cap. {numero}</div>'
+            f'<div class="epl-title">Capitulo {numero}</div>'
+            f'<div class="epl-date">1 de janeiro de 2024</div></a>'
+            f'<div class="epl-pdf"><a class="dlpdf" href="{base_url}/capitulo-{numero}/">PDF</a>'
+            f"</div></li>"
+        )
+    return (
+        "<html><head><title>Novel de Teste</title></head><body>"
+        '<h1 class="entry-title">Novel de Teste</h1>'
+        f'<div class="eplister"><ul>{"".join(itens)}</ul></div>'
+        "</body></html>"
+    )
+
+
+def criar_servidor(opcoes, host="127.0.0.1", porta=0):
+    opcoes = {**PADRAO, **opcoes}
+    corpo_pdf = criar_pdf(opcoes["tamanho_pdf_kb"] * 1024)
+    sorteio = random.Random(opcoes["semente"])
+    sorteio_lock = threading.Lock()
+    contadores = {"requisicoes": 0, "limitadas": 0, "truncadas": 0, "bytes": 0}
+
+    def sortear(probabilidade):
+        if probabilidade <= 0:
+            return False
+        with sorteio_lock:
+            return sorteio.random() < probabilidade
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if not self._preparar():
+                return
+            caminho = urlparse(self.path).path
+            if caminho == f"/series/{SLUG_SERIE}/":
+                self._responder(200, pagina_serie(opcoes, self._base_url()), "text/html")
+            elif re.fullmatch(r"/capitulo-(\d+)/", caminho):
+                numero = int(re.fullmatch(r"/capitulo-(\d+)/", caminho).group(1))
+                html = f'<script>var dados = {{"post_id": {100000 + numero}}};</script>'
+                self._responder(200, html, "text/html")
+            elif re.fullmatch(r"/pdf/\d+\.pdf", caminho):
+                self._enviar_pdf()
+            else:
+                self._responder(404, "nao encontrado", "text/plain")
+
+        def do_POST(self):
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            dados = parse_qs(self.rfile.read(tamanho).decode("utf-8"))
+            if not self._preparar():
+                return
+            if urlparse(self.path).path != CAMINHO_AJAX or dados.get("action") != ["ts_ln_dl_url"]:
+                self._responder(400, json.dumps({"error": 1}), "application/json")
+                return
+            post_id = dados.get("post_id", [""])[0]
+            expira = int(time.time()) + 600
+            url = f"{self._base_url()}/pdf/{post_id}.pdf?expires={expira}"
+            self._responder(200, json.dumps({"error": 0, "url": url}), "application/json")
+
+        def log_message(self, *args):
+            pass
+
+        def _preparar(self):
+            contadores["requisicoes"] += 1
+            if opcoes["latencia_ms"]:
+                time.sleep(opcoes["latencia_ms"] / 1000)
+            if sortear(opcoes["taxa_429"]):
+                contadores["limitadas"] += 1
+                self.send_response(429)
+                self.send_header("Retry-After", str(opcoes["retry_after"]))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return False
+            return True
+
+        def _base_url(self):
+            return f"http://{self.headers.get('Host')}"
+
+        def _responder(self, status, texto, tipo):
+            corpo = texto.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{tipo}; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def _enviar_pdf(self):
+            inicio = 0
+            intervalo = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+            if intervalo:
+                inicio = int(intervalo.group(1))
+                if inicio >= len(corpo_pdf):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(corpo_pdf)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header(
+                    "Content-Range", f"bytes {inicio}-{len(corpo_pdf) - 1}/{len(corpo_pdf)}"
+                )
+            else:
+                self.send_response(200)
+            restante = memoryview(corpo_pdf)[inicio:]
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(restante)))
+            self.end_headers()
+
+            if sortear(opcoes["taxa_truncamento"]):
+                contadores["truncadas"] += 1
+                restante = restante[: len(restante) // 2]
+                self.close_connection = True
+            self._escrever_com_banda(restante)
+
+        def _escrever_com_banda(self, dados):
+            banda = opcoes["banda_kbps"] * 1024
+            bloco = 64 * 1024 if not banda else max(1024, int(banda / 20))
+            inicio = time.perf_counter()
+            for posicao in range(0, len(dados), bloco):
+                self.wfile.write(dados[posicao : posicao + bloco])
+                contadores["bytes"] += len(dados[posicao : posicao + bloco])
+                if banda:
+                    atraso = (posicao + bloco) / banda - (time.perf_counter() - inicio)
+                    if atraso > 0:
+                        time.sleep(atraso)
+
+    servidor = ThreadingHTTPServer((host, porta), Handler)
+    servidor.daemon_threads = True
+    servidor.contadores = contadores
+    return servidor
+
+
+def url_serie(porta, host="127.0.0.1"):
+    return f"http://{host}:{porta}/series/{SLUG_SERIE}/"
+
+
+def url_ajax(porta, host="127.0.0.1"):
+    return f"http://{host}:{porta}{CAMINHO_AJAX}"
+
+
+def _servir(opcoes, fila):
+    servidor = criar_servidor(opcoes)
+    fila.put(servidor.server_address[1])
+    servidor.serve_forever()
+
+
+def iniciar_em_processo(opcoes):
+    # Processo separado para que o servidor nao dispute o GIL com o cliente medido.
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_servir, args=(opcoes, fila), daemon=True)
+    processo.start()
+    return processo, fila.get()
+
+
+def adicionar_argumentos(parser):
+    parser.add_argument("--capitulos", type=int, default=PADRAO["capitulos"])
+    parser.add_argument("--tamanho-pdf-kb", type=int, default=PADRAO["tamanho_pdf_kb"])
+    parser.add_argument("--latencia-ms", type=float, default=PADRAO["latencia_ms"])
+    parser.add_argument(
+        "--banda-kbps", type=float, default=PADRAO["banda_kbps"], help="por conexao; 0 = sem limite"
+    )
+    parser.add_argument(
+        "--taxa-429", type=float, default=PADRAO["taxa_429"], help="fracao de respostas 429"
+    )
+    parser.add_argument("--retry-after", type=int, default=PADRAO["retry_after"])
+    parser.add_argument(
+        "--taxa-truncamento",
+        type=float,
+        default=PADRAO["taxa_truncamento"],
+        help="fracao de PDFs cortados no meio",
+    )
+    parser.add_argument("--semente", type=int, default=PADRAO["semente"])
+
+
+def opcoes_dos_argumentos(args):
+    return {chave: getattr(args, chave) for chave in PADRAO if hasattr(args, chave)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--porta", type=int, default=8000)
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    servidor = criar_servidor(opcoes_dos_argumentos(args), porta=args.porta)
+    porta = servidor.server_address[1]
+    print(f"Serie: {url_serie(porta)}")
+    print(f"AJAX:  {url_ajax(porta)}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        print(f"\n{servidor.contadores}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Sitemap ingestion: ET.fromstring on the whole body vs the streaming iterparse reader."""
+
+import argparse
+import functools
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from centralnovel import cache_http, http_client, scraper, sitemap  # noqa: E402
+from centralnovel.rate_limit import configurar_limite  # noqa: E402
+
+_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+class _Silencioso(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def gerar_sitemaps(pasta, total, partes, base):
+    entradas = [
+        f"<url><loc>https://centralnovel.com/series/novel-{numero}-20240101/</loc>"
+        f"<lastmod>2024-01-01T00:00:00+00:00</lastmod></url>"
+        for numero in range(total)
+    ]
+    with open(os.path.join(pasta, "unico.xml"), "w", encoding="utf-8") as file_obj:
+        file_obj.write(f'<?xml version="1.0"?><urlset xmlns="{_NS}">{"".join(entradas)}</urlset>')
+
+    tamanho = -(-total // partes)
+    filhos = []
+    for parte in range(partes):
+        nome = f"parte-{parte}.xml.gz"
+        corpo = "".join(entradas[parte * tamanho : (parte + 1) * tamanho])
+        with gzip.open(os.path.join(pasta, nome), "wt", encoding="utf-8") as file_obj:
+            file_obj.write(f'<?xml version="1.0"?><urlset xmlns="{_NS}">{corpo}</urlset>')
+        filhos.append(f"<sitemap><loc>{base}/{nome}</loc></sitemap>")
+    with open(os.path.join(pasta, "indice.xml"), "w", encoding="utf-8") as file_obj:
+        file_obj.write(f'<?xml version="1.0"?><sitemapindex xmlns="{_NS}">{"".join(filhos)}</sitemapindex>')
+
+
+def ler_inteiro(url):
+    # Caminho antigo: corpo inteiro em memoria e arvore completa antes do primeiro item.
+    response = http_client.get(url)
+    response.raise_for_status()
+    root = ET.fromstring(response.text)
+    urls = [item.text for item in root.findall(".//sm:url/sm:loc", {"sm": _NS}) if item.text]
+    return len(urls)
+
+
+def ler_stream(url):
+    return sum(1 for _ in sitemap.iterar_urls(url))
+
+
+def ler_novels(url):
+    # Inclui o conjunto de URLs vistas da deduplicacao, que cresce com o catalogo.
+    return sum(1 for _ in scraper.iterar_novels_sitemap(url))
+
+
+def medir(funcao, url):
+    # Tempo e memoria em passadas separadas: o tracemalloc deixa o codigo Python bem mais lento.
+    inicio = time.perf_counter()
+    quantidade = funcao(url)
+    duracao = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcao(url)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return quantidade, duracao, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--partes", type=int, default=8, help="sitemaps filhos no indice")
+    args = parser.parse_args()
+
+    # Mede a rede local, nao o cache em disco nem o limitador de requisicoes.
+    cache_http.CACHE_HTTP_ATIVO = False
+    configurar_limite(10_000)
+
+    print(f"{'urls':>8}  {'leitura':<26}{'itens':>8}{'s':>8}{'pico MB':>10}")
+    for total in args.urls:
+        with tempfile.TemporaryDirectory() as pasta:
+            servidor = ThreadingHTTPServer(
+                ("127.0.0.1", 0), functools.partial(_Silencioso, directory=pasta)
+            )
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+            base = f"http://127.0.0.1:{servidor.server_address[1]}"
+            try:
+                gerar_sitemaps(pasta, total, args.partes, base)
+                casos = (
+                    ("fromstring (unico)", ler_inteiro, f"{base}/unico.xml"),
+                    ("stream (unico)", ler_stream, f"{base}/unico.xml"),
+                    (f"stream (indice x{args.partes} gz)", ler_stream, f"{base}/indice.xml"),
+                    ("novels (unico)", ler_novels, f"{base}/unico.xml"),
+                )
+                for nome, funcao, url in casos:
+                    quantidade, duracao, pico = medir(funcao, url)
+                    print(f"{total:>8}  {nome:<26}{quantidade:>8}{duracao:>8.2f}{pico / 2**20:>10.1f}")
+            finally:
+                servidor.shutdown()
+                servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cold-start import time benchmark (python -X importtime)."""
+
+import argparse
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orcamento de importacao por ponto de entrada, em milissegundos.
+ORCAMENTOS_MS = {
+    "centralnovel.cli": 50,
+    "centralnovel.downloader": 250,
+    "centralnovel.menus": 600,
+}
+
+MODULOS_PESADOS = ("fitz", "PIL", "bs4", "lxml", "InquirerPy", "aiohttp")
+
+
+def medir_importacao(modulo):
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+    )
+    if resultado.returncode != 0:
+        return None, [], resultado.stderr.strip().splitlines()[-1:]
+
+    total_us = 0
+    pesados = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        _, cumulativo, nome = (parte.strip() for parte in linha[len("import time:") :].split("|"))
+        if not cumulativo.isdigit():
+            continue
+        if nome == modulo:
+            total_us = int(cumulativo)
+        if nome.split(".")[0] in MODULOS_PESADOS:
+            pesados.append(nome)
+    return total_us / 1000, pesados, []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    estourou = False
+    print(f"{'modulo':<28}{'melhor (ms)':>12}{'orcamento':>12}  pesados carregados")
+    for modulo, orcamento in ORCAMENTOS_MS.items():
+        medidas = []
+        pesados = []
+        erro = []
+        for _ in range(args.repeticoes):
+            tempo, pesados, erro = medir_importacao(modulo)
+            if tempo is None:
+                break
+            medidas.append(tempo)
+        if not medidas:
+            print(f"{modulo:<28}{'erro':>12}{orcamento:>12}  {' '.join(erro)}")
+            continue
+        melhor = min(medidas)
+        marcador = "" if melhor <= orcamento else "  <-- acima do orcamento"
+        estourou = estourou or melhor > orcamento
+        print(
+            f"{modulo:<28}{melhor:>12.1f}{orcamento:>12}  "
+            f"{', '.join(sorted({nome.split('.')[0] for nome in pesados})) or '-'}{marcador}"
+        )
+    return 1 if estourou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Background prefetch for the interactive menus: top list, sitemap and chapter lists."""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .config import ANTECIPAR_CAPITULOS, CACHE_CAPITULOS_MENU, TTL_CACHE_HTTP
+from .scraper import buscar_novels_por_nome, extrair_links_pdf, listar_top_novels, preparar_busca
+
+
+class AntecipadorMenus:
+    def __init__(self, antecipados=ANTECIPAR_CAPITULOS, tamanho_cache=CACHE_CAPITULOS_MENU):
+        self.antecipados = antecipados
+        self.tamanho_cache = tamanho_cache
+        self._lock = threading.Lock()
+        self._executor = None
+        self._top = None
+        self._busca = None
+        self._capitulos = OrderedDict()
+
+    def iniciar(self, limite_top=10):
+        # Populares e sitemap ao mesmo tempo, enquanto o usuario ainda esta no menu principal.
+        with self._lock:
+            if self._top is None:
+                self._top = self._enviar(listar_top_novels, limite_top, verboso=False)
+            if self._busca is None:
+                self._busca = self._enviar(preparar_busca, verboso=False)
+
+    def fechar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._top = self._busca = None
+            self._capitulos.clear()
+        if executor is not None:
+            executor.shutdown()
+
+    def top_novels(self, limite=10):
+        self.iniciar(limite)
+        novels = _resultado(self._top)
+        if not novels:
+            # Falhou em segundo plano: repete em primeiro plano, agora mostrando o erro.
+            with self._lock:
+                self._top = None
+            novels = listar_top_novels(limite)
+        novels = novels[:limite]
+        self.antecipar_capitulos(novels)
+        return novels
+
+    def buscar(self, texto, limite=10):
+        self.iniciar()
+        if not _resultado(self._busca):
+            # Falhou em segundo plano: a busca abaixo carrega o sitemap de novo, mostrando o erro.
+            with self._lock:
+                self._busca = None
+        resultados = buscar_novels_por_nome(texto, limite)
+        self.antecipar_capitulos(resultados)
+        return resultados
+
+    def antecipar_capitulos(self, novels):
+        for novel in novels[: self.antecipados]:
+            self._futuro_capitulos(novel["url"])
+
+    def capitulos(self, url):
+        futuro = self._futuro_capitulos(url)
+        if futuro.cancel():
+            # Ainda na fila atras de outras antecipacoes: quem o usuario escolheu nao espera.
+            capitulos = extrair_links_pdf(url, verboso=False)
+            self._guardar(url, capitulos)
+        else:
+            capitulos = _resultado(futuro)
+        if capitulos:
+            return capitulos
+        with self._lock:
+            self._capitulos.pop(url, None)
+        return extrair_links_pdf(url)
+
+    def _futuro_capitulos(self, url):
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._capitulos.get(url)
+            if entrada is not None and agora - entrada[0] < TTL_CACHE_HTTP["serie"]:
+                self._capitulos.move_to_end(url)
+                return entrada[1]
+            futuro = self._enviar(extrair_links_pdf, url, verboso=False)
+            self._inserir(url, agora, futuro)
+            return futuro
+
+    def _guardar(self, url, capitulos):
+        futuro = Future()
+        futuro.set_result(capitulos)
+        with self._lock:
+            self._inserir(url, time.monotonic(), futuro)
+
+    def _inserir(self, url, agora, futuro):
+        self._capitulos[url] = (agora, futuro)
+        self._capitulos.move_to_end(url)
+        # LRU: so as listas mais recentes ficam em memoria.
+        while len(self._capitulos) > self.tamanho_cache:
+            _, (_, antigo) = self._capitulos.popitem(last=False)
+            antigo.cancel()
+
+    def _enviar(self, funcao, *args, **kwargs):
+        if self._executor is None:
+            self._executor = _ExecutorDaemon(4)
+        return self._executor.submit(funcao, *args, **kwargs)
+
+
+class _ExecutorDaemon:
+    # O ThreadPoolExecutor junta suas threads na saida do interpretador: um sitemap ainda
+    # sendo lido prenderia o "Sair" (ou o Ctrl+C). Threads daemon morrem com o processo.
+    def __init__(self, trabalhadores):
+        self._fila = queue.SimpleQueue()
+        self._trabalhadores = trabalhadores
+        for _ in range(trabalhadores):
+            threading.Thread(target=self._trabalhar, name="antecipacao", daemon=True).start()
+
+    def submit(self, funcao, *args, **kwargs):
+        futuro = Future()
+        self._fila.put((futuro, funcao, args, kwargs))
+        return futuro
+
+    def shutdown(self):
+        # Cancela o que ainda nao comecou; o que ja esta rodando termina sem ninguem esperar.
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            item[0].cancel()
+        for _ in range(self._trabalhadores):
+            self._fila.put(None)
+
+    def _trabalhar(self):
+        while True:
+            item = self._fila.get()
+            if item is None:
+                return
+            futuro, funcao, args, kwargs = item
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                futuro.set_result(funcao(*args, **kwargs))
+            except BaseException as exc:
+                futuro.set_exception(exc)
+
+
+def _resultado(futuro):
+    # Erro ou cancelamento em segundo plano vira "sem dados": quem chama repete em primeiro plano.
+    try:
+        return futuro.result()
+    except Exception:
+        return None
+
+
+ANTECIPADOR = AntecipadorMenus()
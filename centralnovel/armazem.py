@@ -0,0 +1,77 @@
+"""Content-addressed object store; the PDF/CBZ trees become links into it."""
+
+import os
+import shutil
+import threading
+
+from .config import ARMAZEM_DIR, LINK_ARMAZEM
+from .manifest import calcular_sha256
+from .metricas import METRICAS
+
+
+def caminho_objeto(sha256, extensao=".pdf"):
+    return os.path.join(ARMAZEM_DIR, sha256[:2], f"{sha256}{extensao}")
+
+
+def armazenar(caminho, sha256=None, extensao=None):
+    sha256 = sha256 or calcular_sha256(caminho)
+    objeto = caminho_objeto(sha256, extensao or os.path.splitext(caminho)[1])
+    if os.path.exists(objeto):
+        if not _mesmo_arquivo(caminho, objeto):
+            # Conteudo repetido: a copia recem-criada vira so mais um link.
+            vincular(objeto, caminho)
+            METRICAS.contar("armazem_duplicados")
+        return sha256
+
+    os.makedirs(os.path.dirname(objeto), exist_ok=True)
+    if LINK_ARMAZEM == "hardlink":
+        temporario = _temporario(objeto)
+        try:
+            os.link(caminho, temporario)
+        except OSError:
+            pass
+        else:
+            os.replace(temporario, objeto)
+            return sha256
+    shutil.move(caminho, objeto)
+    vincular(objeto, caminho)
+    return sha256
+
+
+def vincular(objeto, destino):
+    os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+    temporario = _temporario(destino)
+    alvo_relativo = os.path.relpath(objeto, os.path.dirname(destino) or ".")
+    if not (LINK_ARMAZEM == "hardlink" and _tentar(os.link, objeto, temporario)) and not _tentar(
+        os.symlink, alvo_relativo, temporario
+    ):
+        # Sem suporte a links (ex: FAT32, Windows sem permissao de symlink): copia.
+        shutil.copy2(objeto, temporario)
+    os.replace(temporario, destino)
+
+
+def desvincular(caminho, objeto):
+    # Remove um nome antigo apenas se ele aponta para o objeto; arquivos soltos ficam.
+    if os.path.lexists(caminho) and os.path.exists(objeto) and _mesmo_arquivo(caminho, objeto):
+        os.remove(caminho)
+        return True
+    return False
+
+
+def _mesmo_arquivo(caminho, objeto):
+    try:
+        return os.path.samefile(caminho, objeto)
+    except OSError:
+        return False
+
+
+def _tentar(funcao, origem, destino):
+    try:
+        funcao(origem, destino)
+    except (OSError, NotImplementedError):
+        return False
+    return True
+
+
+def _temporario(caminho):
+    return f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
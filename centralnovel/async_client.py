@@ -0,0 +1,209 @@
+"""Optional asyncio network backend built on aiohttp."""
+
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .banda import LIMITADOR_BANDA
+from .config import AJAX_URL, HEADERS, MAX_RETRIES, TAMANHO_BUFFER_DOWNLOAD
+from .download_utils import caminho_parcial
+from .escrita_stream import ArquivoParcial
+from .integridade import PDFInvalidoError
+from .metricas import METRICAS
+from .rate_limit import STATUS_LIMITACAO, limitador_para, registrar_resposta
+from .scraper import BLOCO_POST_ID, LeitorPostId, post_id_salvo, salvar_post_id
+from .transferencia import (
+    concluir_download,
+    descartar_invalido,
+    download_existente,
+    iniciar_validador,
+    preparar_retomada,
+    registrar_baixado,
+    retomada_invalida,
+)
+
+_TIMEOUT_CONEXAO = 30
+
+
+def backend_async_disponivel():
+    return aiohttp is not None
+
+
+async def extrair_post_id_da_url_async(session, url_pdf_page):
+    # SQLite fora do loop de eventos: uma espera pelo lock do banco travaria todos os downloads.
+    post_id = await asyncio.to_thread(post_id_salvo, url_pdf_page)
+    if post_id:
+        return post_id
+    try:
+        await _aguardar_requisicao(url_pdf_page)
+        with METRICAS.medir("post_id") as registro:
+            leitor = LeitorPostId()
+            async with session.get(url_pdf_page) as response:
+                _registrar(url_pdf_page, response)
+                response.raise_for_status()
+                async for bloco in response.content.iter_chunked(BLOCO_POST_ID):
+                    post_id = leitor.alimentar(bloco)
+                    if post_id:
+                        # Resto da pagina nao interessa: descarta a conexao em vez de ler ate o fim.
+                        response.close()
+                        break
+            registro["bytes"] = leitor.lidos
+        post_id = post_id or leitor.finalizar()
+    except Exception as exc:
+        print(f"Erro ao extrair post_id: {exc}")
+        return None
+    await asyncio.to_thread(salvar_post_id, url_pdf_page, post_id)
+    return post_id
+
+
+async def obter_token_pdf_async(session, post_id, url_pdf_page):
+    try:
+        if not post_id:
+            post_id = await extrair_post_id_da_url_async(session, url_pdf_page)
+            if not post_id:
+                print("Nao foi possivel extrair post_id")
+                return None
+
+        headers = {
+            "Referer": url_pdf_page,
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        data = {"action": "ts_ln_dl_url", "post_id": post_id}
+
+        for tentativa in range(1, MAX_RETRIES + 1):
+            await _aguardar_requisicao(AJAX_URL)
+            with METRICAS.medir("token"):
+                async with session.post(AJAX_URL, data=data, headers=headers) as response:
+                    _registrar(AJAX_URL, response)
+                    if response.status not in STATUS_LIMITACAO or tentativa == MAX_RETRIES:
+                        response.raise_for_status()
+                        result = await response.json(content_type=None)
+                        break
+            print(f"Erro {response.status} ao obter token. Tentando novamente...")
+            METRICAS.contar("retentativas_token")
+        if result.get("error") == 0 and result.get("url"):
+            return result["url"].replace("\\/", "/")
+        print(f"Resposta inesperada: {result}")
+        return None
+    except Exception as exc:
+        print(f"Erro ao obter token: {exc}")
+        return None
+
+
+async def baixar_pdf_async(session, post_id, url_pdf_page, caminho_destino, sobrescrever=False):
+    # Disco e SHA-256 em asyncio.to_thread: o loop de eventos so faz rede.
+    for tentativa in range(1, MAX_RETRIES + 1):
+        if tentativa > 1:
+            METRICAS.contar("retentativas_download")
+        try:
+            existente = await asyncio.to_thread(download_existente, caminho_destino, sobrescrever)
+            if existente:
+                return existente
+
+            pdf_url_com_token = await obter_token_pdf_async(session, post_id, url_pdf_page)
+            if not pdf_url_com_token:
+                print("Nao foi possivel obter token")
+                return False
+
+            inicio, headers = await asyncio.to_thread(preparar_retomada, caminho_destino, url_pdf_page)
+            await _aguardar_requisicao(pdf_url_com_token)
+            async with session.get(
+                pdf_url_com_token,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=None, connect=_TIMEOUT_CONEXAO, sock_read=60),
+            ) as response:
+                _registrar(pdf_url_com_token, response)
+                invalida = await asyncio.to_thread(
+                    retomada_invalida, response.status, response.headers, caminho_destino, inicio
+                )
+                if invalida:
+                    continue
+                response.raise_for_status()
+
+                # Na retomada o validador rele o .part inteiro para refazer o SHA-256.
+                inicio, tamanho_total, validador = await asyncio.to_thread(
+                    iniciar_validador, response.status, response.headers, caminho_destino, inicio
+                )
+                arquivo = ArquivoParcial(
+                    caminho_parcial(caminho_destino), inicio, tamanho_total, validador
+                )
+                with METRICAS.medir("transferencia") as registro:
+                    await asyncio.to_thread(arquivo.abrir)
+                    concluido = False
+                    try:
+                        async for chunk in response.content.iter_chunked(TAMANHO_BUFFER_DOWNLOAD):
+                            await asyncio.to_thread(arquivo.escrever, chunk)
+                            espera = LIMITADOR_BANDA.reservar(len(chunk))
+                            if espera > 0:
+                                await asyncio.sleep(espera)
+                        concluido = True
+                    finally:
+                        registro["bytes"] = await asyncio.to_thread(arquivo.fechar, concluido)
+            return await asyncio.to_thread(concluir_download, validador, caminho_destino)
+        except PDFInvalidoError as exc:
+            await asyncio.to_thread(descartar_invalido, exc, caminho_destino)
+            continue
+        except aiohttp.ClientResponseError as exc:
+            if exc.status in STATUS_LIMITACAO and tentativa < MAX_RETRIES:
+                print(f"Erro {exc.status}. Reduzindo ritmo e tentando novamente...")
+                continue
+            print(f"Erro HTTP: {exc}")
+            return False
+        except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+            if tentativa < MAX_RETRIES:
+                print(f"Conexao interrompida ({exc}). Retomando...")
+                continue
+            print(f"Erro de conexao: {exc}")
+            return False
+        except Exception as exc:
+            print(f"Erro: {exc}")
+            return False
+    return False
+
+
+async def baixar_capitulos_async(tarefas, max_simultaneos, sobrescrever=False, ao_baixar=None):
+    semaforo = asyncio.Semaphore(max_simultaneos)
+    connector = aiohttp.TCPConnector(limit=max_simultaneos)
+    timeout = aiohttp.ClientTimeout(total=None, connect=_TIMEOUT_CONEXAO, sock_read=30)
+
+    async with aiohttp.ClientSession(
+        headers=HEADERS,
+        connector=connector,
+        timeout=timeout,
+    ) as session:
+
+        async def _baixar(tarefa):
+            index, total, cap, caminho_pdf = tarefa
+            async with semaforo:
+                print(
+                    f"\n[{index}/{total}] Vol. {cap['volume']} "
+                    f"Cap. {cap['capitulo']}: {cap['titulo']}"
+                )
+                baixado = await baixar_pdf_async(
+                    session, cap.get("post_id"), cap["url"], caminho_pdf, sobrescrever
+                )
+            if baixado and ao_baixar is not None:
+                return await asyncio.to_thread(registrar_baixado, ao_baixar, cap, baixado)
+            return baixado
+
+        return await asyncio.gather(*(_baixar(tarefa) for tarefa in tarefas))
+
+
+def baixar_capitulos(tarefas, max_simultaneos, sobrescrever=False, ao_baixar=None):
+    if not backend_async_disponivel():
+        raise RuntimeError("Backend async requer aiohttp: pip install aiohttp")
+    return asyncio.run(baixar_capitulos_async(tarefas, max_simultaneos, sobrescrever, ao_baixar))
+
+
+async def _aguardar_requisicao(url):
+    with METRICAS.medir("limitador"):
+        espera = limitador_para(url).reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+def _registrar(url, response):
+    registrar_resposta(url, response.status, response.headers.get("Retry-After"))
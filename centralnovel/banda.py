@@ -0,0 +1,97 @@
+"""Process-wide download bandwidth cap with an optional time-of-day schedule."""
+
+import threading
+import time
+from datetime import datetime
+
+from .config import AGENDA_BANDA, LIMITE_BANDA_KBPS
+from .rate_limit import TokenBucket
+
+_RAJADA_SEGUNDOS = 0.25
+_INTERVALO_AGENDA = 1.0
+
+
+class LimitadorBanda:
+    def __init__(self, limite_kbps=LIMITE_BANDA_KBPS, agenda=AGENDA_BANDA):
+        self._lock = threading.Lock()
+        self._balde = None
+        self._conferido_em = float("-inf")
+        self.limite_kbps = limite_kbps or None
+        self.agenda = [_interpretar_janela(janela) for janela in agenda]
+
+    def definir_limite(self, limite_kbps):
+        with self._lock:
+            self.limite_kbps = limite_kbps or None
+            self._conferido_em = float("-inf")
+
+    def definir_agenda(self, agenda):
+        janelas = [_interpretar_janela(janela) for janela in agenda]
+        with self._lock:
+            self.agenda = janelas
+            self._conferido_em = float("-inf")
+
+    def limite_vigente(self, agora=None):
+        horario = (agora or datetime.now()).time()
+        for inicio, fim, limite_kbps in self.agenda:
+            if _dentro_da_janela(horario, inicio, fim):
+                return limite_kbps or None
+        return self.limite_kbps
+
+    def reservar(self, quantidade):
+        agora = time.monotonic()
+        with self._lock:
+            if agora - self._conferido_em >= _INTERVALO_AGENDA:
+                self._conferido_em = agora
+                self._atualizar_balde()
+            balde = self._balde
+        if balde is None:
+            return 0.0
+        # O balde fica em debito enquanto houver transferencias ativas: cada bloco
+        # entra na fila atras dos anteriores, entao N downloads recebem ~1/N da banda.
+        return balde.reservar(quantidade)
+
+    def aguardar(self, quantidade):
+        espera = self.reservar(quantidade)
+        if espera > 0:
+            time.sleep(espera)
+
+    def _atualizar_balde(self):
+        limite_kbps = self.limite_vigente()
+        if not limite_kbps:
+            self._balde = None
+            return
+        taxa = limite_kbps * 1024
+        if self._balde is None:
+            self._balde = TokenBucket(taxa, capacidade=taxa * _RAJADA_SEGUNDOS)
+        elif self._balde.taxa != taxa:
+            with self._balde._lock:
+                self._balde.taxa = float(taxa)
+                self._balde.capacidade = taxa * _RAJADA_SEGUNDOS
+
+
+LIMITADOR_BANDA = LimitadorBanda()
+
+
+def configurar_banda(limite_kbps=None, agenda=None):
+    if limite_kbps is not None:
+        if limite_kbps < 0:
+            raise ValueError("limite de banda nao pode ser negativo")
+        LIMITADOR_BANDA.definir_limite(limite_kbps)
+    if agenda is not None:
+        LIMITADOR_BANDA.definir_agenda(agenda)
+
+
+def _interpretar_janela(janela):
+    inicio, fim, limite_kbps = janela
+    return _interpretar_horario(inicio), _interpretar_horario(fim), limite_kbps
+
+
+def _interpretar_horario(texto):
+    return datetime.strptime(texto, "%H:%M").time()
+
+
+def _dentro_da_janela(horario, inicio, fim):
+    if inicio <= fim:
+        return inicio <= horario < fim
+    # Janela que atravessa a meia-noite, ex: ("22:00", "06:00").
+    return horario >= inicio or horario < fim
@@ -0,0 +1,207 @@
+"""Disk-backed HTTP response cache with per-resource TTL and revalidation."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from . import http_client
+from .config import CACHE_HTTP_ATIVO, CACHE_HTTP_DIR, CACHE_HTTP_MAX_MB, TTL_CACHE_HTTP
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    url TEXT PRIMARY KEY,
+    arquivo TEXT NOT NULL,
+    encoding TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    tamanho INTEGER NOT NULL,
+    validado_em REAL NOT NULL,
+    acessado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em);
+"""
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+_IGNORAR = False
+
+
+class CacheHTTP:
+    def __init__(self, pasta=CACHE_HTTP_DIR, tamanho_maximo=CACHE_HTTP_MAX_MB * 1024 * 1024):
+        self.pasta = pasta
+        self.tamanho_maximo = tamanho_maximo
+        os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(
+            os.path.join(pasta, "indice.sqlite3"), timeout=30, check_same_thread=False
+        )
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_SCHEMA)
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+    def obter(self, url, recurso, ignorar_cache=False, encoding=None, verboso=True):
+        caminho, encoding_salvo = self.obter_arquivo(url, recurso, ignorar_cache, verboso=verboso)
+        with open(caminho, "rb") as file_obj:
+            return file_obj.read().decode(encoding or encoding_salvo or "utf-8", errors="replace")
+
+    def obter_arquivo(self, url, recurso, ignorar_cache=False, revalidar=False, verboso=True):
+        agora = time.time()
+        entrada = None if ignorar_cache else self._entrada(url)
+        # revalidar: pula o TTL, mas ainda manda os validadores (um 304 custa pouco).
+        dentro_do_ttl = entrada is not None and agora - entrada["validado_em"] < TTL_CACHE_HTTP[recurso]
+        if dentro_do_ttl and not revalidar:
+            self._tocar(url, agora)
+            return entrada["caminho"], entrada["encoding"]
+
+        headers = {}
+        if entrada is not None:
+            if entrada["etag"]:
+                headers["If-None-Match"] = entrada["etag"]
+            if entrada["last_modified"]:
+                headers["If-Modified-Since"] = entrada["last_modified"]
+        try:
+            with http_client.get(url, headers=headers, stream=True) as response:
+                if response.status_code == 304 and entrada is not None:
+                    self._revalidar(url, agora)
+                    return entrada["caminho"], entrada["encoding"]
+                response.raise_for_status()
+                return self._salvar(url, response, agora)
+        except Exception as exc:
+            if entrada is None:
+                raise
+            # Sem rede, uma copia vencida ainda e melhor do que nada.
+            if verboso:
+                print(f"[AVISO] Usando copia local de {url}: {exc}")
+            return entrada["caminho"], entrada["encoding"]
+
+    def limpar(self):
+        with self._lock, self._conexao:
+            arquivos = [linha["arquivo"] for linha in self._conexao.execute("SELECT arquivo FROM respostas")]
+            self._conexao.execute("DELETE FROM respostas")
+        for arquivo in arquivos:
+            _remover(os.path.join(self.pasta, arquivo))
+        return len(arquivos)
+
+    def _entrada(self, url):
+        with self._lock:
+            linha = self._conexao.execute("SELECT * FROM respostas WHERE url = ?", (url,)).fetchone()
+        if linha is None:
+            return None
+        entrada = dict(linha)
+        entrada["caminho"] = os.path.join(self.pasta, linha["arquivo"])
+        if not os.path.exists(entrada["caminho"]):
+            return None
+        return entrada
+
+    def _tocar(self, url, agora):
+        with self._lock, self._conexao:
+            self._conexao.execute("UPDATE respostas SET acessado_em = ? WHERE url = ?", (agora, url))
+
+    def _revalidar(self, url, agora):
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "UPDATE respostas SET validado_em = ?, acessado_em = ? WHERE url = ?",
+                (agora, agora, url),
+            )
+
+    def _salvar(self, url, response, agora):
+        arquivo = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        caminho = os.path.join(self.pasta, arquivo)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tamanho = 0
+        try:
+            # Em blocos: paginas grandes (sitemaps) nunca ficam inteiras na memoria.
+            with open(temporario, "wb") as file_obj:
+                for bloco in response.iter_content(chunk_size=64 * 1024):
+                    file_obj.write(bloco)
+                    tamanho += len(bloco)
+            os.replace(temporario, caminho)
+        except BaseException:
+            _remover(temporario)
+            raise
+
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                """
+                INSERT OR REPLACE INTO respostas
+                    (url, arquivo, encoding, etag, last_modified, tamanho, validado_em, acessado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    url,
+                    arquivo,
+                    response.encoding,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    tamanho,
+                    agora,
+                    agora,
+                ),
+            )
+            removidos = self._expulsar()
+        for removido in removidos:
+            _remover(os.path.join(self.pasta, removido))
+        return caminho, response.encoding
+
+    def _expulsar(self):
+        total = self._conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        removidos = []
+        if total <= self.tamanho_maximo:
+            return removidos
+        # LRU: sai quem foi usado ha mais tempo ate caber no limite.
+        for linha in self._conexao.execute(
+            "SELECT url, arquivo, tamanho FROM respostas ORDER BY acessado_em"
+        ).fetchall():
+            if total <= self.tamanho_maximo:
+                break
+            self._conexao.execute("DELETE FROM respostas WHERE url = ?", (linha["url"],))
+            removidos.append(linha["arquivo"])
+            total -= linha["tamanho"]
+        return removidos
+
+
+def configurar_cache(ignorar=None):
+    global _IGNORAR
+    if ignorar is not None:
+        _IGNORAR = ignorar
+
+
+def obter_cache():
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = CacheHTTP()
+    return _CACHE
+
+
+def obter_arquivo(url, recurso, revalidar=False, verboso=True):
+    if not CACHE_HTTP_ATIVO:
+        return None
+    caminho, _ = obter_cache().obter_arquivo(
+        url, recurso, ignorar_cache=_IGNORAR, revalidar=revalidar, verboso=verboso
+    )
+    return caminho
+
+
+def obter_texto(url, recurso, encoding=None, verboso=True):
+    if not CACHE_HTTP_ATIVO:
+        response = http_client.get(url)
+        response.raise_for_status()
+        if encoding:
+            response.encoding = encoding
+        return response.text
+    return obter_cache().obter(url, recurso, ignorar_cache=_IGNORAR, encoding=encoding, verboso=verboso)
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
@@ -0,0 +1,268 @@
+"""Local SQLite catalog of series metadata, filled by a concurrent sitemap crawler."""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .config import CATALOGO_DB, CATALOGO_SIMULTANEOS, SERIES_SITEMAP_URL
+from .scraper import analisar_pagina_serie, iterar_novels_sitemap, obter_pagina_serie
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS novels (
+    url TEXT PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    capitulos INTEGER NOT NULL,
+    ultimo_capitulo INTEGER,
+    lastmod TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    rastreado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_novels_titulo ON novels (titulo);
+CREATE INDEX IF NOT EXISTS idx_novels_lastmod ON novels (lastmod);
+CREATE TABLE IF NOT EXISTS volumes (
+    url TEXT NOT NULL,
+    volume TEXT NOT NULL,
+    capitulos INTEGER NOT NULL,
+    PRIMARY KEY (url, volume)
+);
+"""
+
+_LEITOR = None
+_LEITOR_LOCK = threading.Lock()
+
+
+class Catalogo:
+    def __init__(self, caminho=CATALOGO_DB):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.fechar()
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+    def obter(self, url):
+        with self._lock:
+            linha = self._conexao.execute("SELECT * FROM novels WHERE url = ?", (url,)).fetchone()
+        return dict(linha) if linha else None
+
+    def novels(self):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT url, titulo, capitulos FROM novels ORDER BY titulo"
+            ).fetchall()
+        return [_novel(linha) for linha in linhas]
+
+    def mais_recentes(self, limite=10):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT url, titulo, capitulos FROM novels WHERE lastmod IS NOT NULL "
+                "ORDER BY lastmod DESC LIMIT ?",
+                (limite,),
+            ).fetchall()
+        return [_novel(linha) for linha in linhas]
+
+    def volumes(self, url):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT volume, capitulos FROM volumes WHERE url = ? ORDER BY rowid", (url,)
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def estados(self):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT url, capitulos, lastmod, etag, last_modified, "
+                "EXISTS (SELECT 1 FROM volumes WHERE volumes.url = novels.url) AS volumes "
+                "FROM novels"
+            ).fetchall()
+        return {linha["url"]: dict(linha) for linha in linhas}
+
+    def registrar(self, url, titulo, capitulos, lastmod, etag, last_modified):
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                """
+                INSERT OR REPLACE INTO novels
+                    (url, titulo, capitulos, ultimo_capitulo, lastmod, etag, last_modified, rastreado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    url,
+                    titulo,
+                    len(capitulos),
+                    max((int(cap["capitulo"]) for cap in capitulos), default=None),
+                    lastmod,
+                    etag,
+                    last_modified,
+                    time.time(),
+                ),
+            )
+            self._conexao.execute("DELETE FROM volumes WHERE url = ?", (url,))
+            self._conexao.executemany(
+                "INSERT INTO volumes (url, volume, capitulos) VALUES (?, ?, ?)",
+                [(url, volume, total) for volume, total in _contar_volumes(capitulos).items()],
+            )
+
+    def remover(self, urls):
+        parametros = [(url,) for url in urls]
+        with self._lock, self._conexao:
+            self._conexao.executemany("DELETE FROM novels WHERE url = ?", parametros)
+            self._conexao.executemany("DELETE FROM volumes WHERE url = ?", parametros)
+
+    def revalidar(self, url, lastmod):
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "UPDATE novels SET lastmod = ?, rastreado_em = ? WHERE url = ?",
+                (lastmod, time.time(), url),
+            )
+
+
+def rastrear_catalogo(simultaneos=None, completo=False, caminho=CATALOGO_DB, url_sitemap=SERIES_SITEMAP_URL):
+    simultaneos = simultaneos or CATALOGO_SIMULTANEOS
+    resumo = {"novas": 0, "atualizadas": 0, "sem_mudanca": 0, "removidas": 0, "falhas": 0}
+    print(f"Rastreando catalogo ({simultaneos} paginas em paralelo)...")
+    with Catalogo(caminho) as catalogo, ThreadPoolExecutor(max_workers=simultaneos) as executor:
+        estados = catalogo.estados()
+        pendentes = set()
+        vistas = set()
+        try:
+            # O sitemap e revalidado mesmo dentro do TTL: e dele que vem o lastmod de cada serie.
+            for novel in iterar_novels_sitemap(url_sitemap, revalidar=True):
+                vistas.add(novel["url"])
+                estado = estados.get(novel["url"])
+                # Series gravadas antes da tabela de volumes sao relidas por inteiro uma vez.
+                completa = completo or _sem_volumes(estado)
+                # Incremental: a serie so e relida quando o lastmod do sitemap mudou.
+                if not completa and estado and novel["lastmod"] and estado["lastmod"] == novel["lastmod"]:
+                    resumo["sem_mudanca"] += 1
+                    continue
+                # Janela limitada: o sitemap continua sendo lido em fluxo enquanto as paginas baixam.
+                if len(pendentes) >= simultaneos * 4:
+                    prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                    _gravar(catalogo, prontos, resumo)
+                pendentes.add(executor.submit(_rastrear_serie, novel, estado, completa))
+        except Exception as exc:
+            print(f"Erro ao ler sitemap: {exc}")
+            resumo["falhas"] += 1
+        else:
+            # So com o sitemap lido ate o fim (e nao vazio) da para saber o que saiu do site.
+            removidas = estados.keys() - vistas if vistas else set()
+            catalogo.remover(removidas)
+            resumo["removidas"] = len(removidas)
+        _gravar(catalogo, wait(pendentes).done, resumo)
+
+    print(
+        f"Catalogo: {resumo['novas']} novas | {resumo['atualizadas']} atualizadas | "
+        f"{resumo['sem_mudanca']} sem mudanca | {resumo['removidas']} removidas | "
+        f"{resumo['falhas']} falhas"
+    )
+    return resumo
+
+
+def novels_do_catalogo(caminho=CATALOGO_DB, verboso=True):
+    return _consultar(caminho, lambda catalogo: catalogo.novels(), [], verboso)
+
+
+def mais_recentes_do_catalogo(limite=10, caminho=CATALOGO_DB, verboso=True):
+    return _consultar(caminho, lambda catalogo: catalogo.mais_recentes(limite), [], verboso)
+
+
+def volumes_do_catalogo(url, caminho=CATALOGO_DB, verboso=True):
+    return _consultar(caminho, lambda catalogo: catalogo.volumes(url), [], verboso)
+
+
+def titulo_do_catalogo(url, caminho=CATALOGO_DB):
+    registro = _consultar(caminho, lambda catalogo: catalogo.obter(url), None)
+    return registro["titulo"] if registro else None
+
+
+def _consultar(caminho, consulta, padrao, verboso=True):
+    # Sem catalogo rastreado, quem chama segue com os dados do site.
+    if not os.path.exists(caminho):
+        return padrao
+    try:
+        return consulta(_leitor(caminho))
+    except sqlite3.Error as exc:
+        if verboso:
+            print(f"[AVISO] Catalogo local indisponivel: {exc}")
+        return padrao
+
+
+def _leitor(caminho):
+    # Uma conexao de leitura por processo: abrir o Catalogo a cada consulta refaz o PRAGMA
+    # e o schema. Com WAL ela enxerga o que o rastreador grava por outra conexao.
+    global _LEITOR
+    with _LEITOR_LOCK:
+        if _LEITOR is None or _LEITOR.caminho != caminho:
+            if _LEITOR is not None:
+                _LEITOR.fechar()
+            _LEITOR = Catalogo(caminho)
+        return _LEITOR
+
+
+def _rastrear_serie(novel, estado, completo):
+    validadores = {} if completo or estado is None else estado
+    pagina = obter_pagina_serie(
+        novel["url"], validadores.get("etag"), validadores.get("last_modified")
+    )
+    if pagina is None:
+        return novel, estado, None
+    if pagina["status"] == 304:
+        return novel, estado, pagina
+    try:
+        pagina.update(analisar_pagina_serie(pagina["html"], novel["url"]))
+    except Exception as exc:
+        print(f"Erro ao analisar serie {novel['url']}: {exc}")
+        return novel, estado, None
+    # O HTML nao e mais necessario; nao deixa a janela de pendentes segurar paginas inteiras.
+    pagina["html"] = None
+    return novel, estado, pagina
+
+
+def _gravar(catalogo, futuros, resumo):
+    for futuro in futuros:
+        novel, estado, pagina = futuro.result()
+        if pagina is None:
+            resumo["falhas"] += 1
+        elif pagina["status"] == 304:
+            catalogo.revalidar(novel["url"], novel["lastmod"])
+            resumo["sem_mudanca"] += 1
+        else:
+            catalogo.registrar(
+                novel["url"],
+                pagina["title"],
+                pagina["capitulos"],
+                novel["lastmod"],
+                pagina["etag"],
+                pagina["last_modified"],
+            )
+            resumo["atualizadas" if estado else "novas"] += 1
+
+
+def _contar_volumes(capitulos):
+    # Na ordem da pagina da serie (capitulos ja vem ordenados por volume).
+    volumes = {}
+    for cap in capitulos:
+        volume = str(cap["volume"])
+        volumes[volume] = volumes.get(volume, 0) + 1
+    return volumes
+
+
+def _sem_volumes(estado):
+    return bool(estado and estado["capitulos"] and not estado["volumes"])
+
+
+def _novel(linha):
+    return {"title": linha["titulo"], "url": linha["url"], "capitulos": linha["capitulos"]}
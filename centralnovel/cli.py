@@ -0,0 +1,336 @@
+"""Non-interactive command line interface."""
+
+import argparse
+import math
+import os
+import sys
+from pathlib import Path
+
+EXIT_OK = 0
+EXIT_FALHAS = 1
+EXIT_USO = 2
+EXIT_NADA_ENCONTRADO = 3
+EXIT_ERRO = 4
+EXIT_INTERROMPIDO = 130  # convencao do shell para SIGINT (128 + 2)
+
+
+def main(argv=None):
+    parser = _criar_parser()
+    args = parser.parse_args(argv)
+    if args.sem_cache:
+        from .cache_http import configurar_cache
+
+        configurar_cache(ignorar=True)
+    if getattr(args, "backend", None) == "async" and not _backend_async_disponivel():
+        print("[ERRO] --backend async requer aiohttp: pip install aiohttp")
+        return EXIT_USO
+    # Nenhum caminho do modo batch deve esperar resposta no terminal.
+    stdin_original = sys.stdin
+    try:
+        with open(os.devnull, "r", encoding="utf-8") as sys.stdin:
+            return args.executar(args)
+    except KeyboardInterrupt:
+        print("\n\nInterrompido")
+        return EXIT_INTERROMPIDO
+    finally:
+        sys.stdin = stdin_original
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Centralnovel downloader (modo nao interativo)",
+    )
+    parser.add_argument(
+        "--sem-cache",
+        action="store_true",
+        help="ignora o cache local de paginas (sitemap, populares, series) e busca no site",
+    )
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    baixar = subparsers.add_parser("baixar", help="baixa capitulos de uma novel")
+    baixar.add_argument("url", help="link da novel")
+    baixar.add_argument("--capitulos", help="ex: 1,2,10-15")
+    baixar.add_argument("--volumes", help="ex: 1,3-4")
+    baixar.add_argument("--titulo", help="nome da pasta da novel (padrao: titulo do site)")
+    _adicionar_opcoes_download(baixar)
+    baixar.set_defaults(executar=_cmd_baixar)
+
+    sync = subparsers.add_parser("sync", help="baixa apenas capitulos novos ou alterados")
+    sync.add_argument("url", help="link da novel")
+    sync.add_argument("--titulo", help="nome da pasta da novel (padrao: titulo do site)")
+    _adicionar_opcoes_download(sync)
+    sync.set_defaults(executar=_cmd_sync)
+
+    enfileirar = subparsers.add_parser(
+        "enfileirar", help="adiciona capitulos a fila compartilhada por varios workers"
+    )
+    enfileirar.add_argument("urls", nargs="+", help="links das novels")
+    enfileirar.add_argument("--capitulos", help="ex: 1,2,10-15")
+    enfileirar.add_argument("--volumes", help="ex: 1,3-4")
+    _adicionar_opcao_fila(enfileirar)
+    enfileirar.set_defaults(executar=_cmd_enfileirar)
+
+    worker = subparsers.add_parser("worker", help="processa a fila ate ela esvaziar")
+    worker.add_argument("--id", help="identificador do worker (padrao: host-pid)")
+    _adicionar_opcao_fila(worker)
+    _adicionar_opcoes_download(worker)
+    worker.set_defaults(executar=_cmd_worker)
+
+    fila = subparsers.add_parser("fila", help="mostra o andamento da fila")
+    _adicionar_opcao_fila(fila)
+    fila.set_defaults(executar=_cmd_fila)
+
+    catalogo = subparsers.add_parser(
+        "catalogo", help="rastreia as series do sitemap e atualiza o catalogo local"
+    )
+    catalogo.add_argument(
+        "--simultaneos", type=_inteiro_positivo, help="paginas de series lidas em paralelo"
+    )
+    catalogo.add_argument(
+        "--completo", action="store_true", help="rele todas as series, nao so as alteradas"
+    )
+    catalogo.set_defaults(executar=_cmd_catalogo)
+
+    converter = subparsers.add_parser("converter", help="converte PDF (arquivo ou pasta) para CBZ")
+    converter.add_argument("caminho", help="arquivo PDF ou pasta")
+    converter.add_argument("--saida", help="pasta de saida (padrao: mesma pasta)")
+    converter.add_argument("--recursivo", action="store_true", help="inclui subpastas")
+    _adicionar_politica_sobrescrita(converter)
+    converter.set_defaults(executar=_cmd_converter)
+    return parser
+
+
+def _adicionar_opcoes_download(parser):
+    parser.add_argument("--cbz", action="store_true", help="converte cada PDF para CBZ")
+    parser.add_argument("--simultaneos", type=_inteiro_positivo, help="downloads em paralelo")
+    parser.add_argument("--rps", type=_numero_positivo, help="requisicoes por segundo por host")
+    parser.add_argument("--backend", choices=["threads", "async"])
+    parser.add_argument(
+        "--banda",
+        type=_numero_nao_negativo,
+        help="limite total de download em KB/s (0 = sem limite)",
+    )
+    parser.add_argument(
+        "--verificar",
+        action="store_true",
+        default=None,
+        help="confere no disco os arquivos ja registrados no manifesto (apagados ou truncados "
+        "sao baixados de novo)",
+    )
+    _adicionar_politica_sobrescrita(parser)
+
+
+def _inteiro_positivo(texto):
+    valor = _converter(int, texto, "um inteiro")
+    if valor <= 0:
+        raise argparse.ArgumentTypeError(f"deve ser maior que zero: {texto}")
+    return valor
+
+
+def _numero_positivo(texto):
+    valor = _converter(float, texto, "um numero")
+    if not valor > 0:
+        raise argparse.ArgumentTypeError(f"deve ser maior que zero: {texto}")
+    return valor
+
+
+def _numero_nao_negativo(texto):
+    valor = _converter(float, texto, "um numero")
+    if not valor >= 0:
+        raise argparse.ArgumentTypeError(f"nao pode ser negativo: {texto}")
+    return valor
+
+
+def _converter(tipo, texto, descricao):
+    try:
+        valor = tipo(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"deve ser {descricao}: {texto}") from None
+    if not math.isfinite(valor):
+        raise argparse.ArgumentTypeError(f"deve ser {descricao} finito: {texto}")
+    return valor
+
+
+def _adicionar_opcao_fila(parser):
+    from .config import COORDENADOR_DB
+
+    parser.add_argument(
+        "--fila",
+        default=COORDENADOR_DB,
+        help=f"arquivo SQLite da fila, em disco compartilhado (padrao: {COORDENADOR_DB})",
+    )
+
+
+def _adicionar_politica_sobrescrita(parser):
+    parser.add_argument(
+        "--sobrescrever",
+        choices=["pular", "substituir"],
+        default="pular",
+        help="o que fazer com arquivos que ja existem (padrao: pular)",
+    )
+
+
+def _cmd_baixar(args):
+    from .downloader import download_capitulos_novel
+    from .scraper import extrair_links_pdf, normalizar_url_novel, obter_titulo_novel
+    from .selection import filtrar_capitulos
+
+    url = normalizar_url_novel(args.url)
+    if not url:
+        print(f"[ERRO] Link invalido: {args.url}")
+        return EXIT_USO
+
+    capitulos = extrair_links_pdf(url)
+    if capitulos is None:
+        print("[ERRO] Nao foi possivel acessar a novel")
+        return EXIT_ERRO
+    if not capitulos:
+        print("[ERRO] Nenhum capitulo encontrado")
+        return EXIT_NADA_ENCONTRADO
+
+    try:
+        selecionados = filtrar_capitulos(capitulos, args.capitulos, args.volumes)
+    except ValueError:
+        print("[ERRO] Selecao invalida")
+        return EXIT_USO
+    if not selecionados:
+        print("[ERRO] Nenhum capitulo corresponde a selecao")
+        return EXIT_NADA_ENCONTRADO
+
+    titulo = args.titulo or obter_titulo_novel(url)
+    _, falhas = download_capitulos_novel(
+        selecionados,
+        titulo,
+        **_opcoes_download(args),
+    )
+    return _codigo_resultado(falhas)
+
+
+def _cmd_sync(args):
+    from .scraper import normalizar_url_novel
+    from .sync import sincronizar_novel
+
+    url = normalizar_url_novel(args.url)
+    if not url:
+        print(f"[ERRO] Link invalido: {args.url}")
+        return EXIT_USO
+
+    resultado = sincronizar_novel(url, args.titulo, **_opcoes_download(args))
+    if resultado is None:
+        return EXIT_ERRO
+    _, falhas = resultado
+    return _codigo_resultado(falhas)
+
+
+def _cmd_enfileirar(args):
+    from .coordenador import FilaDistribuida
+    from .scraper import extrair_links_pdf, normalizar_url_novel, obter_titulo_novel
+    from .selection import filtrar_capitulos
+
+    total = 0
+    codigo = EXIT_OK
+    with FilaDistribuida(args.fila) as fila:
+        for entrada in args.urls:
+            url = normalizar_url_novel(entrada)
+            if not url:
+                print(f"[ERRO] Link invalido: {entrada}")
+                codigo = EXIT_USO
+                continue
+            capitulos = extrair_links_pdf(url)
+            if capitulos is None:
+                print(f"[ERRO] Nao foi possivel acessar: {url}")
+                codigo = EXIT_ERRO
+                continue
+            try:
+                selecionados = filtrar_capitulos(capitulos, args.capitulos, args.volumes)
+            except ValueError:
+                print("[ERRO] Selecao invalida")
+                return EXIT_USO
+            if not selecionados:
+                print(f"[AVISO] Nenhum capitulo para: {url}")
+                continue
+            adicionados = fila.enfileirar(obter_titulo_novel(url), selecionados)
+            print(f"Enfileirados: {adicionados} (ja estavam na fila: {len(selecionados) - adicionados})")
+            total += adicionados
+    if codigo == EXIT_OK and not total:
+        return EXIT_NADA_ENCONTRADO
+    return codigo
+
+
+def _cmd_worker(args):
+    from .coordenador import executar_worker
+
+    opcoes = _opcoes_download(args)
+    _, falhas = executar_worker(
+        args.fila,
+        worker=args.id,
+        max_simultaneos=opcoes.pop("max_simultaneos"),
+        **opcoes,
+    )
+    return _codigo_resultado(falhas)
+
+
+def _cmd_fila(args):
+    from .coordenador import FilaDistribuida
+
+    if not Path(args.fila).exists():
+        print(f"[ERRO] Nao encontrado: {args.fila}")
+        return EXIT_NADA_ENCONTRADO
+    with FilaDistribuida(args.fila) as fila:
+        progresso = fila.progresso()
+    print(" | ".join(f"{estado}: {total}" for estado, total in progresso.items()))
+    return EXIT_OK
+
+
+def _cmd_catalogo(args):
+    from .catalogo import rastrear_catalogo
+
+    resumo = rastrear_catalogo(simultaneos=args.simultaneos, completo=args.completo)
+    return _codigo_resultado(resumo["falhas"])
+
+
+def _cmd_converter(args):
+    from .converter import converter_pdf_para_cbz, processar_pasta
+
+    caminho = Path(args.caminho)
+    sobrescrever = args.sobrescrever == "substituir"
+    if caminho.is_dir():
+        sucessos, falhas = processar_pasta(
+            caminho,
+            args.saida,
+            recursive=args.recursivo,
+            confirmar=False,
+            sobrescrever=sobrescrever,
+        )
+        if not sucessos and not falhas:
+            return EXIT_NADA_ENCONTRADO
+        return _codigo_resultado(falhas)
+
+    if not caminho.exists():
+        print(f"[ERRO] Nao encontrado: {caminho}")
+        return EXIT_NADA_ENCONTRADO
+    resultado = converter_pdf_para_cbz(caminho, args.saida, sobrescrever=sobrescrever)
+    return EXIT_OK if resultado else EXIT_FALHAS
+
+
+def _opcoes_download(args):
+    return {
+        "gerar_cbz": args.cbz,
+        "max_simultaneos": args.simultaneos,
+        "requisicoes_por_segundo": args.rps,
+        "backend": args.backend,
+        "limite_banda_kbps": args.banda,
+        "sobrescrever": args.sobrescrever == "substituir",
+        "verificar": args.verificar,
+    }
+
+
+def _backend_async_disponivel():
+    from .async_client import backend_async_disponivel
+
+    return backend_async_disponivel()
+
+
+def _codigo_resultado(falhas):
+    return EXIT_FALHAS if falhas else EXIT_OK
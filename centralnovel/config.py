@@ -12,10 +12,54 @@ HEADERS = {
 
 DELAY_ENTRE_DOWNLOADS = 3
 MAX_RETRIES = 3
+MAX_DOWNLOADS_SIMULTANEOS = 4
+REQUISICOES_POR_SEGUNDO = 2.0
+TAXA_MINIMA = 0.2
+TAXA_MAXIMA = 10.0
+AUMENTO_ADITIVO = 0.05
+FATOR_REDUCAO = 0.5
+JITTER_MAXIMO = 1.0
+HTTP_POOL_SIZE = 16
+LIMITE_BANDA_KBPS = None  # None = sem limite; soma de todos os downloads do processo
+AGENDA_BANDA = []  # ex: [("08:00", "19:00", 2048)] limita a 2 MB/s em horario comercial
+TAMANHO_BUFFER_DOWNLOAD = 128 * 1024
+PREALOCAR_DOWNLOAD = True
+FSYNC_DOWNLOAD = False
+TOKENS_ANTECIPADOS = 8
+VALIDADE_TOKEN_SEGUNDOS = 600
+MARGEM_RENOVACAO_TOKEN = 30
+BACKEND_REDE = "threads"  # "threads" ou "async" (requer aiohttp)
 
 QUALIDADE_JPG = 95
 DPI = 150
+PROCESSOS_CONVERSAO = None  # None = um processo por CPU
+FILA_CONVERSAO_MAX = 32
 
 LINKS_CSV = "links_capitulos.csv"
 PDF_ROOT_DIR = "PDF"
 CBZ_ROOT_DIR = "CBZ"
+MANIFEST_DB = "biblioteca.sqlite3"
+VERIFICAR_ARQUIVOS = False  # confere no disco os arquivos do manifesto antes de pula-los
+ARMAZEM_ATIVO = False
+ARMAZEM_DIR = "objetos"
+LINK_ARMAZEM = "hardlink"  # "hardlink" ou "symlink"
+CACHE_HTTP_ATIVO = True
+CACHE_HTTP_DIR = "cache_http"
+CACHE_HTTP_MAX_MB = 200
+ANTECIPAR_CAPITULOS = 3  # novels do topo/da busca com a lista de capitulos carregada antes da escolha
+CACHE_CAPITULOS_MENU = 8  # listas de capitulos mantidas em memoria pelos menus
+CATALOGO_DB = "catalogo.sqlite3"
+CATALOGO_SIMULTANEOS = 4  # paginas de series lidas em paralelo pelo rastreador do catalogo
+SITEMAP_SIMULTANEOS = 4  # sitemaps filhos de um indice baixados em paralelo
+CANDIDATOS_BUSCA = 2000  # titulos mais parecidos por trigramas pontuados com difflib
+TTL_CACHE_HTTP = {  # segundos ate revalidar com o site
+    "sitemap": 24 * 3600,
+    "populares": 3600,
+    "serie": 600,
+    "titulo": 7 * 24 * 3600,
+}
+RELATORIOS_DIR = "relatorios"
+GERAR_RELATORIO = True
+COORDENADOR_DB = "fila_downloads.sqlite3"
+LEASE_SEGUNDOS = 300
+MAX_TENTATIVAS_TAREFA = 3
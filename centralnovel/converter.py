@@ -1,21 +1,45 @@
 """PDF to CBZ conversion workflow."""
 
+import importlib.util
 import os
 import shutil
-import sys
 import tempfile
+import threading
 import zipfile
 from pathlib import Path
 
 from .config import DPI, QUALIDADE_JPG
+from .metricas import METRICAS, gravar_relatorio
 
-try:
-    import fitz  # PyMuPDF
-    from PIL import Image
-except ImportError:
+fitz = None  # PyMuPDF, importado so na primeira conversao (_carregar_dependencias)
+Image = None
+_DEPENDENCIAS_OK = None
+
+
+def conversao_disponivel():
+    # So procura os pacotes: desenhar um menu nao deve custar o import do PyMuPDF/Pillow.
+    if _DEPENDENCIAS_OK is not None:
+        return _DEPENDENCIAS_OK
+    return all(importlib.util.find_spec(nome) is not None for nome in ("fitz", "PIL"))
+
+
+def _carregar_dependencias():
+    global fitz, Image, _DEPENDENCIAS_OK
+    if _DEPENDENCIAS_OK is None:
+        try:
+            import fitz as _fitz
+            from PIL import Image as _Image
+        except ImportError:
+            _DEPENDENCIAS_OK = False
+        else:
+            fitz, Image = _fitz, _Image
+            _DEPENDENCIAS_OK = True
+    return _DEPENDENCIAS_OK
+
+
+def _avisar_dependencias_ausentes():
     print("ERRO: Bibliotecas necessarias nao encontradas!")
     print("\nInstale: pip install pymupdf Pillow")
-    sys.exit(1)
 
 
 def _render_page_to_image(page, dpi):
@@ -27,6 +51,9 @@ def _render_page_to_image(page, dpi):
 
 
 def converter_pdf_para_imagens(pdf_path, output_folder, verbose=True):
+    if not _carregar_dependencias():
+        _avisar_dependencias_ausentes()
+        return []
     if verbose:
         print(f"\n[+] Convertendo: {os.path.basename(pdf_path)}")
         print(f"    Renderizando (DPI: {DPI})...")
@@ -39,11 +66,16 @@ def converter_pdf_para_imagens(pdf_path, output_folder, verbose=True):
             image_paths = []
             digits = len(str(total_pages))
             for index in range(total_pages):
-                page = doc.load_page(index)
-                image = _render_page_to_image(page, DPI)
+                with METRICAS.medir("renderizacao") as registro:
+                    page = doc.load_page(index)
+                    image = _render_page_to_image(page, DPI)
+                    registro["itens"] = 1
                 image_name = f"{str(index + 1).zfill(digits)}.jpg"
                 image_path = os.path.join(output_folder, image_name)
-                image.save(image_path, "JPEG", quality=QUALIDADE_JPG, optimize=True)
+                with METRICAS.medir("jpeg") as registro:
+                    image.save(image_path, "JPEG", quality=QUALIDADE_JPG, optimize=True)
+                    registro["bytes"] = os.path.getsize(image_path)
+                    registro["itens"] = 1
                 image_paths.append(image_path)
                 if verbose and (index + 1) % 5 == 0:
                     print(f"    Processando: {index + 1}/{total_pages}...")
@@ -59,22 +91,43 @@ def converter_pdf_para_imagens(pdf_path, output_folder, verbose=True):
 def criar_cbz(image_paths, cbz_path, verbose=True):
     if verbose:
         print(f"\n[+] Criando CBZ: {os.path.basename(cbz_path)}")
+    # Grava num temporario na mesma pasta e troca o nome no fim: o destino pode ser um
+    # hardlink do armazem, e abrir com "w" escreveria por cima do objeto compartilhado.
+    temporario = f"{cbz_path}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        with zipfile.ZipFile(cbz_path, "w", zipfile.ZIP_DEFLATED) as cbz:
-            for index, img_path in enumerate(image_paths, 1):
-                cbz.write(img_path, os.path.basename(img_path))
-                if verbose and index % 10 == 0:
-                    print(f"    Compactando: {index}/{len(image_paths)}...")
+        with METRICAS.medir("zip") as registro:
+            with zipfile.ZipFile(temporario, "w", zipfile.ZIP_DEFLATED) as cbz:
+                for index, img_path in enumerate(image_paths, 1):
+                    cbz.write(img_path, os.path.basename(img_path))
+                    if verbose and index % 10 == 0:
+                        print(f"    Compactando: {index}/{len(image_paths)}...")
+            registro["bytes"] = os.path.getsize(temporario)
+            registro["itens"] = len(image_paths)
+        os.replace(temporario, cbz_path)
         if verbose:
             file_size = os.path.getsize(cbz_path) / (1024 * 1024)
             print(f"    [OK] {file_size:.2f} MB")
         return True
     except Exception as exc:
         print(f"    [ERRO] {exc}")
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
         return False
 
 
-def converter_pdf_para_cbz(pdf_path, output_folder=None, keep_images=False, verbose=True):
+def converter_pdf_para_cbz(
+    pdf_path,
+    output_folder=None,
+    keep_images=False,
+    verbose=True,
+    sobrescrever=None,
+):
+    if not _carregar_dependencias():
+        _avisar_dependencias_ausentes()
+        return None
+
     pdf_path = Path(pdf_path)
     if not pdf_path.exists():
         print(f"[ERRO] Nao encontrado: {pdf_path}")
@@ -92,10 +145,13 @@ def converter_pdf_para_cbz(pdf_path, output_folder=None, keep_images=False, verb
     cbz_path = output_path / f"{pdf_path.stem}.cbz"
     if cbz_path.exists():
         print(f"[!] Ja existe: {cbz_path.name}")
-        resposta = input("    Sobrescrever? (s/n): ")
-        if resposta.lower() != "s":
-            print("    [CANCELADO]")
-            return None
+        if sobrescrever is None:
+            resposta = input("    Sobrescrever? (s/n): ")
+            if resposta.lower() != "s":
+                print("    [CANCELADO]")
+                return None
+        elif not sobrescrever:
+            return str(cbz_path)
 
     temp_dir = tempfile.mkdtemp(prefix="pdf2cbz_")
     try:
@@ -117,7 +173,26 @@ def converter_pdf_para_cbz(pdf_path, output_folder=None, keep_images=False, verb
                     print(f"[AVISO] Pasta temp: {exc}")
 
 
-def processar_pasta(pasta_path, output_folder=None, recursive=False, verbose=True):
+def converter_pdf_para_cbz_com_metricas(*args, **kwargs):
+    # Executado nos processos do pool: as metricas voltam junto com o resultado
+    # para serem somadas ao relatorio do processo principal.
+    METRICAS.reiniciar()
+    resultado = converter_pdf_para_cbz(*args, **kwargs)
+    return resultado, METRICAS.drenar()
+
+
+def processar_pasta(
+    pasta_path,
+    output_folder=None,
+    recursive=False,
+    verbose=True,
+    confirmar=True,
+    sobrescrever=None,
+):
+    if not _carregar_dependencias():
+        _avisar_dependencias_ausentes()
+        return 0, 0
+
     pasta_path = Path(pasta_path)
     if not pasta_path.exists() or not pasta_path.is_dir():
         print(f"[ERRO] Pasta nao encontrada: {pasta_path}")
@@ -135,11 +210,13 @@ def processar_pasta(pasta_path, output_folder=None, recursive=False, verbose=Tru
     print(f"PDFs: {len(pdf_files)}")
     print(f"{'=' * 60}")
 
-    confirmacao = input("\nContinuar? (s/n): ")
-    if confirmacao.lower() != "s":
-        print("[CANCELADO]")
-        return 0, 0
+    if confirmar:
+        confirmacao = input("\nContinuar? (s/n): ")
+        if confirmacao.lower() != "s":
+            print("[CANCELADO]")
+            return 0, 0
 
+    METRICAS.reiniciar()
     sucessos = 0
     falhas = 0
     for index, pdf_file in enumerate(pdf_files, 1):
@@ -151,10 +228,14 @@ def processar_pasta(pasta_path, output_folder=None, recursive=False, verbose=Tru
             output_folder=output_folder,
             keep_images=False,
             verbose=verbose,
+            sobrescrever=sobrescrever,
         )
         if resultado:
             sucessos += 1
         else:
             falhas += 1
+    METRICAS.contar("conversoes_sucesso", sucessos)
+    METRICAS.contar("conversoes_falha", falhas)
+    gravar_relatorio("conversao")
     return sucessos, falhas
 
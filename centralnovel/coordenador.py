@@ -0,0 +1,289 @@
+"""Lease-based chapter work queue shared by several download workers."""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from .config import COORDENADOR_DB, LEASE_SEGUNDOS, MAX_DOWNLOADS_SIMULTANEOS, MAX_TENTATIVAS_TAREFA
+from .manifest import chave_capitulo, configurar_journal
+
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tarefas (
+    id INTEGER PRIMARY KEY,
+    novel TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    capitulo TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_ate REAL,
+    atualizado_em REAL NOT NULL,
+    erro TEXT,
+    UNIQUE (novel, chave)
+);
+CREATE INDEX IF NOT EXISTS idx_tarefas_estado ON tarefas (estado, lease_ate);
+"""
+
+
+class FilaDistribuida:
+    def __init__(self, caminho=COORDENADOR_DB, lease=LEASE_SEGUNDOS, max_tentativas=MAX_TENTATIVAS_TAREFA):
+        self.caminho = caminho
+        self.lease = lease
+        self.max_tentativas = max_tentativas
+        self._lock = threading.Lock()
+        # Sem WAL: o arquivo pode estar em armazenamento compartilhado entre maquinas,
+        # onde so o journal classico com locks de arquivo e seguro.
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=DELETE")
+        self._conexao.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.fechar()
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+    def enfileirar(self, novel_title, capitulos):
+        agora = time.time()
+        with self._transacao() as conexao:
+            antes = conexao.total_changes
+            conexao.executemany(
+                """
+                INSERT OR IGNORE INTO tarefas (novel, chave, capitulo, estado, atualizado_em)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (novel_title, chave_capitulo(cap), json.dumps(cap), PENDENTE, agora)
+                    for cap in capitulos
+                ],
+            )
+            return conexao.total_changes - antes
+
+    def reivindicar(self, worker, quantidade=1):
+        agora = time.time()
+        with self._transacao() as conexao:
+            # Leases vencidos de workers que cairam sem concluir voltam para a fila.
+            conexao.execute(
+                """
+                UPDATE tarefas SET estado = ?, worker = NULL, lease_ate = NULL, atualizado_em = ?
+                WHERE estado = ? AND lease_ate < ? AND tentativas >= ?
+                """,
+                (FALHOU, agora, EM_ANDAMENTO, agora, self.max_tentativas),
+            )
+            linhas = conexao.execute(
+                """
+                SELECT * FROM tarefas
+                WHERE estado = ? OR (estado = ? AND lease_ate < ?)
+                ORDER BY novel, id
+                LIMIT ?
+                """,
+                (PENDENTE, EM_ANDAMENTO, agora, quantidade),
+            ).fetchall()
+            conexao.executemany(
+                """
+                UPDATE tarefas SET estado = ?, worker = ?, lease_ate = ?,
+                    tentativas = tentativas + 1, atualizado_em = ?
+                WHERE id = ?
+                """,
+                [(EM_ANDAMENTO, worker, agora + self.lease, agora, linha["id"]) for linha in linhas],
+            )
+        return [_tarefa_da_linha(linha) for linha in linhas]
+
+    def renovar(self, worker, ids):
+        if not ids:
+            return set()
+        agora = time.time()
+        marcadores = ",".join("?" * len(ids))
+        with self._transacao() as conexao:
+            conexao.execute(
+                f"""
+                UPDATE tarefas SET lease_ate = ?, atualizado_em = ?
+                WHERE worker = ? AND estado = ? AND id IN ({marcadores})
+                """,
+                (agora + self.lease, agora, worker, EM_ANDAMENTO, *ids),
+            )
+            linhas = conexao.execute(
+                f"SELECT id FROM tarefas WHERE worker = ? AND estado = ? AND id IN ({marcadores})",
+                (worker, EM_ANDAMENTO, *ids),
+            ).fetchall()
+        return {linha["id"] for linha in linhas}
+
+    def concluir(self, worker, tarefa_id):
+        with self._transacao() as conexao:
+            conexao.execute(
+                """
+                UPDATE tarefas SET estado = ?, lease_ate = NULL, erro = NULL, atualizado_em = ?
+                WHERE id = ? AND worker = ?
+                """,
+                (CONCLUIDA, time.time(), tarefa_id, worker),
+            )
+
+    def falhar(self, worker, tarefa_id, erro=None):
+        with self._transacao() as conexao:
+            conexao.execute(
+                """
+                UPDATE tarefas SET
+                    estado = CASE WHEN tentativas >= ? THEN ? ELSE ? END,
+                    worker = NULL, lease_ate = NULL, erro = ?, atualizado_em = ?
+                WHERE id = ? AND worker = ?
+                """,
+                (self.max_tentativas, FALHOU, PENDENTE, erro, time.time(), tarefa_id, worker),
+            )
+
+    def progresso(self):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT estado, COUNT(*) AS total FROM tarefas GROUP BY estado"
+            ).fetchall()
+        contagem = dict.fromkeys((PENDENTE, EM_ANDAMENTO, CONCLUIDA, FALHOU), 0)
+        contagem.update({linha["estado"]: linha["total"] for linha in linhas})
+        return contagem
+
+    def _transacao(self):
+        return _Transacao(self._lock, self._conexao)
+
+
+class _Transacao:
+    def __init__(self, lock, conexao):
+        self._lock = lock
+        self._conexao = conexao
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            # BEGIN IMMEDIATE pega o lock de escrita antes do SELECT: dois workers
+            # nunca reivindicam a mesma tarefa.
+            self._conexao.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self._lock.release()
+            raise
+        return self._conexao
+
+    def __exit__(self, tipo, *exc_info):
+        try:
+            self._conexao.execute("ROLLBACK" if tipo else "COMMIT")
+        finally:
+            self._lock.release()
+
+
+def identificador_worker():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def executar_worker(
+    caminho_fila=COORDENADOR_DB,
+    worker=None,
+    max_simultaneos=None,
+    espera_ociosa=10,
+    **opcoes_download,
+):
+    from .downloader import download_capitulos_novel
+
+    worker = worker or identificador_worker()
+    max_simultaneos = max(1, max_simultaneos or MAX_DOWNLOADS_SIMULTANEOS)
+    # Manifesto, PDF/ e CBZ/ sao relativos ao diretorio atual, nao a fila: so workers
+    # iniciados na mesma pasta compartilhada enxergam os downloads uns dos outros.
+    configurar_journal("DELETE")
+    concluidas = falhas = 0
+    print(f"Worker {worker} usando fila {caminho_fila}")
+    if os.path.dirname(os.path.realpath(caminho_fila)) != os.path.realpath(os.getcwd()):
+        print("[AVISO] A fila esta em outra pasta: manifesto e PDFs ficam no diretorio atual")
+
+    with FilaDistribuida(caminho_fila) as fila:
+        while True:
+            tarefas = fila.reivindicar(worker, max_simultaneos * 2)
+            if not tarefas:
+                progresso = fila.progresso()
+                if not progresso[EM_ANDAMENTO]:
+                    break
+                # Outro worker ainda segura tarefas; se ele cair, o lease vence e elas voltam.
+                time.sleep(espera_ociosa)
+                continue
+
+            with _Heartbeat(fila, worker, [tarefa["id"] for tarefa in tarefas]):
+                for novel_title, lote in _agrupar_por_novel(tarefas):
+                    # Conclusao vem do proprio download, nao de uma releitura do manifesto
+                    # (WAL), que nao e confiavel em disco de rede compartilhado.
+                    baixados = set()
+                    try:
+                        download_capitulos_novel(
+                            [tarefa["capitulo"] for tarefa in lote],
+                            novel_title,
+                            max_simultaneos=max_simultaneos,
+                            ao_concluir=lambda cap: baixados.add(chave_capitulo(cap)),
+                            **opcoes_download,
+                        )
+                    except Exception as exc:
+                        print(f"Erro no lote de {novel_title}: {exc}")
+                    for tarefa in lote:
+                        if tarefa["chave"] in baixados:
+                            fila.concluir(worker, tarefa["id"])
+                            concluidas += 1
+                        else:
+                            fila.falhar(worker, tarefa["id"], "download falhou")
+                            falhas += 1
+
+        progresso = fila.progresso()
+    print(
+        f"\nWorker {worker}: {concluidas} concluidas, {falhas} falhas | "
+        f"fila: {progresso[CONCLUIDA]} concluidas, {progresso[FALHOU]} sem sucesso"
+    )
+    return concluidas, falhas
+
+
+class _Heartbeat:
+    def __init__(self, fila, worker, ids):
+        self.fila = fila
+        self.worker = worker
+        self.ids = ids
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._parar.set()
+        self._thread.join()
+
+    def _executar(self):
+        while not self._parar.wait(self.fila.lease / 3):
+            try:
+                mantidas = self.fila.renovar(self.worker, self.ids)
+            except sqlite3.Error as exc:
+                print(f"Falha ao renovar lease: {exc}")
+                continue
+            perdidas = set(self.ids) - mantidas
+            if perdidas:
+                print(f"[AVISO] Lease perdido para {len(perdidas)} tarefa(s)")
+
+
+def _agrupar_por_novel(tarefas):
+    grupos = {}
+    for tarefa in tarefas:
+        grupos.setdefault(tarefa["novel"], []).append(tarefa)
+    return list(grupos.items())
+
+
+def _tarefa_da_linha(linha):
+    return {
+        "id": linha["id"],
+        "novel": linha["novel"],
+        "chave": linha["chave"],
+        "capitulo": json.loads(linha["capitulo"]),
+        "tentativas": linha["tentativas"] + 1,
+    }
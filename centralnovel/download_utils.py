@@ -2,6 +2,9 @@
 
 import os
 import re
+from collections import namedtuple
+
+DownloadConcluido = namedtuple("DownloadConcluido", ["caminho", "sha256"])
 
 
 def limpar_nome_arquivo(texto):
@@ -17,3 +20,24 @@ def criar_pasta_volume(volume):
         print(f"Pasta criada: {pasta}")
     return pasta
 
+
+def caminho_parcial(caminho_destino):
+    return f"{caminho_destino}.part"
+
+
+def tamanho_arquivo(caminho):
+    try:
+        return os.path.getsize(caminho)
+    except OSError:
+        return 0
+
+
+def remover_arquivo(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def content_range_confere(content_range, inicio):
+    return (content_range or "").startswith(f"bytes {inicio}-")
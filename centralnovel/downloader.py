@@ -1,107 +1,424 @@
 """PDF download operations."""
 
+import multiprocessing
 import os
 import re
-import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import requests
 
-from .config import CBZ_ROOT_DIR, DELAY_ENTRE_DOWNLOADS, HEADERS, MAX_RETRIES, PDF_ROOT_DIR
-from .converter import converter_pdf_para_cbz
+from . import armazem, http_client
+from .banda import configurar_banda
+from .config import (
+    ARMAZEM_ATIVO,
+    BACKEND_REDE,
+    CBZ_ROOT_DIR,
+    FILA_CONVERSAO_MAX,
+    MAX_DOWNLOADS_SIMULTANEOS,
+    MAX_RETRIES,
+    PDF_ROOT_DIR,
+    PROCESSOS_CONVERSAO,
+    VERIFICAR_ARQUIVOS,
+)
+from .converter import conversao_disponivel, converter_pdf_para_cbz_com_metricas
 from .csv_store import carregar_links_csv
-from .download_utils import limpar_nome_arquivo
+from .download_utils import caminho_parcial, limpar_nome_arquivo
+from .escrita_stream import gravar_resposta
+from .integridade import PDFInvalidoError
+from .manifest import Manifesto, chave_capitulo
+from .metricas import METRICAS, gravar_relatorio
+from .rate_limit import STATUS_LIMITACAO, configurar_limite
 from .scraper import obter_token_pdf
-
-
-def baixar_pdf(post_id, url_pdf_page, caminho_destino, tentativa=1):
+from .token_cache import CacheTokens
+from .transferencia import (
+    concluir_download,
+    descartar_invalido,
+    download_existente,
+    iniciar_validador,
+    preparar_retomada,
+    registrar_baixado,
+    retomada_invalida,
+)
+
+
+def baixar_pdf(
+    post_id,
+    url_pdf_page,
+    caminho_destino,
+    tentativa=1,
+    cache_tokens=None,
+    sobrescrever=False,
+):
+    if tentativa > 1:
+        METRICAS.contar("retentativas_download")
     try:
-        if os.path.exists(caminho_destino):
-            print(f"Ja existe: {os.path.basename(caminho_destino)}")
-            return True
+        existente = download_existente(caminho_destino, sobrescrever)
+        if existente:
+            return existente
 
-        pdf_url_com_token = obter_token_pdf(post_id, url_pdf_page)
+        if cache_tokens is not None:
+            pdf_url_com_token = cache_tokens.obter(post_id, url_pdf_page, renovar=tentativa > 1)
+        else:
+            pdf_url_com_token = obter_token_pdf(post_id, url_pdf_page)
         if not pdf_url_com_token:
             print("Nao foi possivel obter token")
             return False
 
-        time.sleep(0.5)
-        headers = HEADERS.copy()
-        headers["Referer"] = url_pdf_page
-        response = requests.get(pdf_url_com_token, headers=headers, timeout=60, stream=True)
-        response.raise_for_status()
-
-        os.makedirs(os.path.dirname(caminho_destino), exist_ok=True)
-        with open(caminho_destino, "wb") as file_obj:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    file_obj.write(chunk)
-
-        if os.path.getsize(caminho_destino) < 1000:
-            print("Arquivo muito pequeno, pode estar corrompido")
-            os.remove(caminho_destino)
-            return False
-
-        print(
-            f"Baixado: {os.path.basename(caminho_destino)} "
-            f"({os.path.getsize(caminho_destino)} bytes)"
-        )
-        return True
+        inicio, headers = preparar_retomada(caminho_destino, url_pdf_page)
+        with http_client.get(pdf_url_com_token, headers=headers, timeout=60, stream=True) as response:
+            if retomada_invalida(response.status_code, response.headers, caminho_destino, inicio):
+                if tentativa < MAX_RETRIES:
+                    return baixar_pdf(
+                        post_id, url_pdf_page, caminho_destino, tentativa + 1, cache_tokens, sobrescrever
+                    )
+                return False
+            response.raise_for_status()
+
+            inicio, tamanho_total, validador = iniciar_validador(
+                response.status_code, response.headers, caminho_destino, inicio
+            )
+            with METRICAS.medir("transferencia") as registro:
+                registro["bytes"] = gravar_resposta(
+                    response, caminho_parcial(caminho_destino), inicio, tamanho_total, validador
+                )
+        return concluir_download(validador, caminho_destino)
+    except PDFInvalidoError as exc:
+        descartar_invalido(exc, caminho_destino)
+        if tentativa < MAX_RETRIES:
+            return baixar_pdf(
+                post_id, url_pdf_page, caminho_destino, tentativa + 1, cache_tokens, sobrescrever
+            )
+        return False
     except requests.exceptions.HTTPError as exc:
-        if exc.response.status_code == 429 and tentativa < MAX_RETRIES:
-            wait_time = DELAY_ENTRE_DOWNLOADS * tentativa * 2
-            print(f"Erro 429. Aguardando {wait_time}s...")
-            time.sleep(wait_time)
-            return baixar_pdf(post_id, url_pdf_page, caminho_destino, tentativa + 1)
+        status = exc.response.status_code
+        if status in STATUS_LIMITACAO and tentativa < MAX_RETRIES:
+            print(f"Erro {status}. Reduzindo ritmo e tentando novamente...")
+            return baixar_pdf(
+                post_id, url_pdf_page, caminho_destino, tentativa + 1, cache_tokens, sobrescrever
+            )
         print(f"Erro HTTP: {exc}")
         return False
+    except (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    ) as exc:
+        if tentativa < MAX_RETRIES:
+            print(f"Conexao interrompida ({exc}). Retomando...")
+            return baixar_pdf(
+                post_id, url_pdf_page, caminho_destino, tentativa + 1, cache_tokens, sobrescrever
+            )
+        print(f"Erro de conexao: {exc}")
+        return False
     except Exception as exc:
         print(f"Erro: {exc}")
         return False
 
 
-def download_capitulos_novel(capitulos, novel_title, gerar_cbz=False):
+def download_capitulos_novel(
+    capitulos,
+    novel_title,
+    gerar_cbz=False,
+    max_simultaneos=None,
+    requisicoes_por_segundo=None,
+    backend=None,
+    sobrescrever=False,
+    limite_banda_kbps=None,
+    ao_concluir=None,
+    verificar=None,
+):
     if not capitulos:
         print("Nenhum capitulo selecionado")
         return 0, 0
 
-    sucesso = 0
-    falhas = 0
-    novel_dir = _limpar_nome_pasta(novel_title) or "Novel"
-
-    print(f"\nIniciando download de {len(capitulos)} capitulos")
+    METRICAS.reiniciar()
+    if requisicoes_por_segundo is not None:
+        configurar_limite(requisicoes_por_segundo)
+    if limite_banda_kbps is not None:
+        configurar_banda(limite_banda_kbps)
+    max_simultaneos = max(1, max_simultaneos or MAX_DOWNLOADS_SIMULTANEOS)
+    novel_dir = nome_pasta_novel(novel_title)
+    total = len(capitulos)
+
+    if gerar_cbz and not conversao_disponivel():
+        print("[AVISO] PyMuPDF/Pillow nao instalados: conversao para CBZ desativada")
+        gerar_cbz = False
+    backend = backend or BACKEND_REDE
+    if backend == "async" and not _backend_async_disponivel():
+        print("[AVISO] aiohttp nao instalado: usando o backend com threads")
+        backend = "threads"
+
+    print(f"\nIniciando download de {total} capitulos")
     if gerar_cbz:
         print("Modo: PDF + conversao automatica para CBZ")
     else:
         print("Modo: apenas PDF")
+    print(f"Downloads simultaneos: {max_simultaneos}")
 
-    for index, cap in enumerate(capitulos, 1):
-        print(f"\n[{index}/{len(capitulos)}] Vol. {cap['volume']} Cap. {cap['capitulo']}: {cap['titulo']}")
-        caminho_pdf = _montar_caminho_pdf(cap, novel_dir)
-
-        if baixar_pdf(cap.get("post_id"), cap["url"], caminho_pdf):
-            sucesso += 1
-            if gerar_cbz:
-                pasta_cbz = _montar_pasta_cbz(cap["volume"], novel_dir)
-                resultado = converter_pdf_para_cbz(
-                    caminho_pdf,
-                    output_folder=pasta_cbz,
-                    keep_images=False,
-                    verbose=False,
-                )
-                if resultado:
-                    print(f"CBZ gerado: {os.path.basename(resultado)}")
-                else:
-                    print("Falha na conversao para CBZ")
+    with Manifesto() as manifesto, _FilaConversao(novel_dir, manifesto, sobrescrever, gerar_cbz) as fila:
+        if sobrescrever:
+            pendentes, so_converter, concluidos = list(capitulos), [], []
         else:
-            falhas += 1
-
-        if index < len(capitulos):
-            time.sleep(DELAY_ENTRE_DOWNLOADS)
+            verificar = VERIFICAR_ARQUIVOS if verificar is None else verificar
+            pendentes, so_converter, concluidos = _planejar(
+                capitulos, novel_dir, manifesto, gerar_cbz, verificar
+            )
+        if concluidos or so_converter:
+            print(f"Ja baixados (manifesto): {len(concluidos) + len(so_converter)}")
+
+        for cap, caminho_pdf, sha256 in so_converter:
+            fila.enviar(cap, caminho_pdf, sha256)
+        if ao_concluir is not None:
+            for cap in concluidos + [cap for cap, _, _ in so_converter]:
+                ao_concluir(cap)
+
+        def ao_baixar(cap, baixado):
+            sha256 = baixado.sha256
+            if ARMAZEM_ATIVO:
+                sha256 = armazem.armazenar(baixado.caminho, sha256)
+            manifesto.registrar_download(novel_dir, cap, baixado.caminho, sha256)
+            fila.enviar(cap, baixado.caminho, sha256)
+            if ao_concluir is not None:
+                ao_concluir(cap)
+
+        if not pendentes:
+            resultados = []
+        elif backend == "async":
+            resultados = _download_async(pendentes, novel_dir, max_simultaneos, sobrescrever, ao_baixar)
+        else:
+            with CacheTokens() as cache_tokens, ThreadPoolExecutor(max_workers=max_simultaneos) as executor:
+                resultados = list(
+                    executor.map(
+                        lambda item: _baixar_capitulo(
+                            item[0],
+                            item[1],
+                            pendentes,
+                            novel_dir,
+                            cache_tokens,
+                            sobrescrever,
+                            ao_baixar,
+                        ),
+                        enumerate(pendentes, 1),
+                    )
+                )
+        if fila.enviados:
+            print("\nAguardando conversoes pendentes...")
 
+    sucesso = len(concluidos) + len(so_converter) + sum(1 for ok in resultados if ok)
+    falhas = total - sucesso
+    METRICAS.contar("capitulos_sucesso", sucesso)
+    METRICAS.contar("capitulos_falha", falhas)
     _imprimir_resultado(sucesso, falhas)
+    gravar_relatorio("download")
     return sucesso, falhas
 
 
+def _planejar(capitulos, novel_dir, manifesto, gerar_cbz, verificar=False):
+    # O manifesto e a fonte da verdade: sem verificar, nenhum arquivo e consultado no disco
+    # (milhares de stats custam caro em disco de rede).
+    registrados = manifesto.capitulos_baixados(novel_dir)
+    no_disco = _arquivos_no_disco(registrados.values()) if verificar else None
+    pendentes = []
+    so_converter = []
+    concluidos = []
+    for cap in capitulos:
+        registro = registrados.get(chave_capitulo(cap))
+        if no_disco is not None and registro is not None and (
+            no_disco.get(registro["caminho"]) != registro["tamanho"]
+        ):
+            # Apagado ou truncado fora do programa: a linha do manifesto nao vale mais.
+            print(f"Arquivo ausente, baixando de novo: {os.path.basename(registro['caminho'])}")
+            manifesto.esquecer_capitulo(novel_dir, cap)
+            registro = None
+        if ARMAZEM_ATIVO:
+            registro = _reaproveitar_do_armazem(cap, registro, novel_dir, manifesto)
+        if registro is None:
+            pendentes.append(cap)
+        elif gerar_cbz and not _cbz_no_lugar(registro["cbz_caminho"], no_disco):
+            so_converter.append((cap, registro["caminho"], registro["sha256"]))
+        else:
+            concluidos.append(cap)
+    return pendentes, so_converter, concluidos
+
+
+def _cbz_no_lugar(caminho, no_disco):
+    if not caminho:
+        return False
+    return no_disco is None or caminho in no_disco
+
+
+def _arquivos_no_disco(registros):
+    # Um scandir por pasta em vez de um stat por capitulo.
+    procurados = set()
+    for registro in registros:
+        procurados.add(registro["caminho"])
+        if registro["cbz_caminho"]:
+            procurados.add(registro["cbz_caminho"])
+    tamanhos = {}
+    for pasta in {os.path.dirname(caminho) for caminho in procurados}:
+        try:
+            with os.scandir(pasta or ".") as entradas:
+                for entrada in entradas:
+                    caminho = os.path.join(pasta, entrada.name)
+                    if caminho in procurados and entrada.is_file():
+                        tamanhos[caminho] = entrada.stat().st_size
+        except OSError:
+            continue
+    return tamanhos
+
+
+def _reaproveitar_do_armazem(cap, registro, novel_dir, manifesto):
+    # Mesmo post_id ja baixado: nesta novel com outro titulo de capitulo, ou em outra
+    # pasta (titulo da novel mudou, "Legacy"). O PDF vem do armazem, sem transferencia.
+    origem = registro
+    if origem is None and cap.get("post_id"):
+        origem = manifesto.buscar_por_post_id(cap["post_id"])
+    if origem is None:
+        return None
+
+    destino = _montar_caminho_pdf(cap, novel_dir)
+    if registro is not None and registro["caminho"] == destino:
+        return registro
+    objeto = armazem.caminho_objeto(origem["sha256"])
+    if not os.path.exists(objeto):
+        return registro
+
+    armazem.vincular(objeto, destino)
+    if registro is not None:
+        armazem.desvincular(registro["caminho"], objeto)
+    manifesto.registrar_download(novel_dir, cap, destino, origem["sha256"])
+    METRICAS.contar("armazem_reaproveitados")
+    return {
+        "caminho": destino,
+        "sha256": origem["sha256"],
+        "cbz_caminho": registro["cbz_caminho"] if registro is not None else None,
+    }
+
+
+def _baixar_capitulo(index, cap, capitulos, novel_dir, cache_tokens, sobrescrever, ao_baixar):
+    print(f"\n[{index}/{len(capitulos)}] Vol. {cap['volume']} Cap. {cap['capitulo']}: {cap['titulo']}")
+    caminho_pdf = _montar_caminho_pdf(cap, novel_dir)
+    # Os pendentes ja sairam do manifesto: antecipa os tokens sem consultar o disco.
+    cache_tokens.antecipar(capitulos[index : index + cache_tokens.antecipados])
+
+    baixado = baixar_pdf(
+        cap.get("post_id"),
+        cap["url"],
+        caminho_pdf,
+        cache_tokens=cache_tokens,
+        sobrescrever=sobrescrever,
+    )
+    if not baixado:
+        return False
+    return registrar_baixado(ao_baixar, cap, baixado)
+
+
+def _backend_async_disponivel():
+    from .async_client import backend_async_disponivel
+
+    return backend_async_disponivel()
+
+
+def _download_async(capitulos, novel_dir, max_simultaneos, sobrescrever, ao_baixar):
+    from .async_client import baixar_capitulos
+
+    total = len(capitulos)
+    tarefas = [
+        (index, total, cap, _montar_caminho_pdf(cap, novel_dir))
+        for index, cap in enumerate(capitulos, 1)
+    ]
+    return baixar_capitulos(tarefas, max_simultaneos, sobrescrever, ao_baixar)
+
+
+class _FilaConversao:
+    def __init__(self, novel_dir, manifesto, sobrescrever, ativa):
+        self.novel_dir = novel_dir
+        self.manifesto = manifesto
+        self.sobrescrever = sobrescrever
+        self.ativa = ativa
+        self.enviados = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        self._vagas = threading.BoundedSemaphore(FILA_CONVERSAO_MAX)
+
+    def __enter__(self):
+        if self.ativa:
+            # spawn evita fork de um processo que ja tem threads de download rodando.
+            self._executor = ProcessPoolExecutor(
+                max_workers=PROCESSOS_CONVERSAO or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def enviar(self, cap, caminho_pdf, sha256=None):
+        if self._executor is None:
+            return
+        pasta_cbz = _montar_pasta_cbz(cap["volume"], self.novel_dir)
+        if ARMAZEM_ATIVO and sha256 and self._vincular_cbz(cap, caminho_pdf, pasta_cbz, sha256):
+            return
+        self._vagas.acquire()
+        try:
+            futuro = self._executor.submit(
+                converter_pdf_para_cbz_com_metricas,
+                caminho_pdf,
+                output_folder=pasta_cbz,
+                keep_images=False,
+                verbose=False,
+                sobrescrever=self.sobrescrever,
+            )
+        except Exception as exc:
+            self._vagas.release()
+            print(f"Falha ao agendar conversao para CBZ: {exc}")
+            return
+        with self._lock:
+            self.enviados += 1
+        futuro.add_done_callback(lambda concluido: self._finalizar(cap, concluido, sha256))
+
+    def _vincular_cbz(self, cap, caminho_pdf, pasta_cbz, sha256):
+        # O CBZ fica no armazem sob o SHA-256 do PDF de origem: reconverter o mesmo
+        # PDF vira so um link. Com sobrescrever, converte de novo; o converter troca o
+        # arquivo com os.replace, sem tocar no objeto compartilhado.
+        if self.sobrescrever:
+            return False
+        nome_cbz = f"{os.path.splitext(os.path.basename(caminho_pdf))[0]}.cbz"
+        caminho_cbz = os.path.join(pasta_cbz, nome_cbz)
+        objeto = armazem.caminho_objeto(sha256, ".cbz")
+        if not os.path.exists(objeto):
+            return False
+        armazem.vincular(objeto, caminho_cbz)
+        self.manifesto.registrar_cbz(self.novel_dir, cap, caminho_cbz)
+        METRICAS.contar("armazem_cbz_reaproveitados")
+        return True
+
+    def _finalizar(self, cap, futuro, sha256=None):
+        self._vagas.release()
+        try:
+            resultado, metricas = futuro.result()
+        except Exception as exc:
+            print(f"Falha na conversao para CBZ: {exc}")
+            return
+        METRICAS.incorporar(metricas)
+        if resultado:
+            if ARMAZEM_ATIVO and sha256:
+                try:
+                    armazem.armazenar(resultado, sha256, ".cbz")
+                except OSError as exc:
+                    print(f"[AVISO] CBZ fora do armazem: {exc}")
+            self.manifesto.registrar_cbz(self.novel_dir, cap, resultado)
+            print(f"CBZ gerado: {os.path.basename(resultado)}")
+        else:
+            print("Falha na conversao para CBZ")
+
+
+def nome_pasta_novel(novel_title):
+    return _limpar_nome_pasta(novel_title) or "Novel"
+
+
 def _montar_caminho_pdf(cap, novel_dir):
     pasta = _montar_pasta_pdf(cap["volume"], novel_dir)
     titulo_limpo = limpar_nome_arquivo(cap["titulo"])
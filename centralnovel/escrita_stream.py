@@ -0,0 +1,90 @@
+"""Streaming writer for HTTP response bodies."""
+
+import os
+
+from .banda import LIMITADOR_BANDA
+from .config import FSYNC_DOWNLOAD, PREALOCAR_DOWNLOAD, TAMANHO_BUFFER_DOWNLOAD
+
+
+class ArquivoParcial:
+    # Escrita do .part usada pelos dois backends: retomada, pre-alocacao, validacao e fsync.
+    def __init__(
+        self,
+        caminho,
+        inicio=0,
+        tamanho_total=None,
+        validador=None,
+        prealocar=PREALOCAR_DOWNLOAD,
+        fsync=FSYNC_DOWNLOAD,
+    ):
+        self.caminho = caminho
+        self.inicio = inicio
+        self.escritos = inicio
+        self.tamanho_total = tamanho_total
+        self.validador = validador
+        self.prealocar = prealocar
+        self.fsync = fsync
+        self._arquivo = None
+        self._prealocado = False
+
+    def __enter__(self):
+        self.abrir()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.fechar(concluido=exc_type is None)
+
+    def abrir(self):
+        self._arquivo = open(self.caminho, "r+b" if self.inicio else "wb")
+        self._arquivo.seek(self.inicio)
+        self._prealocado = self.prealocar and _prealocar(self._arquivo, self.inicio, self.tamanho_total)
+
+    def escrever(self, bloco):
+        if self.validador is not None:
+            self.validador.atualizar(bloco)
+        self._arquivo.write(bloco)
+        self.escritos += len(bloco)
+
+    def fechar(self, concluido=True):
+        try:
+            # Sem isso um download interrompido deixaria o .part com o tamanho
+            # pre-alocado e a retomada pediria o Range errado.
+            if self._prealocado:
+                self._arquivo.truncate(self.escritos)
+            if concluido and self.fsync:
+                self._arquivo.flush()
+                os.fsync(self._arquivo.fileno())
+        finally:
+            self._arquivo.close()
+        return self.escritos - self.inicio
+
+
+def gravar_resposta(
+    response,
+    caminho,
+    inicio=0,
+    tamanho_total=None,
+    validador=None,
+    tamanho_buffer=TAMANHO_BUFFER_DOWNLOAD,
+    prealocar=PREALOCAR_DOWNLOAD,
+    fsync=FSYNC_DOWNLOAD,
+    banda=LIMITADOR_BANDA,
+):
+    # iter_content com blocos grandes: o readinto do urllib3 le para um bytes novo e copia
+    # no buffer, entao reutilizar um bytearray so acrescentava uma copia.
+    with ArquivoParcial(caminho, inicio, tamanho_total, validador, prealocar, fsync) as arquivo:
+        for bloco in response.iter_content(chunk_size=tamanho_buffer):
+            arquivo.escrever(bloco)
+            if banda is not None:
+                banda.aguardar(len(bloco))
+    return arquivo.escritos - inicio
+
+
+def _prealocar(file_obj, inicio, tamanho_total):
+    if not tamanho_total or tamanho_total <= inicio or not hasattr(os, "posix_fallocate"):
+        return False
+    try:
+        os.posix_fallocate(file_obj.fileno(), inicio, tamanho_total - inicio)
+    except OSError:
+        return False
+    return True
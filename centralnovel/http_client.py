@@ -0,0 +1,63 @@
+"""Shared pooled HTTP session for scraper and downloader."""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import HEADERS, HTTP_POOL_SIZE
+from .metricas import METRICAS
+from .rate_limit import aguardar_requisicao, registrar_resposta
+
+_SESSAO = None
+_SESSAO_LOCK = threading.Lock()
+
+
+def obter_sessao():
+    global _SESSAO
+    if _SESSAO is None:
+        with _SESSAO_LOCK:
+            if _SESSAO is None:
+                _SESSAO = _criar_sessao(HTTP_POOL_SIZE)
+    return _SESSAO
+
+
+def configurar_pool(tamanho):
+    global _SESSAO
+    with _SESSAO_LOCK:
+        anterior = _SESSAO
+        _SESSAO = _criar_sessao(tamanho)
+    if anterior is not None:
+        anterior.close()
+
+
+def get(url, **kwargs):
+    return requisitar("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return requisitar("POST", url, **kwargs)
+
+
+def aguardar_vez(url):
+    # Etapa propria no relatorio: a fila do limitador nao entra no tempo de rede.
+    with METRICAS.medir("limitador"):
+        aguardar_requisicao(url)
+
+
+def requisitar(metodo, url, timeout=30, aguardar=True, **kwargs):
+    # aguardar=False: quem chama ja passou por aguardar_vez antes de comecar a medir.
+    if aguardar:
+        aguardar_vez(url)
+    response = obter_sessao().request(metodo, url, timeout=timeout, **kwargs)
+    registrar_resposta(url, response.status_code, response.headers.get("Retry-After"))
+    return response
+
+
+def _criar_sessao(tamanho):
+    sessao = requests.Session()
+    sessao.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=tamanho, pool_maxsize=tamanho)
+    sessao.mount("https://", adapter)
+    sessao.mount("http://", adapter)
+    return sessao
@@ -0,0 +1,200 @@
+"""Trigram inverted index for fuzzy novel title search."""
+
+import base64
+import hashlib
+import heapq
+import json
+import os
+import sys
+from array import array
+from collections import Counter
+from difflib import SequenceMatcher
+
+from .config import CACHE_HTTP_DIR, CANDIDATOS_BUSCA
+
+NOTA_MINIMA = 45
+_VERSAO = 2
+_ARQUIVO_INDICE = "indice_busca.json"
+
+
+class IndiceBusca:
+    def __init__(self, titulos, assinatura=None, postings=None, tamanhos=None):
+        self.titulos = list(titulos)
+        self.assinatura = assinatura or assinatura_titulos(self.titulos)
+        if postings is not None:
+            self.postings = postings
+            self.tamanhos = tamanhos
+            return
+        self.postings = {}
+        self.tamanhos = array("I")
+        for doc, titulo in enumerate(self.titulos):
+            trigramas = _trigramas(f" {titulo} ") if titulo else set()
+            self.tamanhos.append(len(trigramas))
+            for trigrama in trigramas:
+                lista = self.postings.get(trigrama)
+                if lista is None:
+                    lista = self.postings[trigrama] = array("I")
+                lista.append(doc)
+
+    def buscar(self, consulta, limite=10, candidatos=CANDIDATOS_BUSCA):
+        if not consulta:
+            return []
+        notas = {}
+
+        # Faixas 100/90: o titulo contem a consulta inteira, logo todos os trigramas dela.
+        for doc in self._contendo(consulta):
+            notas[doc] = pontuar_titulo(consulta, self.titulos[doc])
+
+        # Faixa 80: todas as palavras aparecem no titulo.
+        partes = [parte for parte in consulta.split() if len(parte) > 1]
+        if partes:
+            docs = None
+            for parte in partes:
+                if len(parte) >= 3:
+                    encontrados = set(self._contendo(parte))
+                    docs = encontrados if docs is None else docs & encontrados
+            if docs is None:
+                docs = range(len(self.titulos))
+            for doc in docs:
+                if doc not in notas and all(parte in self.titulos[doc] for parte in partes):
+                    notas[doc] = 80.0
+
+        # Faixa da razao do difflib: so os titulos mais parecidos por trigramas entram, e
+        # quem nao pode alcancar a pior nota do top atual nem chega a rodar ratio().
+        melhores = heapq.nlargest(limite, notas.values())
+        heapq.heapify(melhores)
+        for doc in self._mais_parecidos(consulta, candidatos):
+            titulo = self.titulos[doc]
+            if doc in notas or not titulo:
+                continue
+            corte = max(NOTA_MINIMA, melhores[0] if len(melhores) >= limite else 0)
+            comparador = SequenceMatcher(None, consulta, titulo)
+            if comparador.real_quick_ratio() * 100 < corte or comparador.quick_ratio() * 100 < corte:
+                continue
+            nota = comparador.ratio() * 100
+            if nota < corte:
+                continue
+            notas[doc] = nota
+            heapq.heappush(melhores, nota)
+            if len(melhores) > limite:
+                heapq.heappop(melhores)
+
+        ordenados = sorted(notas.items(), key=lambda item: (-item[1], item[0]))
+        return [(nota, doc) for doc, nota in ordenados[:limite]]
+
+    def _contendo(self, texto):
+        trigramas = _trigramas(texto)
+        if not trigramas:
+            return [doc for doc, titulo in enumerate(self.titulos) if texto in titulo]
+        listas = sorted((self.postings.get(trigrama, ()) for trigrama in trigramas), key=len)
+        if not listas[0]:
+            return []
+        docs = set(listas[0])
+        for lista in listas[1:]:
+            docs.intersection_update(lista)
+            if not docs:
+                return []
+        return sorted(doc for doc in docs if texto in self.titulos[doc])
+
+    def _mais_parecidos(self, consulta, quantidade):
+        trigramas = _trigramas(f" {consulta} ")
+        contagem = Counter()
+        for trigrama in trigramas:
+            lista = self.postings.get(trigrama)
+            if lista:
+                contagem.update(lista)
+        # Coeficiente de Dice sobre trigramas, que acompanha de perto a razao do difflib.
+        total = len(trigramas)
+        return heapq.nsmallest(
+            quantidade,
+            contagem,
+            key=lambda doc: (-2 * contagem[doc] / (total + self.tamanhos[doc]), doc),
+        )
+
+
+def pontuar_titulo(consulta, titulo):
+    if consulta == titulo:
+        return 100.0
+    if consulta in titulo:
+        return 90.0
+    partes = [parte for parte in consulta.split() if len(parte) > 1]
+    if partes and all(parte in titulo for parte in partes):
+        return 80.0
+    return SequenceMatcher(None, consulta, titulo).ratio() * 100
+
+
+def assinatura_titulos(titulos):
+    digest = hashlib.sha256()
+    for titulo in titulos:
+        digest.update(titulo.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def carregar_ou_construir(titulos, pasta=CACHE_HTTP_DIR, verboso=True):
+    assinatura = assinatura_titulos(titulos)
+    caminho = os.path.join(pasta, _ARQUIVO_INDICE)
+    indice = _carregar(caminho, titulos, assinatura)
+    if indice is not None:
+        return indice
+
+    indice = IndiceBusca(titulos, assinatura)
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as file_obj:
+            json.dump(_serializar(indice), file_obj, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporario, caminho)
+    except OSError as exc:
+        if verboso:
+            print(f"[AVISO] Nao foi possivel salvar o indice de busca: {exc}")
+    return indice
+
+
+def _serializar(indice):
+    # JSON em vez de pickle: ler o arquivo nunca executa codigo. As listas de postings
+    # vao como bytes do array em base64, que carregam bem mais rapido que listas JSON.
+    return {
+        "versao": _VERSAO,
+        "formato": _formato_array(),
+        "assinatura": indice.assinatura,
+        "tamanhos": _codificar(indice.tamanhos),
+        "postings": {trigrama: _codificar(lista) for trigrama, lista in indice.postings.items()},
+    }
+
+
+def _carregar(caminho, titulos, assinatura):
+    try:
+        with open(caminho, encoding="utf-8") as file_obj:
+            dados = json.load(file_obj)
+        if (
+            dados["versao"] != _VERSAO
+            or dados["formato"] != _formato_array()
+            or dados["assinatura"] != assinatura
+        ):
+            return None
+        tamanhos = _decodificar(dados["tamanhos"])
+        if len(tamanhos) != len(titulos):
+            return None
+        postings = {trigrama: _decodificar(texto) for trigrama, texto in dados["postings"].items()}
+        return IndiceBusca(titulos, assinatura, postings, tamanhos)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _formato_array():
+    return f"I{array('I').itemsize}{sys.byteorder}"
+
+
+def _codificar(lista):
+    return base64.b64encode(lista.tobytes()).decode("ascii")
+
+
+def _decodificar(texto):
+    lista = array("I")
+    lista.frombytes(base64.b64decode(texto, validate=True))
+    return lista
+
+
+def _trigramas(texto):
+    return {texto[posicao : posicao + 3] for posicao in range(len(texto) - 2)}
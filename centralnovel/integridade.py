@@ -0,0 +1,63 @@
+"""Streaming integrity checks for downloaded PDFs."""
+
+import hashlib
+
+MAGIC_PDF = b"%PDF-"
+MARCADOR_EOF = b"%%EOF"
+TAMANHO_MINIMO_PDF = 1000
+_JANELA = 1024
+
+
+class PDFInvalidoError(ValueError):
+    pass
+
+
+class ValidadorPDF:
+    def __init__(self, tamanho_esperado=None):
+        self.tamanho_esperado = tamanho_esperado
+        self.bytes_lidos = 0
+        self._sha256 = hashlib.sha256()
+        self._inicio = b""
+        self._cauda = b""
+
+    @classmethod
+    def continuar_de(cls, caminho_parcial, tamanho_esperado=None):
+        validador = cls(tamanho_esperado)
+        with open(caminho_parcial, "rb") as file_obj:
+            for bloco in iter(lambda: file_obj.read(1024 * 1024), b""):
+                validador.atualizar(bloco)
+        return validador
+
+    def atualizar(self, chunk):
+        self._sha256.update(chunk)
+        self.bytes_lidos += len(chunk)
+        if len(self._inicio) < _JANELA:
+            self._inicio += bytes(chunk[: _JANELA - len(self._inicio)])
+            if len(self._inicio) >= _JANELA:
+                self._conferir_magic()
+        self._cauda = (self._cauda + bytes(chunk[-_JANELA:]))[-_JANELA:]
+
+    def finalizar(self):
+        if self.bytes_lidos < TAMANHO_MINIMO_PDF:
+            raise PDFInvalidoError(f"arquivo muito pequeno ({self.bytes_lidos} bytes)")
+        self._conferir_magic()
+        if self.tamanho_esperado is not None and self.bytes_lidos != self.tamanho_esperado:
+            raise PDFInvalidoError(
+                f"tamanho {self.bytes_lidos} difere do Content-Length {self.tamanho_esperado}"
+            )
+        if MARCADOR_EOF not in self._cauda:
+            raise PDFInvalidoError("marcador %%EOF ausente (arquivo truncado)")
+        return self._sha256.hexdigest()
+
+    def _conferir_magic(self):
+        if MAGIC_PDF not in self._inicio:
+            raise PDFInvalidoError("conteudo nao e um PDF")
+
+
+def tamanho_esperado(headers, inicio=0):
+    if headers.get("Content-Encoding", "identity").lower() != "identity":
+        return None
+    content_length = headers.get("Content-Length")
+    if not content_length or not content_length.isdigit():
+        return None
+    return inicio + int(content_length)
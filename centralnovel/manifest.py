@@ -0,0 +1,223 @@
+"""SQLite manifest of downloaded chapters and derived CBZ files."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .config import MANIFEST_DB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS capitulos (
+    novel TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    post_id TEXT,
+    url TEXT,
+    caminho TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    baixado_em REAL NOT NULL,
+    cbz_caminho TEXT,
+    cbz_gerado_em REAL,
+    PRIMARY KEY (novel, chave)
+);
+CREATE INDEX IF NOT EXISTS idx_capitulos_sha256 ON capitulos (sha256);
+CREATE INDEX IF NOT EXISTS idx_capitulos_post_id ON capitulos (post_id);
+CREATE TABLE IF NOT EXISTS series (
+    url TEXT PRIMARY KEY,
+    novel TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    sincronizado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS series_capitulos (
+    serie_url TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    volume TEXT,
+    capitulo TEXT,
+    titulo TEXT,
+    url TEXT,
+    data TEXT,
+    post_id TEXT,
+    PRIMARY KEY (serie_url, chave)
+);
+CREATE TABLE IF NOT EXISTS post_ids (
+    url TEXT PRIMARY KEY,
+    post_id TEXT NOT NULL,
+    resolvido_em REAL NOT NULL
+);
+"""
+
+_CAMPOS_CAPITULO = ("volume", "capitulo", "titulo", "url", "data", "post_id")
+_JOURNAL = "WAL"
+_COMPARTILHADO = None
+_COMPARTILHADO_LOCK = threading.Lock()
+
+
+class Manifesto:
+    def __init__(self, caminho=MANIFEST_DB):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute(f"PRAGMA journal_mode={_JOURNAL}")
+        self._conexao.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.fechar()
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+    def capitulos_baixados(self, novel):
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT * FROM capitulos WHERE novel = ?",
+                (novel,),
+            ).fetchall()
+        return {linha["chave"]: dict(linha) for linha in linhas}
+
+    def buscar_por_post_id(self, post_id):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT * FROM capitulos WHERE post_id = ? ORDER BY baixado_em DESC LIMIT 1",
+                (str(post_id),),
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def post_id_da_pagina(self, url):
+        with self._lock:
+            linha = self._conexao.execute("SELECT post_id FROM post_ids WHERE url = ?", (url,)).fetchone()
+        return linha["post_id"] if linha else None
+
+    def registrar_post_id(self, url, post_id):
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO post_ids (url, post_id, resolvido_em) VALUES (?, ?, ?)",
+                (url, str(post_id), time.time()),
+            )
+
+    def registrar_download(self, novel, cap, caminho, sha256=None):
+        if sha256 is None:
+            sha256 = calcular_sha256(caminho)
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                """
+                INSERT INTO capitulos (novel, chave, post_id, url, caminho, tamanho, sha256, baixado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (novel, chave) DO UPDATE SET
+                    post_id = excluded.post_id,
+                    url = excluded.url,
+                    caminho = excluded.caminho,
+                    tamanho = excluded.tamanho,
+                    sha256 = excluded.sha256,
+                    baixado_em = excluded.baixado_em
+                """,
+                (
+                    novel,
+                    chave_capitulo(cap),
+                    cap.get("post_id") or None,
+                    cap.get("url"),
+                    caminho,
+                    os.path.getsize(caminho),
+                    sha256,
+                    time.time(),
+                ),
+            )
+
+    def registrar_cbz(self, novel, cap, cbz_caminho):
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "UPDATE capitulos SET cbz_caminho = ?, cbz_gerado_em = ? WHERE novel = ? AND chave = ?",
+                (cbz_caminho, time.time(), novel, chave_capitulo(cap)),
+            )
+
+    def esquecer_capitulo(self, novel, cap):
+        chave = chave_capitulo(cap)
+        with self._lock, self._conexao:
+            linha = self._conexao.execute(
+                "SELECT * FROM capitulos WHERE novel = ? AND chave = ?",
+                (novel, chave),
+            ).fetchone()
+            self._conexao.execute(
+                "DELETE FROM capitulos WHERE novel = ? AND chave = ?",
+                (novel, chave),
+            )
+        return dict(linha) if linha else None
+
+    def estado_serie(self, url):
+        with self._lock:
+            serie = self._conexao.execute("SELECT * FROM series WHERE url = ?", (url,)).fetchone()
+            if serie is None:
+                return None
+            linhas = self._conexao.execute(
+                "SELECT * FROM series_capitulos WHERE serie_url = ?",
+                (url,),
+            ).fetchall()
+        estado = dict(serie)
+        estado["capitulos"] = {
+            linha["chave"]: {campo: linha[campo] for campo in _CAMPOS_CAPITULO} for linha in linhas
+        }
+        return estado
+
+    def salvar_estado_serie(self, url, novel, etag, last_modified, capitulos):
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                """
+                INSERT OR REPLACE INTO series (url, novel, etag, last_modified, sincronizado_em)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (url, novel, etag, last_modified, time.time()),
+            )
+            self._conexao.execute("DELETE FROM series_capitulos WHERE serie_url = ?", (url,))
+            self._conexao.executemany(
+                """
+                INSERT OR REPLACE INTO series_capitulos
+                    (serie_url, chave, volume, capitulo, titulo, url, data, post_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (url, chave_capitulo(cap), *(cap.get(campo) for campo in _CAMPOS_CAPITULO))
+                    for cap in capitulos
+                ],
+            )
+
+
+def manifesto_compartilhado(caminho=MANIFEST_DB):
+    # Uma conexao por processo para consultas curtas e frequentes (post_id de cada
+    # capitulo), em vez de abrir o banco e refazer o schema a cada chamada.
+    global _COMPARTILHADO
+    caminho = os.path.abspath(caminho)
+    with _COMPARTILHADO_LOCK:
+        if _COMPARTILHADO is None or _COMPARTILHADO.caminho != caminho:
+            if _COMPARTILHADO is not None:
+                _COMPARTILHADO.fechar()
+            _COMPARTILHADO = Manifesto(caminho)
+        return _COMPARTILHADO
+
+
+def configurar_journal(modo):
+    # Workers em disco de rede usam DELETE: o WAL depende de memoria compartilhada local.
+    global _JOURNAL, _COMPARTILHADO
+    _JOURNAL = modo
+    with _COMPARTILHADO_LOCK:
+        if _COMPARTILHADO is not None:
+            _COMPARTILHADO.fechar()
+            _COMPARTILHADO = None
+
+
+def chave_capitulo(cap):
+    return str(cap.get("post_id") or cap["url"])
+
+
+def calcular_sha256(caminho):
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as file_obj:
+        for bloco in iter(lambda: file_obj.read(1024 * 1024), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
@@ -4,34 +4,44 @@ import os
 
 from InquirerPy import inquirer
 
+from .antecipacao import ANTECIPADOR
 from .config import DPI, QUALIDADE_JPG
-from .converter import converter_pdf_para_cbz, processar_pasta
+from .converter import conversao_disponivel, converter_pdf_para_cbz, processar_pasta
 from .downloader import download_capitulos_novel
-from .scraper import (
-    buscar_novels_por_nome,
-    extrair_links_pdf,
-    listar_top_novels,
-    normalizar_url_novel,
-    obter_titulo_novel,
-)
+from .scraper import normalizar_url_novel, obter_titulo_novel
 from .selection import parse_numero_lista_ou_intervalo
+from .sync import sincronizar_novel
 
 
 def menu_principal():
+    ANTECIPADOR.iniciar()
+    try:
+        _loop_principal()
+    finally:
+        # Tambem no Ctrl+C: nada da antecipacao fica na fila depois dos menus.
+        ANTECIPADOR.fechar()
+
+
+def _loop_principal():
     while True:
         _clear_screen()
+        choices = [
+            {"name": "Download de novel", "value": "download"},
+            {"name": "Sincronizar novel (capitulos novos)", "value": "sync"},
+        ]
+        if conversao_disponivel():
+            choices.append({"name": "Conversao PDF -> CBZ", "value": "conversao"})
+        choices.append({"name": "Sair", "value": "sair"})
         escolha = inquirer.select(
             message="CENTRALNOVEL - MAIN",
-            choices=[
-                {"name": "Download de novel", "value": "download"},
-                {"name": "Conversao PDF -> CBZ", "value": "conversao"},
-                {"name": "Sair", "value": "sair"},
-            ],
+            choices=choices,
             cycle=True,
         ).execute()
 
         if escolha == "download":
             menu_download()
+        elif escolha == "sync":
+            menu_sync()
         elif escolha == "conversao":
             menu_conversao()
         else:
@@ -47,14 +57,10 @@ def menu_download():
         if not novel:
             return
 
-        _clear_screen()
-        print(f"Carregando capitulos de: {novel['title']}")
-        capitulos = extrair_links_pdf(novel["url"])
-        if not capitulos:
+        selecionados = _selecionar_capitulos_ou_volumes(novel)
+        if selecionados is None:
             inquirer.confirm(message="Nenhum capitulo encontrado. Voltar?", default=True).execute()
             continue
-
-        selecionados = _selecionar_capitulos_ou_volumes(capitulos)
         if not selecionados:
             if not inquirer.confirm(
                 message="Nenhum capitulo selecionado. Tentar novamente?",
@@ -79,6 +85,18 @@ def menu_download():
             return
 
 
+def menu_sync():
+    _clear_screen()
+    novel = _selecionar_novel()
+    if not novel:
+        return
+
+    gerar_cbz = _perguntar_formato_saida()
+    _clear_screen()
+    sincronizar_novel(novel["url"], novel["title"], gerar_cbz=gerar_cbz)
+    inquirer.confirm(message="Voltar", default=True).execute()
+
+
 def menu_conversao():
     while True:
         _clear_screen()
@@ -119,7 +137,7 @@ def menu_conversao():
 
 
 def _selecionar_novel():
-    top_novels = listar_top_novels(limite=10)
+    top_novels = ANTECIPADOR.top_novels(limite=10)
     choices = [{"name": f"{index}. {item['title']}", "value": item} for index, item in enumerate(top_novels, 1)]
     choices.extend(
         [
@@ -155,6 +173,7 @@ def _selecionar_novel_por_link():
             if not inquirer.confirm(message="Link invalido. Tentar novamente?", default=True).execute():
                 return None
             continue
+        ANTECIPADOR.antecipar_capitulos([{"url": url}])
         return {"title": obter_titulo_novel(url), "url": url}
 
 
@@ -163,14 +182,14 @@ def _selecionar_novel_por_busca():
     if not termo:
         return None
 
-    resultados = buscar_novels_por_nome(termo, limite=20)
+    resultados = ANTECIPADOR.buscar(termo, limite=20)
     if not resultados:
         inquirer.confirm(message="Nenhuma novel encontrada. Voltar?", default=True).execute()
         return None
 
     escolha = inquirer.select(
         message="Resultados da busca",
-        choices=[{"name": item["title"], "value": item} for item in resultados]
+        choices=[{"name": _nome_com_capitulos(item), "value": item} for item in resultados]
         + [{"name": "Voltar", "value": None}],
         cycle=True,
         height=min(20, len(resultados) + 3),
@@ -178,7 +197,15 @@ def _selecionar_novel_por_busca():
     return escolha
 
 
-def _selecionar_capitulos_ou_volumes(capitulos):
+def _nome_com_capitulos(item):
+    if item.get("capitulos"):
+        return f"{item['title']} ({item['capitulos']} capitulos)"
+    return item["title"]
+
+
+def _selecionar_capitulos_ou_volumes(novel):
+    # A lista de capitulos continua baixando em segundo plano enquanto o usuario escolhe.
+    ANTECIPADOR.antecipar_capitulos([novel])
     modo = inquirer.select(
         message="Selecione o tipo de download",
         choices=[
@@ -191,9 +218,29 @@ def _selecionar_capitulos_ou_volumes(capitulos):
 
     if modo == "cancel":
         return []
+
+    # Com o catalogo rastreado, os volumes aparecem sem esperar a pagina da serie.
+    escolhidos = None
+    if modo == "vols":
+        from .catalogo import volumes_do_catalogo
+
+        catalogados = volumes_do_catalogo(novel["url"], verboso=False)
+        if catalogados:
+            escolhidos = _marcar_volumes(catalogados)
+            if not escolhidos:
+                return []
+
+    _clear_screen()
+    print(f"Carregando capitulos de: {novel['title']}")
+    capitulos = ANTECIPADOR.capitulos(novel["url"])
+    if not capitulos:
+        return None
     if modo == "caps":
         return _selecionar_capitulos(capitulos)
-    return _selecionar_volumes(capitulos)
+    if escolhidos is None:
+        escolhidos = _marcar_volumes(_contar_volumes(capitulos))
+    volumes_set = set(escolhidos)
+    return [item for item in capitulos if item["volume"] in volumes_set]
 
 
 def _selecionar_capitulos(capitulos):
@@ -215,21 +262,30 @@ def _selecionar_capitulos(capitulos):
     return [item for item in capitulos if int(item["capitulo"]) in selecionados]
 
 
-def _selecionar_volumes(capitulos):
-    volumes_disponiveis = _listar_volumes(capitulos)
+def _marcar_volumes(volumes):
+    volumes = sorted(volumes, key=lambda item: _ordenar_volume(item["volume"]))
     selecionados = inquirer.checkbox(
         message="Selecione um ou mais volumes (espaco marca, enter confirma)",
-        choices=[{"name": volume, "value": volume} for volume in volumes_disponiveis],
+        choices=[
+            {"name": f"{item['volume']} ({item['capitulos']} capitulos)", "value": item["volume"]}
+            for item in volumes
+        ],
         cycle=True,
-        height=min(20, len(volumes_disponiveis) + 2),
+        height=min(20, len(volumes) + 2),
     ).execute()
-    if not selecionados:
-        return []
-    volumes_set = set(selecionados)
-    return [item for item in capitulos if item["volume"] in volumes_set]
+    return selecionados or []
+
+
+def _contar_volumes(capitulos):
+    contagem = {}
+    for item in capitulos:
+        contagem[item["volume"]] = contagem.get(item["volume"], 0) + 1
+    return [{"volume": volume, "capitulos": total} for volume, total in contagem.items()]
 
 
 def _perguntar_formato_saida():
+    if not conversao_disponivel():
+        return False
     escolha = inquirer.select(
         message="Formato de saida",
         choices=[
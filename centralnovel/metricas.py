@@ -0,0 +1,116 @@
+"""Per-stage timing and throughput counters with a JSON run report."""
+
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from .config import GERAR_RELATORIO, RELATORIOS_DIR
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self._amostras = defaultdict(list)
+            self._contadores = Counter()
+            self._inicio = time.time()
+
+    @contextmanager
+    def medir(self, etapa):
+        registro = {"bytes": 0, "itens": 0}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio, registro["bytes"], registro["itens"])
+
+    def registrar(self, etapa, duracao, bytes_=0, itens=0):
+        with self._lock:
+            self._amostras[etapa].append((duracao, bytes_, itens))
+
+    def contar(self, nome, quantidade=1):
+        with self._lock:
+            self._contadores[nome] += quantidade
+
+    def drenar(self):
+        with self._lock:
+            dados = {"amostras": dict(self._amostras), "contadores": dict(self._contadores)}
+            self._amostras = defaultdict(list)
+            self._contadores = Counter()
+        return dados
+
+    def incorporar(self, dados):
+        with self._lock:
+            for etapa, amostras in dados["amostras"].items():
+                self._amostras[etapa].extend(amostras)
+            self._contadores.update(dados["contadores"])
+
+    def resumo(self):
+        with self._lock:
+            amostras = {etapa: list(valores) for etapa, valores in self._amostras.items()}
+            contadores = dict(self._contadores)
+            inicio = self._inicio
+
+        etapas = {}
+        for etapa, valores in sorted(amostras.items()):
+            duracoes = sorted(duracao for duracao, _, _ in valores)
+            total = sum(duracoes)
+            total_bytes = sum(bytes_ for _, bytes_, _ in valores)
+            total_itens = sum(itens for _, _, itens in valores)
+            etapas[etapa] = {
+                "quantidade": len(duracoes),
+                "total_s": round(total, 6),
+                "p50_s": round(_percentil(duracoes, 50), 6),
+                "p95_s": round(_percentil(duracoes, 95), 6),
+                "max_s": round(duracoes[-1], 6),
+                "bytes": total_bytes,
+                "bytes_por_s": round(total_bytes / total, 1) if total else 0.0,
+                "itens": total_itens,
+                "itens_por_s": round(total_itens / total, 3) if total else 0.0,
+            }
+        return {
+            "inicio": inicio,
+            "fim": time.time(),
+            "etapas": etapas,
+            "contadores": contadores,
+        }
+
+    def salvar_relatorio(self, nome="execucao", pasta=RELATORIOS_DIR):
+        os.makedirs(pasta, exist_ok=True)
+        base = os.path.join(pasta, f"{nome}-{time.strftime('%Y%m%d-%H%M%S')}")
+        caminho = f"{base}.json"
+        sufixo = 1
+        while os.path.exists(caminho):
+            sufixo += 1
+            caminho = f"{base}-{sufixo}.json"
+        with open(caminho, "w", encoding="utf-8") as file_obj:
+            json.dump(self.resumo(), file_obj, indent=2)
+        return caminho
+
+
+def _percentil(valores_ordenados, percentil):
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, -(-len(valores_ordenados) * percentil // 100) - 1)
+    return valores_ordenados[int(indice)]
+
+
+METRICAS = Metricas()
+
+
+def gravar_relatorio(nome):
+    if not GERAR_RELATORIO:
+        return None
+    try:
+        caminho = METRICAS.salvar_relatorio(nome)
+    except OSError as exc:
+        print(f"Nao foi possivel salvar relatorio: {exc}")
+        return None
+    print(f"Relatorio: {caminho}")
+    return caminho
@@ -0,0 +1,128 @@
+"""Per-host adaptive request rate limiting."""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from .config import (
+    AUMENTO_ADITIVO,
+    DELAY_ENTRE_DOWNLOADS,
+    FATOR_REDUCAO,
+    JITTER_MAXIMO,
+    REQUISICOES_POR_SEGUNDO,
+    TAXA_MAXIMA,
+    TAXA_MINIMA,
+)
+
+STATUS_LIMITACAO = (429, 503)
+
+_LIMITADORES = {}
+_LIMITADORES_LOCK = threading.Lock()
+_TAXA_PADRAO = REQUISICOES_POR_SEGUNDO
+_TAXA_TETO = max(TAXA_MAXIMA, REQUISICOES_POR_SEGUNDO)
+
+
+class TokenBucket:
+    def __init__(self, taxa, capacidade=1):
+        self._lock = threading.Lock()
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade)
+        self._tokens = float(capacidade)
+        self._atualizado_em = time.monotonic()
+        self._pausado_ate = 0.0
+
+    def reservar(self, quantidade=1):
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(
+                self.capacidade,
+                self._tokens + (agora - self._atualizado_em) * self.taxa,
+            )
+            self._atualizado_em = agora
+            self._tokens -= quantidade
+            espera = 0.0 if self._tokens >= 0 else -self._tokens / self.taxa
+            return espera + max(0.0, self._pausado_ate - agora)
+
+    def aguardar(self, quantidade=1):
+        espera = self.reservar(quantidade)
+        if espera > 0:
+            time.sleep(espera)
+
+
+class LimitadorAdaptativo(TokenBucket):
+    def __init__(self, taxa, taxa_minima=TAXA_MINIMA, taxa_maxima=None):
+        super().__init__(taxa)
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = max(TAXA_MAXIMA, taxa) if taxa_maxima is None else taxa_maxima
+        self._ultima_reducao = 0.0
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.taxa = min(self.taxa_maxima, self.taxa + AUMENTO_ADITIVO)
+
+    def registrar_limitacao(self, retry_after=None):
+        with self._lock:
+            agora = time.monotonic()
+            espera = retry_after if retry_after is not None else DELAY_ENTRE_DOWNLOADS
+            self._pausado_ate = max(
+                self._pausado_ate,
+                agora + espera + random.uniform(0, JITTER_MAXIMO),
+            )
+            # Respostas 429 de requisicoes que ja estavam em voo contam como um unico evento.
+            if agora - self._ultima_reducao < 1 / self.taxa:
+                return
+            self._ultima_reducao = agora
+            self.taxa = max(self.taxa_minima, self.taxa * FATOR_REDUCAO)
+            self._tokens = min(self._tokens, 0.0)
+
+
+def configurar_limite(requisicoes_por_segundo):
+    global _TAXA_PADRAO, _TAXA_TETO
+    if requisicoes_por_segundo <= 0:
+        raise ValueError("requisicoes_por_segundo deve ser maior que zero")
+    with _LIMITADORES_LOCK:
+        _TAXA_PADRAO = float(requisicoes_por_segundo)
+        # Um ritmo pedido explicitamente acima de TAXA_MAXIMA vira o novo teto;
+        # sem isso o primeiro sucesso ja o derrubaria para TAXA_MAXIMA.
+        _TAXA_TETO = max(TAXA_MAXIMA, _TAXA_PADRAO)
+        for limitador in _LIMITADORES.values():
+            with limitador._lock:
+                limitador.taxa = _TAXA_PADRAO
+                limitador.taxa_maxima = _TAXA_TETO
+
+
+def limitador_para(url):
+    host = urlparse(url).netloc.lower()
+    with _LIMITADORES_LOCK:
+        limitador = _LIMITADORES.get(host)
+        if limitador is None:
+            limitador = LimitadorAdaptativo(_TAXA_PADRAO, taxa_maxima=_TAXA_TETO)
+            _LIMITADORES[host] = limitador
+        return limitador
+
+
+def aguardar_requisicao(url):
+    limitador_para(url).aguardar()
+
+
+def registrar_resposta(url, status, retry_after=None):
+    limitador = limitador_para(url)
+    if status in STATUS_LIMITACAO:
+        limitador.registrar_limitacao(interpretar_retry_after(retry_after))
+    elif status < 400:
+        limitador.registrar_sucesso()
+
+
+def interpretar_retry_after(valor):
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, data.timestamp() - time.time())
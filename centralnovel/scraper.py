@@ -1,38 +1,57 @@
 """Scraping and novel catalog helpers."""
 
 import re
-import xml.etree.ElementTree as ET
-from difflib import SequenceMatcher
+import sqlite3
 from urllib.parse import urlparse
 
-import requests
-from bs4 import BeautifulSoup
-
+from . import cache_http, http_client, sitemap
 from .config import (
     AJAX_URL,
-    HEADERS,
+    MAX_RETRIES,
     SERIES_POPULAR_URL,
     SERIES_SITEMAP_URL,
     SITE_URL,
 )
+from .manifest import manifesto_compartilhado
+from .metricas import METRICAS
+from .rate_limit import STATUS_LIMITACAO
 
 _SITEMAP_CACHE = None
+_INDICE_BUSCA = None
+_CONSULTAS_LXML = None
+
+_RE_VOL_CAP = re.compile(r"Vol\.\s*(.*?)\s*Cap\.\s*(\d+)", flags=re.IGNORECASE)
+_RE_CAP = re.compile(r"Cap\.\s*(\d+)", flags=re.IGNORECASE)
+_RE_NUMEROS = re.compile(r"\d+")
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_POST_ID = re.compile(rb'"post_id":\s*(\d+)')
+_RE_DATA_ID = re.compile(rb'data-id["\s]*[:=]["\s]*(\d+)')
+_SOBREPOSICAO_POST_ID = 256
+BLOCO_POST_ID = 16 * 1024
 
 
 def extrair_post_id_da_url(url_pdf_page):
+    post_id = post_id_salvo(url_pdf_page)
+    if post_id:
+        return post_id
     try:
-        response = requests.get(url_pdf_page, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        match = re.search(r'"post_id":\s*(\d+)', response.text)
-        if match:
-            return match.group(1)
-        match = re.search(r'data-id["\s]*[:=]["\s]*(\d+)', response.text)
-        if match:
-            return match.group(1)
-        return None
+        http_client.aguardar_vez(url_pdf_page)
+        with METRICAS.medir("post_id") as registro:
+            leitor = LeitorPostId()
+            # Sai do loop (e fecha a conexao) assim que o id aparece, sem baixar o resto da pagina.
+            with http_client.get(url_pdf_page, stream=True, aguardar=False) as response:
+                response.raise_for_status()
+                for bloco in response.iter_content(chunk_size=BLOCO_POST_ID):
+                    post_id = leitor.alimentar(bloco)
+                    if post_id:
+                        break
+            registro["bytes"] = leitor.lidos
+        post_id = post_id or leitor.finalizar()
     except Exception as exc:
         print(f"Erro ao extrair post_id: {exc}")
         return None
+    salvar_post_id(url_pdf_page, post_id)
+    return post_id
 
 
 def obter_token_pdf(post_id, url_pdf_page):
@@ -45,12 +64,21 @@ def obter_token_pdf(post_id, url_pdf_page):
                 return None
             print(f"Post ID: {post_id}")
 
-        headers = HEADERS.copy()
-        headers["Referer"] = url_pdf_page
-        headers["Content-Type"] = "application/x-www-form-urlencoded"
+        headers = {
+            "Referer": url_pdf_page,
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
         data = {"action": "ts_ln_dl_url", "post_id": post_id}
 
-        response = requests.post(AJAX_URL, data=data, headers=headers, timeout=30)
+        for tentativa in range(1, MAX_RETRIES + 1):
+            http_client.aguardar_vez(AJAX_URL)
+            with METRICAS.medir("token"):
+                response = http_client.post(AJAX_URL, data=data, headers=headers, aguardar=False)
+            if response.status_code in STATUS_LIMITACAO and tentativa < MAX_RETRIES:
+                print(f"Erro {response.status_code} ao obter token. Tentando novamente...")
+                METRICAS.contar("retentativas_token")
+                continue
+            break
         response.raise_for_status()
         result = response.json()
         if result.get("error") == 0 and result.get("url"):
@@ -62,75 +90,198 @@ def obter_token_pdf(post_id, url_pdf_page):
         return None
 
 
-def extrair_links_pdf(url):
-    print(f"\nAcessando: {url}")
+def extrair_links_pdf(url, verboso=True):
+    # verboso=False: chamadas em segundo plano nao escrevem por cima dos menus.
+    if verboso:
+        print(f"\nAcessando: {url}")
     try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        response.encoding = "utf-8"
+        html = cache_http.obter_texto(url, "serie", encoding="utf-8", verboso=verboso)
+        return extrair_capitulos_do_html(html, verboso)
+    except Exception as exc:
+        if verboso:
+            print(f"Erro: {exc}")
+        # None (e nao []): quem chama distingue falha de acesso de pagina sem capitulos.
+        return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        capitulos = soup.find_all("li", {"data-id": True})
+
+def extrair_capitulos_do_html(html, verboso=True):
+    consultas = _consultas_lxml()
+    if consultas is None:
+        return _extrair_capitulos_bs4(html, verboso)
+    return _extrair_capitulos_lxml(_raiz_lxml(html, consultas), consultas, verboso)
+
+
+def analisar_pagina_serie(html, url):
+    # Titulo e capitulos de uma so leitura da pagina, sem o log por pagina (usado pelo catalogo).
+    consultas = _consultas_lxml()
+    if consultas is None:
+        return {
+            "title": extrair_titulo_do_html(html, url),
+            "capitulos": _extrair_capitulos_bs4(html, verboso=False),
+        }
+    raiz = _raiz_lxml(html, consultas)
+    titulo = None
+    if raiz is not None:
+        for consulta in consultas["titulo_pagina"]:
+            elemento = _primeiro(consulta(raiz))
+            if elemento is not None:
+                titulo = _texto_lxml(elemento, consultas, " ")
+                if titulo:
+                    break
+    return {
+        "title": titulo or _titulo_from_url(url),
+        "capitulos": _extrair_capitulos_lxml(raiz, consultas, verboso=False),
+    }
+
+
+def _raiz_lxml(html, consultas):
+    from lxml import etree
+
+    try:
+        return etree.fromstring(html.encode("utf-8"), consultas["parser"])
+    except (etree.ParserError, etree.XMLSyntaxError, ValueError):
+        return None
+
+
+def _extrair_capitulos_lxml(raiz, consultas, verboso=True):
+    capitulos = consultas["itens"](raiz) if raiz is not None else []
+    if verboso:
         print(f"Encontrados {len(capitulos)} capitulos")
 
-        dados = []
-        for cap in capitulos:
-            try:
-                post_id = cap.get("data-id")
-                if not post_id:
-                    continue
-
-                epl_num = cap.find("div", class_="epl-num")
-                if not epl_num:
-                    continue
-
-                texto_num = epl_num.get_text(" ", strip=True)
-                volume, capitulo = _extrair_volume_e_capitulo(texto_num)
-                if not capitulo:
-                    continue
-
-                epl_title = cap.find("div", class_="epl-title")
-                titulo = epl_title.get_text(strip=True) if epl_title else "Sem_Titulo"
-
-                epl_date = cap.find("div", class_="epl-date")
-                data = epl_date.get_text(strip=True) if epl_date else ""
-
-                epl_pdf = cap.find("div", class_="epl-pdf")
-                if not epl_pdf:
-                    continue
-                link_tag = epl_pdf.find("a", class_="dlpdf")
-                if not link_tag or not link_tag.get("href"):
-                    continue
-
-                dados.append(
-                    {
-                        "volume": volume,
-                        "capitulo": capitulo,
-                        "titulo": titulo,
-                        "url": link_tag["href"],
-                        "data": data,
-                        "post_id": post_id,
-                    }
-                )
-            except Exception as exc:
-                print(f"Erro ao processar capitulo: {exc}")
+    dados = []
+    for cap in capitulos:
+        try:
+            post_id = cap.get("data-id")
+            if not post_id:
                 continue
 
-        dados.sort(key=_ordenar_capitulo)
-        return dados
-    except Exception as exc:
-        print(f"Erro: {exc}")
-        return []
+            buscar = _buscador_lxml(cap, consultas)
+            epl_num = buscar("num")
+            if epl_num is None:
+                continue
+
+            texto_num = _texto_lxml(epl_num, consultas, " ")
+            volume, capitulo = _extrair_volume_e_capitulo(texto_num)
+            if not capitulo:
+                continue
+
+            epl_title = buscar("titulo")
+            titulo = _texto_lxml(epl_title, consultas) if epl_title is not None else "Sem_Titulo"
+
+            epl_date = buscar("data")
+            data = _texto_lxml(epl_date, consultas) if epl_date is not None else ""
+
+            epl_pdf = buscar("pdf")
+            if epl_pdf is None:
+                continue
+            link_tag = _primeiro(consultas["link"](epl_pdf))
+            if link_tag is None or not link_tag.get("href"):
+                continue
+
+            dados.append(
+                {
+                    "volume": volume,
+                    "capitulo": capitulo,
+                    "titulo": titulo,
+                    "url": link_tag.get("href"),
+                    "data": data,
+                    "post_id": post_id,
+                }
+            )
+        except Exception as exc:
+            print(f"Erro ao processar capitulo: {exc}")
+            continue
+
+    dados.sort(key=_ordenar_capitulo)
+    return dados
+
+
+def _extrair_capitulos_bs4(html, verboso=True):
+    soup = _criar_soup(html)
+    capitulos = soup.find_all("li", {"data-id": True})
+    if verboso:
+        print(f"Encontrados {len(capitulos)} capitulos")
+
+    dados = []
+    for cap in capitulos:
+        try:
+            post_id = cap.get("data-id")
+            if not post_id:
+                continue
+
+            epl_num = _div_do_item(cap, "epl-num")
+            if not epl_num:
+                continue
+
+            texto_num = epl_num.get_text(" ", strip=True)
+            volume, capitulo = _extrair_volume_e_capitulo(texto_num)
+            if not capitulo:
+                continue
 
+            epl_title = _div_do_item(cap, "epl-title")
+            titulo = epl_title.get_text(strip=True) if epl_title else "Sem_Titulo"
 
-def listar_top_novels(limite=10):
+            epl_date = _div_do_item(cap, "epl-date")
+            data = epl_date.get_text(strip=True) if epl_date else ""
+
+            epl_pdf = _div_do_item(cap, "epl-pdf")
+            if not epl_pdf:
+                continue
+            link_tag = epl_pdf.find("a", class_="dlpdf")
+            if not link_tag or not link_tag.get("href"):
+                continue
+
+            dados.append(
+                {
+                    "volume": volume,
+                    "capitulo": capitulo,
+                    "titulo": titulo,
+                    "url": link_tag["href"],
+                    "data": data,
+                    "post_id": post_id,
+                }
+            )
+        except Exception as exc:
+            print(f"Erro ao processar capitulo: {exc}")
+            continue
+
+    dados.sort(key=_ordenar_capitulo)
+    return dados
+
+
+def obter_pagina_serie(url, etag=None, ultima_modificacao=None):
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if ultima_modificacao:
+        headers["If-Modified-Since"] = ultima_modificacao
     try:
-        response = requests.get(SERIES_POPULAR_URL, headers=HEADERS, timeout=30)
+        response = http_client.get(url, headers=headers)
+        if response.status_code == 304:
+            return {"status": 304, "html": None, "etag": etag, "last_modified": ultima_modificacao}
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        response.encoding = "utf-8"
+        return {
+            "status": response.status_code,
+            "html": response.text,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
     except Exception as exc:
-        print(f"Erro ao carregar top novels: {exc}")
-        return []
+        print(f"Erro ao acessar serie: {exc}")
+        return None
+
+
+def listar_top_novels(limite=10, verboso=True):
+    try:
+        soup = _criar_soup(cache_http.obter_texto(SERIES_POPULAR_URL, "populares", verboso=verboso))
+    except Exception as exc:
+        from .catalogo import mais_recentes_do_catalogo
+
+        if verboso:
+            print(f"Erro ao carregar top novels: {exc}")
+        # Sem a pagina de populares, as atualizadas por ultimo no catalogo local.
+        return mais_recentes_do_catalogo(limite, verboso=verboso)
 
     itens = []
     for article in soup.select("article"):
@@ -159,66 +310,87 @@ def buscar_novels_por_nome(texto, limite=10):
         return []
 
     novels = listar_novels_sitemap()
-    scored = []
-    for item in novels:
-        title_norm = _normalizar_texto(item["title"])
-        if not title_norm:
-            continue
+    if not novels:
+        return []
+    return [novels[doc] for _, doc in _indice_busca(novels).buscar(query, limite)]
 
-        score = 0.0
-        if query == title_norm:
-            score = 100.0
-        elif query in title_norm:
-            score = 90.0
-        else:
-            query_parts = [part for part in query.split() if len(part) > 1]
-            if query_parts and all(part in title_norm for part in query_parts):
-                score = 80.0
-            else:
-                ratio = SequenceMatcher(None, query, title_norm).ratio()
-                score = ratio * 100
 
-        if score >= 45:
-            scored.append((score, item))
+def preparar_busca(verboso=True):
+    # Carrega o sitemap e o indice de busca antes da primeira busca.
+    novels = listar_novels_sitemap(verboso)
+    if novels:
+        _indice_busca(novels, verboso)
+    return bool(novels)
 
-    scored.sort(key=lambda val: val[0], reverse=True)
-    return [item for _, item in scored[:limite]]
 
+def _indice_busca(novels, verboso=True):
+    global _INDICE_BUSCA
+    from .indice_busca import carregar_ou_construir
 
-def listar_novels_sitemap():
+    if _INDICE_BUSCA is None or _INDICE_BUSCA[0] is not novels:
+        titulos = [_normalizar_texto(item["title"]) for item in novels]
+        _INDICE_BUSCA = (novels, carregar_ou_construir(titulos, verboso=verboso))
+    return _INDICE_BUSCA[1]
+
+
+def listar_novels_sitemap(verboso=True):
     global _SITEMAP_CACHE
     if _SITEMAP_CACHE is not None:
         return _SITEMAP_CACHE
 
     try:
-        response = requests.get(SERIES_SITEMAP_URL, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        root = ET.fromstring(response.text)
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        urls = [
-            item.text
-            for item in root.findall(".//sm:url/sm:loc", ns)
-            if item.text and _eh_link_novel(item.text)
-        ]
+        novels = list(iterar_novels_sitemap(verboso=verboso))
     except Exception as exc:
-        print(f"Erro ao carregar sitemap: {exc}")
+        if verboso:
+            print(f"Erro ao carregar sitemap: {exc}")
         return []
 
-    _SITEMAP_CACHE = _deduplicar_novels(
-        [{"title": _titulo_from_url(url), "url": url.strip()} for url in urls]
-    )
+    _SITEMAP_CACHE = _com_dados_do_catalogo(novels, verboso)
     return _SITEMAP_CACHE
 
 
+def _com_dados_do_catalogo(novels, verboso=True):
+    from .catalogo import novels_do_catalogo
+
+    # Titulos reais das series ja rastreadas no lugar dos derivados do slug.
+    conhecidas = {item["url"]: item for item in novels_do_catalogo(verboso=verboso)}
+    for novel in novels:
+        item = conhecidas.get(novel["url"])
+        if item is not None:
+            novel["title"] = item["title"]
+            novel["capitulos"] = item["capitulos"]
+    return novels
+
+
+def iterar_novels_sitemap(url=SERIES_SITEMAP_URL, revalidar=False, verboso=True):
+    # Gerador: cada novel sai assim que seu <loc> e lido, sem montar a arvore inteira.
+    vistos = set()
+    for loc, lastmod in sitemap.iterar_entradas(url, revalidar=revalidar, verboso=verboso):
+        if not _eh_link_novel(loc):
+            continue
+        loc = _normalizar_url(loc)
+        if loc in vistos:
+            continue
+        vistos.add(loc)
+        yield {"title": _titulo_from_url(loc), "url": loc, "lastmod": lastmod}
+
+
 def obter_titulo_novel(url):
+    from .catalogo import titulo_do_catalogo
+
+    titulo = titulo_do_catalogo(_normalizar_url(url))
+    if titulo:
+        return titulo
     try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        html = cache_http.obter_texto(url, "titulo", encoding="utf-8")
     except Exception as exc:
         print(f"Erro ao obter titulo da novel: {exc}")
         return _titulo_from_url(url)
+    return extrair_titulo_do_html(html, url)
 
+
+def extrair_titulo_do_html(html, url):
+    soup = _criar_soup(html)
     for selector in ("h1.entry-title", ".entry-title", "h1[itemprop='headline']"):
         title_node = soup.select_one(selector)
         if title_node:
@@ -252,17 +424,166 @@ def normalizar_url_novel(entrada):
     return _normalizar_url(url)
 
 
+def _criar_soup(html):
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, "html.parser")
+
+
+def _div_do_item(item, classe):
+    from bs4 import Tag
+
+    # O html.parser nao fecha <li> sozinho: os capitulos seguintes ficam aninhados no item
+    # e nao devem emprestar titulo, data ou PDF a ele (o lxml ja fecha o <li>).
+    pilha = list(reversed(item.contents))
+    while pilha:
+        no = pilha.pop()
+        if not isinstance(no, Tag) or (no.name == "li" and no.has_attr("data-id")):
+            continue
+        if no.name == "div" and classe in (no.get("class") or []):
+            return no
+        pilha.extend(reversed(no.contents))
+    return None
+
+
+def _consultas_lxml():
+    global _CONSULTAS_LXML
+    if _CONSULTAS_LXML is None:
+        try:
+            from lxml import etree
+        except ImportError:
+            _CONSULTAS_LXML = False
+        else:
+            _CONSULTAS_LXML = {
+                "parser": etree.HTMLParser(encoding="utf-8"),
+                "itens": etree.XPath("//li[@data-id]"),
+                "num": etree.XPath(_xpath_div_com_classe("epl-num")),
+                "titulo": etree.XPath(_xpath_div_com_classe("epl-title")),
+                "data": etree.XPath(_xpath_div_com_classe("epl-date")),
+                "pdf": etree.XPath(_xpath_div_com_classe("epl-pdf")),
+                "aninhado": etree.XPath("boolean(.//li[@data-id])"),
+                "nivel": etree.XPath("count(ancestor-or-self::li[@data-id])"),
+                "do_item": {
+                    campo: etree.XPath(_xpath_div_do_item(classe))
+                    for campo, classe in (
+                        ("num", "epl-num"),
+                        ("titulo", "epl-title"),
+                        ("data", "epl-date"),
+                        ("pdf", "epl-pdf"),
+                    )
+                },
+                "link": etree.XPath(_xpath_com_classe("a", "dlpdf")),
+                # Mesma ordem de seletores de extrair_titulo_do_html.
+                "titulo_pagina": (
+                    etree.XPath(_xpath_com_classe("h1", "entry-title")),
+                    etree.XPath(_xpath_com_classe("*", "entry-title")),
+                    etree.XPath("(.//h1[@itemprop='headline'])[1]"),
+                ),
+                # text() ignora comentarios, como o get_text() do BeautifulSoup.
+                "textos": etree.XPath(".//text()"),
+            }
+    return _CONSULTAS_LXML or None
+
+
+def _xpath_div_com_classe(classe):
+    return _xpath_com_classe("div", classe)
+
+
+def _xpath_div_do_item(classe):
+    # Como _xpath_div_com_classe, mas ignora as divs de capitulos aninhados no item ($nivel).
+    return (
+        f"(.//div[contains(concat(' ', normalize-space(@class), ' '), ' {classe} ')]"
+        "[count(ancestor::li[@data-id]) = $nivel])[1]"
+    )
+
+
+def _xpath_com_classe(tag, classe):
+    # Mesmo criterio do class_= do BeautifulSoup: primeiro descendente com a classe na lista.
+    return f"(.//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {classe} ')])[1]"
+
+
+def _buscador_lxml(item, consultas):
+    if not consultas["aninhado"](item):
+        return lambda campo: _primeiro(consultas[campo](item))
+    # Mesmo criterio de _div_do_item: titulo, data e PDF vem so do proprio <li>.
+    nivel = consultas["nivel"](item)
+    return lambda campo: _primeiro(consultas["do_item"][campo](item, nivel=nivel))
+
+
+def _primeiro(resultado):
+    return resultado[0] if resultado else None
+
+
+def _texto_lxml(elemento, consultas, separador=""):
+    partes = (texto.strip() for texto in consultas["textos"](elemento))
+    return separador.join(parte for parte in partes if parte)
+
+
+class LeitorPostId:
+    # Procura o post_id bloco a bloco; "post_id" tem prioridade sobre data-id em qualquer
+    # ponto da pagina, entao so ele encerra a leitura antes do fim.
+    def __init__(self):
+        self.lidos = 0
+        self._janela = b""
+        self._data_id = None
+
+    def alimentar(self, bloco):
+        self.lidos += len(bloco)
+        self._janela += bloco
+        post_id = _grupo_completo(_RE_POST_ID, self._janela)
+        if post_id:
+            return post_id
+        if self._data_id is None:
+            self._data_id = _grupo_completo(_RE_DATA_ID, self._janela)
+        # Guarda o final da janela: um padrao cortado entre dois blocos e achado no proximo.
+        self._janela = self._janela[-_SOBREPOSICAO_POST_ID:]
+        return None
+
+    def finalizar(self):
+        match = _RE_POST_ID.search(self._janela)
+        if match:
+            return match.group(1).decode("ascii")
+        if self._data_id:
+            return self._data_id
+        match = _RE_DATA_ID.search(self._janela)
+        return match.group(1).decode("ascii") if match else None
+
+
+def _grupo_completo(padrao, janela):
+    match = padrao.search(janela)
+    # Digitos que terminam no fim da janela podem continuar no proximo bloco.
+    if match and match.end() < len(janela):
+        return match.group(1).decode("ascii")
+    return None
+
+
+def post_id_salvo(url):
+    try:
+        return manifesto_compartilhado().post_id_da_pagina(url)
+    except sqlite3.Error:
+        return None
+
+
+def salvar_post_id(url, post_id):
+    if not post_id:
+        return
+    try:
+        manifesto_compartilhado().registrar_post_id(url, post_id)
+    except sqlite3.Error as exc:
+        print(f"[AVISO] Nao foi possivel salvar o post_id: {exc}")
+
+
 def _extrair_volume_e_capitulo(texto_num):
-    match = re.search(r"Vol\.\s*(.*?)\s*Cap\.\s*(\d+)", texto_num, flags=re.IGNORECASE)
+    match = _RE_VOL_CAP.search(texto_num)
     if match:
-        volume = re.sub(r"\s+", " ", match.group(1).strip())
+        volume = _RE_ESPACOS.sub(" ", match.group(1).strip())
         return volume or "1", match.group(2)
 
-    cap_match = re.search(r"Cap\.\s*(\d+)", texto_num, flags=re.IGNORECASE)
+    cap_match = _RE_CAP.search(texto_num)
     if cap_match:
         return "1", cap_match.group(1)
 
-    numeros = re.findall(r"\d+", texto_num)
+    numeros = _RE_NUMEROS.findall(texto_num)
     if len(numeros) >= 2:
         return numeros[0], numeros[1]
     if len(numeros) == 1:
@@ -19,3 +19,31 @@ def parse_numero_lista_ou_intervalo(texto):
             valores.add(int(parte))
     return sorted(valores)
 
+
+def filtrar_capitulos(capitulos, capitulos_expr=None, volumes_expr=None):
+    selecionados = list(capitulos)
+    if capitulos_expr:
+        numeros = set(parse_numero_lista_ou_intervalo(capitulos_expr))
+        selecionados = [item for item in selecionados if int(item["capitulo"]) in numeros]
+    if volumes_expr:
+        volumes = _parse_volumes(volumes_expr)
+        selecionados = [item for item in selecionados if _normalizar_volume(item["volume"]) in volumes]
+    return selecionados
+
+
+def _parse_volumes(texto):
+    volumes = set()
+    for parte in texto.split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if "-" in parte and all(lado.strip().isdigit() for lado in parte.split("-", 1)):
+            volumes.update(str(numero) for numero in parse_numero_lista_ou_intervalo(parte))
+        else:
+            volumes.add(_normalizar_volume(parte))
+    return volumes
+
+
+def _normalizar_volume(value):
+    texto = " ".join(str(value).strip().lower().split())
+    return str(int(texto)) if texto.isdigit() else texto
@@ -0,0 +1,160 @@
+"""Streaming sitemap reader with gzip and concurrent sitemap-index support."""
+
+import itertools
+import queue
+import threading
+import xml.etree.ElementTree as ET
+import zlib
+from contextlib import contextmanager
+
+from . import cache_http, http_client
+from .config import SITEMAP_SIMULTANEOS
+
+_FIM = object()
+_TAMANHO_FILA = 1024
+_TAMANHO_BLOCO = 64 * 1024
+
+
+def iterar_urls(url, simultaneos=SITEMAP_SIMULTANEOS):
+    for loc, _ in iterar_entradas(url, simultaneos):
+        yield loc
+
+
+def iterar_entradas(url, simultaneos=SITEMAP_SIMULTANEOS, revalidar=False, verboso=True):
+    filhos = []
+    for tipo, loc, lastmod in _ler_sitemap(url, revalidar, verboso):
+        if tipo == "url":
+            yield loc, lastmod
+        else:
+            filhos.append(loc)
+    if filhos:
+        yield from _iterar_filhos(filhos, simultaneos, revalidar, verboso)
+
+
+def _ler_sitemap(url, revalidar, verboso):
+    leitor = ET.XMLPullParser(events=("start", "end"))
+    raiz = None
+    loc = None
+    lastmod = None
+    with _abrir(url, revalidar, verboso) as blocos:
+        for bloco in itertools.chain(_descompactar(blocos), [None]):
+            if bloco is None:
+                leitor.close()
+            else:
+                leitor.feed(bloco)
+            for evento, elemento in leitor.read_events():
+                if raiz is None:
+                    raiz = elemento
+                if evento != "end":
+                    continue
+                tag = elemento.tag.rpartition("}")[2]
+                if tag == "loc":
+                    loc = (elemento.text or "").strip()
+                elif tag == "lastmod":
+                    lastmod = (elemento.text or "").strip() or None
+                elif tag in ("url", "sitemap"):
+                    if loc:
+                        yield tag, loc, lastmod
+                    loc = lastmod = None
+                    # Descarta o que ja foi lido: a arvore nunca passa de uma entrada.
+                    raiz.clear()
+
+
+def _iterar_filhos(filhos, simultaneos, revalidar, verboso):
+    # Uma fila por filho, consumidas na ordem do indice: os downloads correm em paralelo,
+    # mas as entradas saem na mesma ordem de uma leitura sequencial.
+    saidas = [queue.Queue(maxsize=_TAMANHO_FILA) for _ in filhos]
+    tarefas = queue.SimpleQueue()
+    parar = threading.Event()
+
+    def entregar(saida, item):
+        while not parar.is_set():
+            try:
+                saida.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def ler(filho, saida):
+        try:
+            for entrada in iterar_entradas(filho, 1, revalidar, verboso):
+                if not entregar(saida, entrada):
+                    return
+        except Exception as exc:
+            # Vai para quem consome: um filho que falhou nao pode virar catalogo parcial.
+            entregar(saida, _FalhaFilho(filho, exc))
+        finally:
+            entregar(saida, _FIM)
+
+    def trabalhar():
+        while not parar.is_set():
+            try:
+                filho, saida = tarefas.get_nowait()
+            except queue.Empty:
+                return
+            ler(filho, saida)
+
+    for filho, saida in zip(filhos, saidas):
+        tarefas.put((filho, saida))
+    # Threads daemon, nao ThreadPoolExecutor: o interpretador junta as threads do executor
+    # ao sair, e uma leitura em segundo plano prenderia o encerramento do programa.
+    for _ in range(max(1, min(simultaneos, len(filhos)))):
+        threading.Thread(target=trabalhar, name="sitemap", daemon=True).start()
+    try:
+        for saida in saidas:
+            while True:
+                item = saida.get()
+                if item is _FIM:
+                    break
+                if isinstance(item, _FalhaFilho):
+                    raise RuntimeError(f"sitemap {item.url}: {item.erro}") from item.erro
+                yield item
+    finally:
+        # Quem parou de consumir no meio nao espera os downloads pendentes.
+        parar.set()
+
+
+class _FalhaFilho:
+    def __init__(self, url, erro):
+        self.url = url
+        self.erro = erro
+
+
+@contextmanager
+def _abrir(url, revalidar, verboso):
+    caminho = cache_http.obter_arquivo(url, "sitemap", revalidar, verboso)
+    if caminho is not None:
+        with open(caminho, "rb") as arquivo:
+            yield iter(lambda: arquivo.read(_TAMANHO_BLOCO), b"")
+        return
+    with http_client.get(url, stream=True) as response:
+        response.raise_for_status()
+        yield response.iter_content(chunk_size=_TAMANHO_BLOCO)
+
+
+def _descompactar(blocos):
+    # Sitemaps .xml.gz chegam comprimidos no corpo, nao via Content-Encoding.
+    blocos = iter(blocos)
+    inicio = b""
+    for bloco in blocos:
+        inicio += bloco
+        # O magic do gzip tem 2 bytes e o primeiro bloco pode vir com menos.
+        if len(inicio) >= 2:
+            break
+    if not inicio.startswith(b"\x1f\x8b"):
+        if inicio:
+            yield inicio
+        yield from (bloco for bloco in blocos if bloco)
+        return
+
+    descompactador = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for bloco in itertools.chain([inicio], blocos):
+        # Limita a saida: um bloco comprimido pode render megabytes de XML repetitivo.
+        dados = descompactador.decompress(bloco, _TAMANHO_BLOCO)
+        while dados:
+            yield dados
+            dados = descompactador.decompress(descompactador.unconsumed_tail, _TAMANHO_BLOCO)
+    resto = descompactador.flush()
+    if resto:
+        yield resto
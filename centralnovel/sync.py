@@ -0,0 +1,94 @@
+"""Incremental novel sync driven by conditional requests."""
+
+import os
+
+from .downloader import download_capitulos_novel, nome_pasta_novel
+from .manifest import Manifesto, chave_capitulo
+from .scraper import extrair_capitulos_do_html, extrair_titulo_do_html, obter_pagina_serie
+
+# A data exibida muda sem o PDF mudar; so um link ou post_id novo indica outra versao.
+_CAMPOS_ALTERACAO = ("url", "post_id")
+
+
+def sincronizar_novel(url, novel_title=None, gerar_cbz=False, sobrescrever=False, **opcoes_download):
+    print(f"\nSincronizando: {url}")
+    with Manifesto() as manifesto:
+        estado = manifesto.estado_serie(url) or {}
+
+    pagina = obter_pagina_serie(url, estado.get("etag"), estado.get("last_modified"))
+    if pagina is None:
+        return None
+    if pagina["status"] == 304:
+        print("Sem novidades (304)")
+        return 0, 0
+
+    capitulos = extrair_capitulos_do_html(pagina["html"])
+    if not capitulos:
+        print("Nenhum capitulo encontrado")
+        return None
+
+    novel_title = novel_title or estado.get("novel") or extrair_titulo_do_html(pagina["html"], url)
+    novel_dir = nome_pasta_novel(novel_title)
+    with Manifesto() as manifesto:
+        baixados = manifesto.capitulos_baixados(novel_dir)
+    conhecidos = estado.get("capitulos")
+    if conhecidos is None:
+        conhecidos = _linha_de_base(capitulos, baixados)
+    # Fila: novos desde o ultimo estado (os que falharam nao sao salvos nele) e alterados.
+    fila = []
+    alterados = []
+    for cap in capitulos:
+        chave = chave_capitulo(cap)
+        anterior = conhecidos.get(chave)
+        if anterior is None:
+            if chave not in baixados:
+                fila.append(cap)
+        elif chave in baixados and _alterado(anterior, cap):
+            print(f"Capitulo alterado no site: {os.path.basename(baixados[chave]['caminho'])}")
+            alterados.append(cap)
+
+    novos = sum(1 for cap in capitulos if chave_capitulo(cap) not in conhecidos)
+    print(f"Novos: {novos} | Pendentes para baixar: {len(fila) + len(alterados)}")
+
+    sucesso, falhas = 0, 0
+    # Alterados baixam com sobrescrever: a versao nova vai para o .part e so substitui o
+    # arquivo antigo (e o CBZ) depois de validada; uma falha deixa a versao anterior no lugar.
+    for grupo, substituir in ((fila, sobrescrever), (alterados, True)):
+        if grupo:
+            ok, erros = download_capitulos_novel(
+                grupo, novel_title, gerar_cbz=gerar_cbz, sobrescrever=substituir, **opcoes_download
+            )
+            sucesso += ok
+            falhas += erros
+
+    # Sem validadores salvos, a proxima execucao rele a pagina e tenta de novo o que falhou.
+    etag = pagina["etag"] if not falhas else None
+    last_modified = pagina["last_modified"] if not falhas else None
+    with Manifesto() as manifesto:
+        baixados = manifesto.capitulos_baixados(novel_dir)
+        salvos = []
+        for cap in capitulos:
+            chave = chave_capitulo(cap)
+            if chave not in conhecidos and chave not in baixados:
+                # Novo que falhou: fora do estado, continua novo na proxima execucao.
+                continue
+            if cap in alterados and _alterado(baixados.get(chave, {}), cap):
+                # Alterado que falhou fica com a versao antiga: a proxima execucao tenta de novo.
+                cap = conhecidos[chave]
+            salvos.append(cap)
+        manifesto.salvar_estado_serie(url, novel_title, etag, last_modified, salvos)
+    return sucesso, falhas
+
+
+def _linha_de_base(capitulos, baixados):
+    # Primeira sincronizacao: ate o ultimo capitulo ja baixado, o que falta foi pulado
+    # de proposito na selecao; novos sao so os que vem depois dele.
+    ultimo = max(
+        (indice for indice, cap in enumerate(capitulos) if chave_capitulo(cap) in baixados),
+        default=-1,
+    )
+    return {chave_capitulo(cap): cap for cap in capitulos[: ultimo + 1]}
+
+
+def _alterado(anterior, cap):
+    return any((anterior.get(campo) or None) != (cap.get(campo) or None) for campo in _CAMPOS_ALTERACAO)
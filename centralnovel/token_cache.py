@@ -0,0 +1,80 @@
+"""Expiry-aware cache and prefetch stage for PDF download tokens."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+from .config import MARGEM_RENOVACAO_TOKEN, TOKENS_ANTECIPADOS, VALIDADE_TOKEN_SEGUNDOS
+from .scraper import obter_token_pdf
+
+# So nomes vistos em URLs assinadas; qualquer outro formato usa VALIDADE_TOKEN_SEGUNDOS.
+_PARAMETROS_EXPIRACAO = ("expires", "exp")
+_HORIZONTE_EXPIRACAO = 24 * 3600
+
+
+class CacheTokens:
+    def __init__(self, antecipados=TOKENS_ANTECIPADOS, validade=VALIDADE_TOKEN_SEGUNDOS):
+        self.antecipados = antecipados
+        self.validade = validade
+        self._lock = threading.Lock()
+        self._entradas = {}
+        self._consumidos = set()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(antecipados, 4)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.fechar()
+
+    def fechar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def antecipar(self, capitulos):
+        for cap in capitulos[: self.antecipados]:
+            chave = cap["url"]
+            with self._lock:
+                if chave in self._consumidos:
+                    continue
+                futuro = self._entradas.get(chave)
+                if futuro is not None and not self._vencido(futuro):
+                    continue
+                self._entradas[chave] = self._executor.submit(
+                    self._resolver, cap.get("post_id"), chave
+                )
+
+    def obter(self, post_id, url_pdf_page, renovar=False):
+        with self._lock:
+            self._consumidos.add(url_pdf_page)
+            futuro = self._entradas.pop(url_pdf_page, None)
+        if futuro is not None and not renovar:
+            url, expira_em = futuro.result()
+            if url and time.time() < expira_em - MARGEM_RENOVACAO_TOKEN:
+                return url
+        url, _ = self._resolver(post_id, url_pdf_page)
+        return url
+
+    def _resolver(self, post_id, url_pdf_page):
+        url = obter_token_pdf(post_id, url_pdf_page)
+        expira_em = _expiracao_do_token(url) or time.time() + self.validade
+        return url, expira_em
+
+    def _vencido(self, futuro):
+        if not futuro.done():
+            return False
+        url, expira_em = futuro.result()
+        return not url or time.time() >= expira_em - MARGEM_RENOVACAO_TOKEN
+
+
+def _expiracao_do_token(url, agora=None):
+    if not url:
+        return None
+    agora = time.time() if agora is None else agora
+    parametros = parse_qs(urlparse(url).query)
+    for nome in _PARAMETROS_EXPIRACAO:
+        valor = parametros.get(nome, [""])[0]
+        # Um numero que nao e um timestamp plausivel (ja vencido ou dias a frente) nao e a expiracao.
+        if valor.isdigit() and agora < float(valor) <= agora + _HORIZONTE_EXPIRACAO:
+            return float(valor)
+    return None
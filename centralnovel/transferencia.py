@@ -0,0 +1,71 @@
+"""Transport-neutral steps of a resumable, validated PDF download (shared by sync and async)."""
+
+import os
+
+from .download_utils import (
+    DownloadConcluido,
+    caminho_parcial,
+    content_range_confere,
+    remover_arquivo,
+    tamanho_arquivo,
+)
+from .integridade import ValidadorPDF, tamanho_esperado
+
+
+def download_existente(caminho_destino, sobrescrever):
+    if os.path.exists(caminho_destino) and not sobrescrever:
+        print(f"Ja existe: {os.path.basename(caminho_destino)}")
+        return DownloadConcluido(caminho_destino, None)
+    return None
+
+
+def preparar_retomada(caminho_destino, url_pdf_page):
+    os.makedirs(os.path.dirname(caminho_destino), exist_ok=True)
+    inicio = tamanho_arquivo(caminho_parcial(caminho_destino))
+    headers = {"Referer": url_pdf_page}
+    if inicio:
+        headers["Range"] = f"bytes={inicio}-"
+    return inicio, headers
+
+
+def retomada_invalida(status, headers, caminho_destino, inicio):
+    if status == 416 or (
+        status == 206 and not content_range_confere(headers.get("Content-Range"), inicio)
+    ):
+        print("Arquivo parcial invalido, reiniciando download")
+        remover_arquivo(caminho_parcial(caminho_destino))
+        return True
+    return False
+
+
+def iniciar_validador(status, headers, caminho_destino, inicio):
+    if status == 206:
+        print(f"Retomando de {inicio} bytes")
+        tamanho_total = tamanho_esperado(headers, inicio)
+        validador = ValidadorPDF.continuar_de(caminho_parcial(caminho_destino), tamanho_total)
+        return inicio, tamanho_total, validador
+    tamanho_total = tamanho_esperado(headers)
+    return 0, tamanho_total, ValidadorPDF(tamanho_total)
+
+
+def concluir_download(validador, caminho_destino):
+    sha256 = validador.finalizar()
+    # O destino so e trocado depois de validado; uma versao anterior fica intacta ate aqui.
+    os.replace(caminho_parcial(caminho_destino), caminho_destino)
+    print(f"Baixado: {os.path.basename(caminho_destino)} ({validador.bytes_lidos} bytes)")
+    return DownloadConcluido(caminho_destino, sha256)
+
+
+def descartar_invalido(exc, caminho_destino):
+    print(f"PDF rejeitado: {exc}")
+    remover_arquivo(caminho_parcial(caminho_destino))
+
+
+def registrar_baixado(ao_baixar, cap, baixado):
+    # Manifesto ou armazem com erro conta como falha deste capitulo, sem derrubar a novel.
+    try:
+        ao_baixar(cap, baixado)
+    except Exception as exc:
+        print(f"Erro ao registrar {os.path.basename(baixado.caminho)}: {exc}")
+        return False
+    return True
@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from centralnovel.menus import menu_principal
+import sys
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from centralnovel.cli import main
+
+        sys.exit(main())
+
+    from centralnovel.menus import menu_principal
+
     try:
         menu_principal()
     except KeyboardInterrupt:
         print("\n\nInterrompido")
     except Exception as exc:
         print(f"\n[ERRO] {exc}")
-
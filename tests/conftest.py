@@ -0,0 +1,71 @@
+"""Shared fixtures: fake HTTP responses and a scratch working directory."""
+
+import io
+import os
+import sys
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pdf_falso(tamanho=4096, marca=b"a"):
+    cabecalho = b"%PDF-1.4\n"
+    rodape = b"\n%%EOF\n"
+    return cabecalho + marca * (tamanho - len(cabecalho) - len(rodape)) + rodape
+
+
+class _RawFalso(io.BytesIO):
+    decode_content = False
+
+
+class RespostaFalsa:
+    def __init__(self, corpo=b"", status=200, headers=None):
+        self.status_code = status
+        self.headers = CaseInsensitiveDict(
+            {"Content-Length": str(len(corpo))} if headers is None else headers
+        )
+        self.content = corpo
+        self.raw = _RawFalso(corpo)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.raw.close()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+    def iter_content(self, chunk_size=1):
+        while True:
+            bloco = self.raw.read(chunk_size)
+            if not bloco:
+                return
+            yield bloco
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    # Caminhos da config sao relativos ao diretorio atual.
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def capitulo(numero, volume="1", **extra):
+    cap = {
+        "volume": volume,
+        "capitulo": str(numero),
+        "titulo": f"Capitulo {numero}",
+        "url": f"https://centralnovel.com/capitulo-{numero}/",
+        "data": "1 de janeiro de 2024",
+        "post_id": str(1000 + numero),
+    }
+    cap.update(extra)
+    return cap
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from centralnovel import antecipacao
+
+
+def _falhar(*args, **kwargs):
+    raise RuntimeError("falhou em segundo plano")
+
+
+def test_busca_em_segundo_plano_que_falha_repete_em_primeiro_plano(monkeypatch):
+    monkeypatch.setattr(antecipacao, "preparar_busca", _falhar)
+    monkeypatch.setattr(antecipacao, "listar_top_novels", lambda *args, **kwargs: [])
+    monkeypatch.setattr(antecipacao, "extrair_links_pdf", lambda *args, **kwargs: [])
+    resultados = [{"title": "Solo Leveling", "url": "https://c/series/solo/"}]
+    monkeypatch.setattr(antecipacao, "buscar_novels_por_nome", lambda texto, limite: resultados)
+    antecipador = antecipacao.AntecipadorMenus(antecipados=0)
+    try:
+        assert antecipador.buscar("solo") == resultados
+        assert antecipador._busca is None
+    finally:
+        antecipador.fechar()
+
+
+def test_top_em_segundo_plano_que_falha_repete_em_primeiro_plano(monkeypatch):
+    monkeypatch.setattr(antecipacao, "preparar_busca", lambda *args, **kwargs: True)
+    top = [{"title": "A", "url": "https://c/series/a/"}]
+    chamadas = []
+
+    def listar(limite, verboso=True):
+        chamadas.append(verboso)
+        if not verboso:
+            raise RuntimeError("falhou em segundo plano")
+        return top
+
+    monkeypatch.setattr(antecipacao, "listar_top_novels", listar)
+    antecipador = antecipacao.AntecipadorMenus(antecipados=0)
+    try:
+        assert antecipador.top_novels() == top
+        assert chamadas == [False, True]
+    finally:
+        antecipador.fechar()
+
+
+def test_antecipacao_em_andamento_nao_prende_a_saida():
+    codigo = textwrap.dedent(
+        """
+        import time
+        from centralnovel import antecipacao
+
+        antecipacao.preparar_busca = lambda verboso=True: time.sleep(60)
+        antecipacao.listar_top_novels = lambda limite, verboso=True: time.sleep(60)
+        antecipacao.ANTECIPADOR.iniciar()
+        time.sleep(0.2)
+        antecipacao.ANTECIPADOR.fechar()
+        """
+    )
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", codigo], cwd=raiz, check=True, timeout=20)
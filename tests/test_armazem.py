@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from conftest import RespostaFalsa, pdf_falso
+
+from centralnovel import armazem, converter, downloader
+
+
+def _ligado_ao_armazem(caminho, conteudo):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "wb") as file_obj:
+        file_obj.write(conteudo)
+    sha256 = armazem.armazenar(caminho, extensao=os.path.splitext(caminho)[1])
+    objeto = armazem.caminho_objeto(sha256, os.path.splitext(caminho)[1])
+    assert os.path.samefile(caminho, objeto)
+    return objeto
+
+
+def _ler(caminho):
+    with open(caminho, "rb") as file_obj:
+        return file_obj.read()
+
+
+def test_criar_cbz_nao_escreve_atraves_do_hardlink(pasta):
+    objeto = _ligado_ao_armazem(os.path.join("CBZ", "cap.cbz"), b"cbz antigo")
+    imagem = pasta / "001.jpg"
+    imagem.write_bytes(b"jpeg")
+
+    assert converter.criar_cbz([str(imagem)], os.path.join("CBZ", "cap.cbz"), verbose=False)
+
+    assert _ler(objeto) == b"cbz antigo"
+    assert not os.path.samefile(objeto, os.path.join("CBZ", "cap.cbz"))
+    assert os.listdir("CBZ") == ["cap.cbz"]
+
+
+def test_reconverter_com_sobrescrever_preserva_o_objeto(pasta):
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("PIL")
+    with fitz.open() as documento:
+        documento.new_page(width=100, height=100)
+        documento.save("cap.pdf")
+    objeto = _ligado_ao_armazem(os.path.join("CBZ", "cap.cbz"), b"cbz de outra novel")
+
+    resultado = converter.converter_pdf_para_cbz("cap.pdf", "CBZ", verbose=False, sobrescrever=True)
+
+    assert resultado == os.path.join("CBZ", "cap.cbz")
+    assert _ler(objeto) == b"cbz de outra novel"
+    assert _ler(resultado)[:2] == b"PK"
+
+
+def test_baixar_com_sobrescrever_preserva_o_objeto(pasta, monkeypatch):
+    antigo, novo = pdf_falso(marca=b"a"), pdf_falso(marca=b"n")
+    destino = os.path.join("PDF", "cap.pdf")
+    objeto = _ligado_ao_armazem(destino, antigo)
+    monkeypatch.setattr(downloader, "obter_token_pdf", lambda post_id, url: "https://cdn/cap.pdf")
+    monkeypatch.setattr(downloader.http_client, "get", lambda url, **kwargs: RespostaFalsa(novo))
+
+    assert downloader.baixar_pdf("1", "https://site/cap", destino, sobrescrever=True)
+
+    assert _ler(objeto) == antigo
+    assert _ler(destino) == novo
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from conftest import capitulo, pdf_falso
+
+pytest.importorskip("aiohttp")
+
+from centralnovel import async_client, downloader, escrita_stream, rate_limit  # noqa: E402
+from centralnovel.download_utils import caminho_parcial  # noqa: E402
+from centralnovel.manifest import Manifesto  # noqa: E402
+
+
+@pytest.fixture
+def servidor(pasta, monkeypatch):
+    pdfs = {}
+    ranges = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            tamanho = int(self.headers["Content-Length"])
+            post_id = self.rfile.read(tamanho).decode().rpartition("post_id=")[2]
+            self._responder(200, json.dumps({"error": 0, "url": f"{base}/pdf/{post_id}"}).encode())
+
+        def do_GET(self):
+            corpo = pdfs[self.path.rpartition("/")[2]]
+            intervalo = self.headers.get("Range")
+            ranges.append(intervalo)
+            if not intervalo:
+                self._responder(200, corpo)
+                return
+            inicio = int(intervalo.split("=")[1].rstrip("-"))
+            self._responder(
+                206, corpo[inicio:], {"Content-Range": f"bytes {inicio}-{len(corpo) - 1}/{len(corpo)}"}
+            )
+
+        def _responder(self, status, corpo, headers=None):
+            self.send_response(status)
+            for nome, valor in (headers or {}).items():
+                self.send_header(nome, valor)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base = f"http://127.0.0.1:{http.server_address[1]}"
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    monkeypatch.setattr(async_client, "AJAX_URL", f"{base}/ajax")
+    monkeypatch.setattr(rate_limit, "_LIMITADORES", {})
+    monkeypatch.setattr(rate_limit, "_TAXA_PADRAO", 1000.0)
+    yield pdfs, ranges
+    http.shutdown()
+    http.server_close()
+
+
+def test_baixa_pelo_backend_async(servidor, monkeypatch):
+    pdfs, _ = servidor
+    capitulos = [capitulo(numero) for numero in range(1, 4)]
+    for cap in capitulos:
+        pdfs[cap["post_id"]] = pdf_falso(300_000, marca=cap["capitulo"].encode())
+    threads = set()
+    escrever = escrita_stream.ArquivoParcial.escrever
+
+    def escrever_registrando(self, bloco):
+        threads.add(threading.current_thread())
+        escrever(self, bloco)
+
+    monkeypatch.setattr(escrita_stream.ArquivoParcial, "escrever", escrever_registrando)
+
+    assert downloader.download_capitulos_novel(capitulos, "Novel", backend="async") == (3, 0)
+
+    with Manifesto() as manifesto:
+        registrados = manifesto.capitulos_baixados("Novel")
+    for cap in capitulos:
+        with open(registrados[cap["post_id"]]["caminho"], "rb") as file_obj:
+            assert file_obj.read() == pdfs[cap["post_id"]]
+    # Disco fora do loop de eventos, que roda na thread principal.
+    assert threading.main_thread() not in threads
+
+
+def test_retoma_o_parcial_com_range(servidor):
+    pdfs, ranges = servidor
+    cap = capitulo(1)
+    pdfs[cap["post_id"]] = pdf_falso(300_000)
+    destino = downloader._montar_caminho_pdf(cap, "Novel")
+    with open(caminho_parcial(destino), "wb") as file_obj:
+        file_obj.write(pdfs[cap["post_id"]][:100_000])
+
+    assert downloader.download_capitulos_novel([cap], "Novel", backend="async") == (1, 0)
+
+    assert ranges == ["bytes=100000-"]
+    with open(destino, "rb") as file_obj:
+        assert file_obj.read() == pdfs[cap["post_id"]]
+    assert not os.path.exists(caminho_parcial(destino))
+
+
+def test_sem_aiohttp_usa_threads(pasta, monkeypatch):
+    monkeypatch.setattr(async_client, "aiohttp", None)
+    chamadas = []
+    monkeypatch.setattr(
+        downloader, "_baixar_capitulo", lambda index, cap, *args: chamadas.append(cap) or True
+    )
+    assert downloader.download_capitulos_novel([capitulo(1)], "Novel", backend="async") == (1, 0)
+    assert len(chamadas) == 1
@@ -0,0 +1,109 @@
+from datetime import datetime, time
+from types import SimpleNamespace
+
+import pytest
+
+from centralnovel import banda, rate_limit
+from centralnovel.banda import LimitadorBanda
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = SimpleNamespace(agora=1000.0, data=datetime(2024, 1, 1, 12, 0))
+
+    class Datetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return relogio.data
+
+    monotonico = SimpleNamespace(monotonic=lambda: relogio.agora)
+    monkeypatch.setattr(banda, "time", monotonico)
+    monkeypatch.setattr(rate_limit, "time", monotonico)
+    monkeypatch.setattr(banda, "datetime", Datetime)
+    return relogio
+
+
+def test_sem_limite_nao_espera(relogio):
+    limitador = LimitadorBanda(limite_kbps=None, agenda=[])
+    assert limitador.reservar(10 * 1024 * 1024) == 0
+    limitador.definir_limite(0)
+    assert limitador.reservar(10 * 1024 * 1024) == 0
+
+
+def test_downloads_simultaneos_dividem_a_banda(relogio):
+    limitador = LimitadorBanda(limite_kbps=100, agenda=[])
+    taxa = 100 * 1024
+    # A rajada inicial (um quarto de segundo) sai sem espera.
+    assert limitador.reservar(taxa // 4) == 0
+
+    # Dois downloads alternando blocos: cada bloco entra na fila atras dos anteriores,
+    # entao os dois juntos nunca passam do limite e cada um fica com metade.
+    bloco = 10 * 1024
+    esperas = {"a": [], "b": []}
+    for _ in range(5):
+        for download in ("a", "b"):
+            esperas[download].append(limitador.reservar(bloco))
+    assert esperas["a"][-1] == pytest.approx(9 * bloco / taxa)
+    assert esperas["b"][-1] == pytest.approx(10 * bloco / taxa)
+    for download in ("a", "b"):
+        valores = esperas[download]
+        intervalos = [depois - antes for antes, depois in zip(valores, valores[1:])]
+        assert intervalos == pytest.approx([2 * bloco / taxa] * 4)
+
+
+def test_limite_novo_vale_na_proxima_reserva(relogio):
+    limitador = LimitadorBanda(limite_kbps=100, agenda=[])
+    limitador.reservar(100 * 1024 // 4)
+    limitador.definir_limite(200)
+    assert limitador.reservar(200 * 1024) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize(
+    "horario, esperado",
+    [(time(7, 59), None), (time(8, 0), 2048), (time(18, 59), 2048), (time(19, 0), None)],
+)
+def test_janela_no_mesmo_dia(relogio, horario, esperado):
+    limitador = LimitadorBanda(agenda=[("08:00", "19:00", 2048)])
+    assert limitador.limite_vigente(datetime.combine(datetime(2024, 1, 1), horario)) == esperado
+
+
+@pytest.mark.parametrize(
+    "horario, esperado",
+    [
+        (time(21, 59), 50),
+        (time(22, 0), 500),
+        (time(0, 0), 500),
+        (time(5, 59), 500),
+        (time(6, 0), 50),
+    ],
+)
+def test_janela_que_atravessa_a_meia_noite(relogio, horario, esperado):
+    limitador = LimitadorBanda(limite_kbps=50, agenda=[("22:00", "06:00", 500)])
+    assert limitador.limite_vigente(datetime.combine(datetime(2024, 1, 1), horario)) == esperado
+
+
+def test_janela_com_limite_zero_libera_a_banda(relogio):
+    limitador = LimitadorBanda(limite_kbps=50, agenda=[("00:00", "06:00", 0)])
+    assert limitador.limite_vigente(datetime(2024, 1, 1, 3, 0)) is None
+
+
+def test_horario_invalido_na_agenda():
+    with pytest.raises(ValueError):
+        LimitadorBanda(agenda=[("8h", "19:00", 2048)])
+
+
+def test_agenda_e_conferida_com_o_relogio(relogio):
+    limitador = LimitadorBanda(limite_kbps=None, agenda=[("08:00", "19:00", 100)])
+    relogio.data = datetime(2024, 1, 1, 7, 59, 59)
+    assert limitador.reservar(10 * 1024 * 1024) == 0
+
+    # Entrou na janela: o limite passa a valer na primeira conferencia depois de um segundo.
+    relogio.data = datetime(2024, 1, 1, 8, 0, 0)
+    relogio.agora += banda._INTERVALO_AGENDA
+    limitador.reservar(100 * 1024 // 4)
+    assert limitador.reservar(100 * 1024) == pytest.approx(1.0)
+
+
+def test_configurar_banda_rejeita_limite_negativo():
+    with pytest.raises(ValueError):
+        banda.configurar_banda(-5)
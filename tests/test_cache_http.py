@@ -0,0 +1,62 @@
+import pytest
+
+from centralnovel import cache_http
+from conftest import RespostaFalsa
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    pedidos = []
+    respostas = []
+
+    def get(url, headers=None, stream=False):
+        pedidos.append(dict(headers or {}))
+        resposta = respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        resposta.encoding = "utf-8"
+        return resposta
+
+    monkeypatch.setattr(cache_http.http_client, "get", get)
+    cache = cache_http.CacheHTTP(str(tmp_path / "cache"))
+    cache.pedidos = pedidos
+    cache.respostas = respostas
+    yield cache
+    cache.fechar()
+
+
+def test_dentro_do_ttl_nao_vai_a_rede(cache):
+    cache.respostas.append(RespostaFalsa(b"<xml/>", headers={"ETag": '"v1"'}))
+    assert cache.obter("https://c/sitemap.xml", "sitemap") == "<xml/>"
+    assert cache.obter("https://c/sitemap.xml", "sitemap") == "<xml/>"
+    assert len(cache.pedidos) == 1
+
+
+def test_revalidar_manda_validadores_e_aceita_304(cache):
+    cache.respostas.append(RespostaFalsa(b"<xml/>", headers={"ETag": '"v1"'}))
+    cache.obter_arquivo("https://c/sitemap.xml", "sitemap")
+    cache.respostas.append(RespostaFalsa(status=304, headers={}))
+    caminho, _ = cache.obter_arquivo("https://c/sitemap.xml", "sitemap", revalidar=True)
+
+    assert cache.pedidos[-1] == {"If-None-Match": '"v1"'}
+    assert open(caminho, "rb").read() == b"<xml/>"
+
+
+@pytest.mark.parametrize("verboso", [True, False])
+def test_sem_rede_usa_copia_local(cache, capsys, verboso):
+    cache.respostas.append(RespostaFalsa(b"<xml/>"))
+    cache.obter_arquivo("https://c/sitemap.xml", "sitemap")
+    cache.respostas.append(ConnectionError("sem rede"))
+    capsys.readouterr()
+
+    caminho, _ = cache.obter_arquivo("https://c/sitemap.xml", "sitemap", revalidar=True, verboso=verboso)
+
+    assert open(caminho, "rb").read() == b"<xml/>"
+    # Em segundo plano o aviso nao pode cair por cima do prompt dos menus.
+    assert ("Usando copia local" in capsys.readouterr().out) == verboso
+
+
+def test_sem_rede_e_sem_copia_propaga(cache):
+    cache.respostas.append(ConnectionError("sem rede"))
+    with pytest.raises(ConnectionError):
+        cache.obter_arquivo("https://c/sitemap.xml", "sitemap")
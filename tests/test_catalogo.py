@@ -0,0 +1,116 @@
+import sqlite3
+
+import pytest
+from conftest import capitulo
+
+from centralnovel import catalogo
+
+
+@pytest.fixture
+def site(pasta, monkeypatch):
+    estado = {
+        "series": [],
+        "erro": None,
+        "capitulos": [{"volume": "1", "capitulo": "1"}],
+        "lidas": [],
+    }
+
+    def iterar(url, revalidar=False):
+        for url_serie in estado["series"]:
+            yield {"title": url_serie, "url": url_serie, "lastmod": "2024-01-01"}
+        if estado["erro"]:
+            raise estado["erro"]
+
+    monkeypatch.setattr(catalogo, "iterar_novels_sitemap", iterar)
+    monkeypatch.setattr(
+        catalogo,
+        "obter_pagina_serie",
+        lambda url, etag=None, last_modified=None: {
+            "status": 200, "html": "<html/>", "etag": None, "last_modified": None
+        },
+    )
+    def analisar(html, url):
+        estado["lidas"].append(url)
+        return {"title": f"Titulo {url[-2]}", "capitulos": estado["capitulos"]}
+
+    monkeypatch.setattr(catalogo, "analisar_pagina_serie", analisar)
+    monkeypatch.setattr(catalogo, "_LEITOR", None)
+    return estado
+
+
+def test_serie_que_saiu_do_sitemap_e_removida(site):
+    site["series"] = ["https://c/series/a/", "https://c/series/b/"]
+    assert catalogo.rastrear_catalogo(simultaneos=2)["novas"] == 2
+
+    site["series"] = ["https://c/series/a/"]
+    assert catalogo.rastrear_catalogo(simultaneos=2)["removidas"] == 1
+    assert [novel["url"] for novel in catalogo.novels_do_catalogo()] == ["https://c/series/a/"]
+
+
+def test_sitemap_incompleto_nao_remove_nada(site):
+    site["series"] = ["https://c/series/a/", "https://c/series/b/"]
+    catalogo.rastrear_catalogo(simultaneos=2)
+
+    site["series"] = ["https://c/series/a/"]
+    site["erro"] = RuntimeError("sitemap filho falhou")
+    resumo = catalogo.rastrear_catalogo(simultaneos=2)
+
+    assert resumo["removidas"] == 0 and resumo["falhas"] == 1
+    assert len(catalogo.novels_do_catalogo()) == 2
+
+
+def test_consultas_reusam_uma_conexao(site):
+    site["series"] = ["https://c/series/a/"]
+    catalogo.rastrear_catalogo(simultaneos=1)
+
+    assert catalogo.titulo_do_catalogo("https://c/series/a/") == "Titulo a"
+    leitor = catalogo._LEITOR
+    site["series"] = ["https://c/series/a/", "https://c/series/b/"]
+    catalogo.rastrear_catalogo(simultaneos=1)
+
+    # A conexao aberta antes enxerga o que o rastreador gravou depois.
+    assert catalogo.titulo_do_catalogo("https://c/series/b/") == "Titulo b"
+    assert catalogo._LEITOR is leitor
+
+
+def test_volumes_ficam_no_catalogo(site):
+    url = "https://c/series/a/"
+    site["series"] = [url]
+    site["capitulos"] = [capitulo(1, "1"), capitulo(2, "1"), capitulo(3, "2"), capitulo(4, "Extra")]
+    catalogo.rastrear_catalogo(simultaneos=1)
+
+    assert catalogo.volumes_do_catalogo(url) == [
+        {"volume": "1", "capitulos": 2},
+        {"volume": "2", "capitulos": 1},
+        {"volume": "Extra", "capitulos": 1},
+    ]
+
+    # Serie relida: a lista de volumes e trocada inteira.
+    site["capitulos"] = [capitulo(1, "1"), capitulo(2, "3")]
+    catalogo.rastrear_catalogo(simultaneos=1, completo=True)
+    assert catalogo.volumes_do_catalogo(url) == [
+        {"volume": "1", "capitulos": 1},
+        {"volume": "3", "capitulos": 1},
+    ]
+
+    site["series"] = ["https://c/series/b/"]
+    catalogo.rastrear_catalogo(simultaneos=1)
+    assert catalogo.volumes_do_catalogo(url) == []
+
+
+def test_sem_catalogo_nao_ha_volumes(pasta):
+    assert catalogo.volumes_do_catalogo("https://c/series/a/") == []
+
+
+def test_serie_sem_volumes_gravados_e_relida(site):
+    site["series"] = ["https://c/series/a/"]
+    catalogo.rastrear_catalogo(simultaneos=1)
+    assert catalogo.rastrear_catalogo(simultaneos=1)["sem_mudanca"] == 1
+
+    # Catalogo de uma versao sem a tabela de volumes: a serie e relida mesmo sem mudar.
+    with sqlite3.connect(catalogo.CATALOGO_DB) as conexao:
+        conexao.execute("DELETE FROM volumes")
+    site["lidas"].clear()
+    assert catalogo.rastrear_catalogo(simultaneos=1)["atualizadas"] == 1
+    assert site["lidas"] == ["https://c/series/a/"]
+    assert catalogo.volumes_do_catalogo("https://c/series/a/") == [{"volume": "1", "capitulos": 1}]
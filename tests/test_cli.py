@@ -0,0 +1,78 @@
+import sys
+
+import pytest
+
+from centralnovel import cli, scraper
+
+URL = "https://centralnovel.com/series/novel-20240101/"
+
+
+def _falhar(*args, **kwargs):
+    raise ConnectionError("sem rede")
+
+
+def test_extrair_links_distingue_erro_de_pagina_vazia(monkeypatch):
+    monkeypatch.setattr(scraper.cache_http, "obter_texto", _falhar)
+    assert scraper.extrair_links_pdf(URL, verboso=False) is None
+
+
+def test_baixar_sem_rede_e_erro(monkeypatch):
+    monkeypatch.setattr(scraper, "extrair_links_pdf", lambda url: None)
+    assert cli.main(["baixar", URL]) == cli.EXIT_ERRO
+
+
+def test_baixar_sem_capitulos_e_nada_encontrado(monkeypatch):
+    monkeypatch.setattr(scraper, "extrair_links_pdf", lambda url: [])
+    assert cli.main(["baixar", URL]) == cli.EXIT_NADA_ENCONTRADO
+
+
+def test_ctrl_c_devolve_codigo_documentado(monkeypatch):
+    def interromper(url):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(scraper, "extrair_links_pdf", interromper)
+    assert cli.main(["baixar", URL]) == cli.EXIT_INTERROMPIDO
+
+
+def test_backend_async_sem_aiohttp_e_erro_de_uso(monkeypatch):
+    from centralnovel import async_client
+
+    monkeypatch.setattr(async_client, "aiohttp", None)
+    assert cli.main(["baixar", URL, "--backend", "async"]) == cli.EXIT_USO
+
+
+@pytest.mark.parametrize(
+    "opcao",
+    [
+        ["--rps", "0"],
+        ["--rps", "inf"],
+        ["--banda", "-5"],
+        ["--simultaneos", "0"],
+        ["--simultaneos", "dois"],
+    ],
+)
+def test_opcoes_invalidas_sao_erro_de_uso(opcao):
+    with pytest.raises(SystemExit) as erro:
+        cli.main(["baixar", URL, *opcao])
+    assert erro.value.code == cli.EXIT_USO
+
+
+def test_opcoes_validas(monkeypatch):
+    recebido = {}
+
+    def baixar(args):
+        recebido.update(vars(args))
+        return cli.EXIT_OK
+
+    monkeypatch.setattr(cli, "_cmd_baixar", baixar)
+    cli.main(["baixar", URL, "--rps", "0.5", "--banda", "0", "--simultaneos", "3"])
+    assert (recebido["rps"], recebido["banda"], recebido["simultaneos"]) == (0.5, 0.0, 3)
+
+
+def test_stdin_e_restaurado(monkeypatch):
+    original = sys.stdin
+    durante = []
+    monkeypatch.setattr(scraper, "extrair_links_pdf", lambda url: durante.append(sys.stdin) or [])
+    cli.main(["baixar", URL])
+    assert durante[0] is not original and durante[0].closed
+    assert sys.stdin is original
@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_conversao_disponivel_nao_importa_pymupdf():
+    codigo = (
+        "import sys\n"
+        "from centralnovel.converter import conversao_disponivel\n"
+        "conversao_disponivel()\n"
+        "print('fitz' in sys.modules or 'PIL' in sys.modules)\n"
+    )
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True)
+    assert saida.stdout.strip() == "False"
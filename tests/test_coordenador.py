@@ -0,0 +1,70 @@
+import time
+
+from conftest import capitulo
+
+from centralnovel import coordenador, downloader, manifest
+from centralnovel.coordenador import CONCLUIDA, EM_ANDAMENTO, FALHOU, PENDENTE, FilaDistribuida
+
+
+def test_dois_workers_nao_reivindicam_a_mesma_tarefa(pasta):
+    with FilaDistribuida("fila.sqlite3") as fila_a, FilaDistribuida("fila.sqlite3") as fila_b:
+        assert fila_a.enfileirar("Novel", [capitulo(n) for n in range(1, 5)]) == 4
+        assert fila_a.enfileirar("Novel", [capitulo(1)]) == 0
+        ids_a = {tarefa["id"] for tarefa in fila_a.reivindicar("a", 3)}
+        ids_b = {tarefa["id"] for tarefa in fila_b.reivindicar("b", 3)}
+    assert len(ids_a) == 3 and len(ids_b) == 1
+    assert not ids_a & ids_b
+
+
+def test_lease_vencido_volta_para_a_fila(pasta):
+    with FilaDistribuida("fila.sqlite3", lease=0.05, max_tentativas=2) as fila:
+        fila.enfileirar("Novel", [capitulo(1)])
+        [tarefa] = fila.reivindicar("caiu")
+        time.sleep(0.1)
+        [retomada] = fila.reivindicar("outro")
+        assert retomada["id"] == tarefa["id"] and retomada["tentativas"] == 2
+        # O worker que caiu nao conclui uma tarefa que ja nao e dele.
+        fila.concluir("caiu", tarefa["id"])
+        assert fila.progresso()[EM_ANDAMENTO] == 1
+        time.sleep(0.1)
+        assert fila.reivindicar("terceiro") == []
+        assert fila.progresso()[FALHOU] == 1
+
+
+def test_worker_conclui_pelo_retorno_do_download(pasta, monkeypatch):
+    caps = [capitulo(1), capitulo(2)]
+
+    def download_falso(capitulos, novel_title, ao_concluir=None, **opcoes):
+        # O capitulo 2 falha sempre; nada e lido do manifesto.
+        baixados = [cap for cap in capitulos if cap["capitulo"] == "1"]
+        for cap in baixados:
+            ao_concluir(cap)
+        return len(baixados), len(capitulos) - len(baixados)
+
+    monkeypatch.setattr(downloader, "download_capitulos_novel", download_falso)
+    monkeypatch.setattr(manifest, "_JOURNAL", manifest._JOURNAL)
+    with FilaDistribuida("fila.sqlite3") as fila:
+        fila.enfileirar("Novel", caps)
+
+    # O capitulo 2 volta para a fila ate esgotar MAX_TENTATIVAS_TAREFA.
+    assert coordenador.executar_worker("fila.sqlite3", worker="w", espera_ociosa=0) == (
+        1,
+        coordenador.MAX_TENTATIVAS_TAREFA,
+    )
+    with FilaDistribuida("fila.sqlite3") as fila:
+        progresso = fila.progresso()
+    assert progresso[CONCLUIDA] == 1 and progresso[FALHOU] == 1 and progresso[PENDENTE] == 0
+    with manifest.Manifesto() as manifesto:
+        modo = manifesto._conexao.execute("PRAGMA journal_mode").fetchone()[0]
+    assert modo == "delete"
+
+
+def test_worker_avisa_quando_a_fila_esta_em_outra_pasta(pasta, tmp_path_factory, capsys, monkeypatch):
+    monkeypatch.setattr(manifest, "_JOURNAL", manifest._JOURNAL)
+    fila = tmp_path_factory.mktemp("compartilhada") / "fila.sqlite3"
+    FilaDistribuida(str(fila)).fechar()
+    coordenador.executar_worker(str(fila), worker="w", espera_ociosa=0)
+    assert "A fila esta em outra pasta" in capsys.readouterr().out
+
+    coordenador.executar_worker("fila.sqlite3", worker="w", espera_ociosa=0)
+    assert "outra pasta" not in capsys.readouterr().out
@@ -0,0 +1,30 @@
+import sqlite3
+
+import pytest
+from conftest import RespostaFalsa, capitulo, pdf_falso
+
+from centralnovel import downloader, token_cache
+from centralnovel.manifest import Manifesto
+
+
+@pytest.fixture
+def site(pasta, monkeypatch):
+    for modulo in (downloader, token_cache):
+        monkeypatch.setattr(modulo, "obter_token_pdf", lambda post_id, url: f"https://cdn/{post_id}.pdf")
+    monkeypatch.setattr(downloader.http_client, "get", lambda url, **kwargs: RespostaFalsa(pdf_falso()))
+
+
+def test_erro_ao_registrar_um_capitulo_nao_derruba_a_novel(site, monkeypatch):
+    registrar = Manifesto.registrar_download
+
+    def registrar_falhando(self, novel_dir, cap, caminho, sha256=None):
+        if cap["capitulo"] == "2":
+            raise sqlite3.OperationalError("database is locked")
+        return registrar(self, novel_dir, cap, caminho, sha256)
+
+    monkeypatch.setattr(Manifesto, "registrar_download", registrar_falhando)
+    capitulos = [capitulo(numero) for numero in range(1, 5)]
+
+    assert downloader.download_capitulos_novel(capitulos, "Novel", max_simultaneos=2) == (3, 1)
+    with Manifesto() as manifesto:
+        assert set(manifesto.capitulos_baixados("Novel")) == {"1001", "1003", "1004"}
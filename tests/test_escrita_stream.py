@@ -0,0 +1,105 @@
+import os
+
+import pytest
+import requests
+from conftest import RespostaFalsa, pdf_falso
+
+from centralnovel import escrita_stream
+from centralnovel.escrita_stream import gravar_resposta
+from centralnovel.integridade import ValidadorPDF
+
+
+class RespostaInterrompida(RespostaFalsa):
+    def __init__(self, corpo, cortar_em, ao_ler=None):
+        super().__init__(corpo)
+        self.cortar_em = cortar_em
+        self.ao_ler = ao_ler
+
+    def iter_content(self, chunk_size=1):
+        enviados = 0
+        for bloco in super().iter_content(chunk_size):
+            if enviados >= self.cortar_em:
+                raise requests.exceptions.ChunkedEncodingError("conexao caiu")
+            if self.ao_ler is not None:
+                self.ao_ler()
+            enviados += len(bloco)
+            yield bloco
+
+
+def _suporta_fallocate(caminho):
+    with open(caminho, "wb") as file_obj:
+        return escrita_stream._prealocar(file_obj, 0, 4096)
+
+
+def test_grava_e_valida_em_blocos(tmp_path):
+    corpo = pdf_falso(300_000)
+    caminho = tmp_path / "cap.pdf.part"
+    validador = ValidadorPDF(len(corpo))
+
+    escritos = gravar_resposta(
+        RespostaFalsa(corpo), caminho, tamanho_total=len(corpo), validador=validador
+    )
+
+    assert escritos == len(corpo)
+    assert caminho.read_bytes() == corpo
+    validador.finalizar()
+
+
+def test_prealoca_pelo_tamanho_total(tmp_path):
+    if not _suporta_fallocate(tmp_path / "teste"):
+        pytest.skip("sem posix_fallocate neste sistema de arquivos")
+    corpo = pdf_falso(300_000)
+    caminho = tmp_path / "cap.pdf.part"
+    tamanhos = []
+
+    resposta = RespostaInterrompida(
+        corpo, len(corpo), ao_ler=lambda: tamanhos.append(os.path.getsize(caminho))
+    )
+    gravar_resposta(resposta, caminho, tamanho_total=len(corpo), tamanho_buffer=64 * 1024)
+
+    # O arquivo ja nasce com o tamanho final; no fim fica exatamente o que chegou.
+    assert tamanhos[0] == len(corpo)
+    assert caminho.read_bytes() == corpo
+
+
+@pytest.mark.parametrize("prealocar", [True, False])
+def test_interrupcao_trunca_o_parcial_no_que_chegou(tmp_path, prealocar):
+    corpo = pdf_falso(300_000)
+    caminho = tmp_path / "cap.pdf.part"
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        gravar_resposta(
+            RespostaInterrompida(corpo, 128 * 1024),
+            caminho,
+            tamanho_total=len(corpo),
+            tamanho_buffer=64 * 1024,
+            prealocar=prealocar,
+        )
+
+    # Sem os bytes pre-alocados no fim, a retomada pede o Range certo.
+    assert caminho.read_bytes() == corpo[: 128 * 1024]
+
+
+def test_retomada_escreve_a_partir_do_inicio(tmp_path):
+    corpo = pdf_falso(300_000)
+    caminho = tmp_path / "cap.pdf.part"
+    caminho.write_bytes(corpo[:100_000])
+
+    escritos = gravar_resposta(
+        RespostaFalsa(corpo[100_000:]), caminho, inicio=100_000, tamanho_total=len(corpo)
+    )
+
+    assert escritos == len(corpo) - 100_000
+    assert caminho.read_bytes() == corpo
+
+
+def test_fsync_so_quando_termina(tmp_path, monkeypatch):
+    sincronizados = []
+    monkeypatch.setattr(escrita_stream.os, "fsync", sincronizados.append)
+    corpo = pdf_falso(300_000)
+
+    gravar_resposta(RespostaFalsa(corpo), tmp_path / "a.part", fsync=True)
+    assert len(sincronizados) == 1
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        gravar_resposta(RespostaInterrompida(corpo, 1), tmp_path / "b.part", fsync=True)
+    assert len(sincronizados) == 1
@@ -0,0 +1,36 @@
+from centralnovel import indice_busca
+from centralnovel.indice_busca import IndiceBusca, carregar_ou_construir
+
+TITULOS = ["lord of the mysteries", "shadow slave", "reverend insanity", "martial world", ""]
+
+
+def test_indice_salvo_em_json_carrega_igual(tmp_path, monkeypatch):
+    construido = carregar_ou_construir(TITULOS, tmp_path)
+    assert (tmp_path / "indice_busca.json").exists()
+
+    monkeypatch.setattr(indice_busca, "IndiceBusca", _proibir_construcao)
+    carregado = carregar_ou_construir(TITULOS, tmp_path)
+
+    assert carregado.postings == construido.postings
+    assert carregado.tamanhos == construido.tamanhos
+    assert carregado.buscar("shadow slav") == construido.buscar("shadow slav")
+
+
+def test_arquivo_corrompido_ou_de_outra_lista_e_refeito(tmp_path):
+    carregar_ou_construir(TITULOS, tmp_path)
+    assert carregar_ou_construir(TITULOS + ["solo leveling"], tmp_path).buscar("solo leveling")[0][1] == 5
+
+    (tmp_path / "indice_busca.json").write_bytes(b"\x80\x04garbage")
+    assert carregar_ou_construir(TITULOS, tmp_path).buscar("martial world") == [(100.0, 3)]
+
+
+def test_faixas_exatas():
+    indice = IndiceBusca(TITULOS)
+    assert indice.buscar("lord of the mysteries")[0] == (100.0, 0)
+    assert indice.buscar("mysteries")[0] == (90.0, 0)
+    assert indice.buscar("slave shadow")[0] == (80.0, 1)
+
+
+def _proibir_construcao(titulos, assinatura=None, postings=None, tamanhos=None):
+    assert postings is not None, "indice refeito em vez de carregado do disco"
+    return IndiceBusca(titulos, assinatura, postings, tamanhos)
@@ -0,0 +1,59 @@
+import hashlib
+
+import pytest
+
+from centralnovel.integridade import PDFInvalidoError, ValidadorPDF, tamanho_esperado
+from conftest import pdf_falso
+
+
+def _validar(dados, tamanho, esperado=None):
+    validador = ValidadorPDF(esperado)
+    for posicao in range(0, len(dados), tamanho):
+        validador.atualizar(memoryview(dados)[posicao : posicao + tamanho])
+    return validador.finalizar()
+
+
+@pytest.mark.parametrize("tamanho", [1, 3, 5, 1023, 1024, 1025, 4096])
+def test_qualquer_fronteira_de_bloco(tamanho):
+    # %PDF- e %%EOF partidos entre blocos ainda sao achados.
+    dados = pdf_falso(5000)
+    assert _validar(dados, tamanho, len(dados)) == hashlib.sha256(dados).hexdigest()
+
+
+@pytest.mark.parametrize(
+    "dados, esperado, erro",
+    [
+        (pdf_falso(5000)[:-10], None, "%%EOF"),
+        (b"<html>" + pdf_falso(5000)[6:], None, "nao e um PDF"),
+        (pdf_falso(500), None, "muito pequeno"),
+        (pdf_falso(5000), 6000, "Content-Length"),
+    ],
+)
+def test_rejeita_pdf_invalido(dados, esperado, erro):
+    with pytest.raises(PDFInvalidoError, match=erro):
+        _validar(dados, 1000, esperado)
+
+
+def test_pagina_html_e_rejeitada_no_primeiro_kb():
+    validador = ValidadorPDF()
+    with pytest.raises(PDFInvalidoError):
+        validador.atualizar(b"<!DOCTYPE html>" + b" " * 2000)
+
+
+def test_continuar_de_equivale_a_ler_tudo(tmp_path):
+    dados = pdf_falso(5000)
+    parcial = tmp_path / "cap.pdf.part"
+    parcial.write_bytes(dados[:2500])
+
+    validador = ValidadorPDF.continuar_de(str(parcial), len(dados))
+    validador.atualizar(dados[2500:])
+
+    assert validador.finalizar() == hashlib.sha256(dados).hexdigest()
+
+
+def test_tamanho_esperado():
+    assert tamanho_esperado({"Content-Length": "100"}) == 100
+    assert tamanho_esperado({"Content-Length": "100"}, inicio=50) == 150
+    # Corpo comprimido em transito: o Content-Length nao e o tamanho do PDF.
+    assert tamanho_esperado({"Content-Length": "100", "Content-Encoding": "gzip"}) is None
+    assert tamanho_esperado({}) is None
@@ -0,0 +1,69 @@
+import os
+
+from conftest import capitulo, pdf_falso
+
+from centralnovel import downloader
+from centralnovel.manifest import Manifesto
+
+
+def _baixado(manifesto, novel_dir, cap):
+    caminho = downloader._montar_caminho_pdf(cap, novel_dir)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "wb") as file_obj:
+        file_obj.write(pdf_falso())
+    manifesto.registrar_download(novel_dir, cap, caminho)
+    return caminho
+
+
+def test_registro_sobrevive_a_reabertura(pasta):
+    cap = capitulo(1)
+    with Manifesto() as manifesto:
+        caminho = _baixado(manifesto, "Novel", cap)
+    with Manifesto() as manifesto:
+        registro = manifesto.capitulos_baixados("Novel")[cap["post_id"]]
+    assert registro["caminho"] == caminho
+    assert registro["tamanho"] == os.path.getsize(caminho)
+
+
+def test_planejar_pula_capitulo_presente(pasta):
+    cap = capitulo(1)
+    with Manifesto() as manifesto:
+        _baixado(manifesto, "Novel", cap)
+        pendentes, so_converter, concluidos = downloader._planejar([cap], "Novel", manifesto, False)
+    assert (pendentes, so_converter, concluidos) == ([], [], [cap])
+
+
+def test_planejar_confia_no_manifesto_sem_consultar_o_disco(pasta, monkeypatch):
+    cap = capitulo(1)
+    with Manifesto() as manifesto:
+        os.remove(_baixado(manifesto, "Novel", cap))
+        manifesto.registrar_cbz("Novel", cap, "CBZ/Novel Vol 1/Capitulo_001.cbz")
+
+        def sem_disco(*args, **kwargs):
+            raise AssertionError("consultou o disco")
+
+        for nome in ("stat", "scandir"):
+            monkeypatch.setattr(os, nome, sem_disco)
+        monkeypatch.setattr(os.path, "exists", sem_disco)
+        pendentes, so_converter, concluidos = downloader._planejar([cap], "Novel", manifesto, True)
+    assert (pendentes, so_converter, concluidos) == ([], [], [cap])
+
+
+def test_planejar_baixa_de_novo_arquivo_apagado(pasta):
+    apagado, truncado, inteiro = capitulo(1), capitulo(2), capitulo(3)
+    with Manifesto() as manifesto:
+        os.remove(_baixado(manifesto, "Novel", apagado))
+        with open(_baixado(manifesto, "Novel", truncado), "r+b") as file_obj:
+            file_obj.truncate(10)
+        _baixado(manifesto, "Novel", inteiro)
+
+        pendentes, so_converter, concluidos = downloader._planejar(
+            [apagado, truncado, inteiro], "Novel", manifesto, True, verificar=True
+        )
+        restantes = manifesto.capitulos_baixados("Novel")
+
+    assert pendentes == [apagado, truncado]
+    # So o capitulo com PDF no disco segue para a conversao.
+    assert [cap for cap, _, _ in so_converter] == [inteiro]
+    assert concluidos == []
+    assert set(restantes) == {inteiro["post_id"]}
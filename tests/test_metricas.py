@@ -0,0 +1,27 @@
+import time
+
+from conftest import RespostaFalsa
+
+from centralnovel import http_client, scraper
+from centralnovel.metricas import METRICAS
+
+
+class _SessaoFalsa:
+    def __init__(self, resposta):
+        self.resposta = resposta
+
+    def request(self, metodo, url, **kwargs):
+        return self.resposta
+
+
+def test_espera_do_limitador_fica_fora_do_tempo_da_etapa(pasta, monkeypatch):
+    pagina = b"<html>" + b" " * 1000 + b'"post_id": 4321 </html>'
+    monkeypatch.setattr(http_client, "aguardar_requisicao", lambda url: time.sleep(0.2))
+    monkeypatch.setattr(http_client, "obter_sessao", lambda: _SessaoFalsa(RespostaFalsa(pagina)))
+    METRICAS.reiniciar()
+
+    assert scraper.extrair_post_id_da_url("https://centralnovel.com/capitulo-1/") == "4321"
+
+    etapas = METRICAS.resumo()["etapas"]
+    assert etapas["limitador"]["total_s"] >= 0.2
+    assert etapas["post_id"]["total_s"] < 0.1
@@ -0,0 +1,117 @@
+import pytest
+
+from centralnovel import scraper
+
+pytest.importorskip("lxml")
+
+_PAGINA = (
+    '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="UTF-8"><title>Novel</title>'
+    "<script>var x = '<li data-id=\"1\">';</script></head><body>"
+    '<h1 class="entry-title">Novel</h1><div class="eplister"><ul>{itens}</ul></div></body></html>'
+)
+
+_VARIANTES = {
+    "completo": (
+        '<li data-index="0" data-id="101"><a href="https://centralnovel.com/cap-1/">'
+        '<div class="epl-num">Vol. 1 Cap. 1</div>'
+        '<div class="epl-title">Capitulo 1 &amp; o retorno</div>'
+        '<div class="epl-date">janeiro 1, 2024</div></a>'
+        '<div class="epl-pdf"><a class="dlpdf" href="https://centralnovel.com/cap-1/?pdf=1">'
+        "PDF</a></div></li>"
+    ),
+    "espacos_e_spans": (
+        '<li data-id="102">\n  <a href="https://centralnovel.com/cap-2/">\n'
+        '    <div class="epl-num extra">Vol.&nbsp;2\n <span>Cap. 2</span></div>\n'
+        '    <div class="epl-title"> <!-- rascunho --> Titulo <b>2</b>  café </div>\n'
+        "  </a>\n"
+        '  <div class="epl-pdf"><a class="btn dlpdf" href="/cap-2/?pdf=1">PDF</a></div>\n</li>'
+    ),
+    "volume_com_texto": (
+        '<li data-id="103"><div class="epl-num">Volume Extra Cap. 3</div>'
+        '<div class="epl-title">Especial</div><div class="epl-date"></div>'
+        '<div class="epl-pdf"><a class="dlpdf" href="https://centralnovel.com/extra-3/">PDF</a>'
+        "</div></li>"
+    ),
+    "sem_titulo_nem_data": (
+        '<li data-id="104"><div class="epl-num">Cap. 4</div>'
+        '<div class="epl-pdf"><a class="dlpdf" href="/cap-4/?pdf=1">PDF</a></div></li>'
+    ),
+    "sem_link": (
+        '<li data-id="105"><div class="epl-num">Cap. 5</div>'
+        '<div class="epl-title">Sem link</div><div class="epl-pdf"></div></li>'
+    ),
+    "link_sem_href": (
+        '<li data-id="106"><div class="epl-num">Cap. 6</div>'
+        '<div class="epl-pdf"><a class="dlpdf">PDF</a></div></li>'
+    ),
+    "data_id_vazio": '<li data-id=""><div class="epl-num">Vol. 1 Cap. 7</div></li>',
+    "sem_numero": (
+        '<li data-id="108"><div class="epl-num">Prologo</div>'
+        '<div class="epl-pdf"><a class="dlpdf" href="/prologo/">PDF</a></div></li>'
+    ),
+    "maiusculas_e_aspas_simples": (
+        "<LI DATA-ID='109'><DIV CLASS='epl-num'>vol. 3 cap. 9</DIV>"
+        "<DIV CLASS='epl-title'>Grito</DIV>"
+        "<DIV CLASS='epl-pdf'><A CLASS='dlpdf' HREF='/cap-9/'>PDF</A></DIV></LI>"
+    ),
+}
+
+# Marcacao quebrada como a que aparece em paginas truncadas ou editadas a mao.
+_MALFORMADAS = {
+    "li_sem_fechar": (
+        '<li data-id="201"><div class="epl-num">Cap. 1</div>'
+        '<div class="epl-pdf"><a class="dlpdf" href="/cap-1/">PDF</a></div>'
+        '<li data-id="202"><div class="epl-num">Cap. 2</div>'
+        '<div class="epl-pdf"><a class="dlpdf" href="/cap-2/">PDF</a></div>'
+    ),
+    "atributos_sem_aspas": (
+        "<li data-id=203><div class=epl-num>Vol. 1 Cap. 3</div>"
+        "<div class=epl-title>Sem aspas</div>"
+        "<div class=epl-pdf><a class=dlpdf href=/cap-3/>PDF</a></div></li>"
+    ),
+    "fechamentos_trocados": (
+        '<li data-id="204"><div class="epl-num">Cap. 4</span></div>'
+        '<div class="epl-title"><b>Negrito</div></b>'
+        '<div class="epl-pdf"><a class="dlpdf" href="/cap-4/">PDF</a></div></li>'
+    ),
+    "entidades_soltas": (
+        '<li data-id="205"><div class="epl-num">Cap. 5</div>'
+        '<div class="epl-title">A & B &lt; C &eacute;</div>'
+        '<div class="epl-pdf"><a class="dlpdf" href="/cap-5/?a=1&b=2">PDF</a></div></li>'
+    ),
+    "pagina_truncada": (
+        '<li data-id="206"><div class="epl-num">Cap. 6</div>'
+        '<div class="epl-pdf"><a class="dlpdf" href="/cap-6/">PDF</a></div></li>'
+        '<li data-id="207"><div class="epl-num">Cap. 7</div><div class="epl-ti'
+    ),
+}
+
+
+def _comparar(html):
+    raiz = scraper._raiz_lxml(html, scraper._consultas_lxml())
+    obtido = scraper._extrair_capitulos_lxml(raiz, scraper._consultas_lxml(), verboso=False)
+    esperado = scraper._extrair_capitulos_bs4(html, verboso=False)
+    assert obtido == esperado
+    return obtido
+
+
+@pytest.mark.parametrize("nome", sorted(_VARIANTES))
+def test_lxml_igual_bs4_nas_variantes(nome):
+    _comparar(_PAGINA.format(itens=_VARIANTES[nome]))
+
+
+@pytest.mark.parametrize("nome", sorted(_MALFORMADAS))
+def test_lxml_igual_bs4_com_marcacao_quebrada(nome):
+    _comparar(_PAGINA.format(itens=_MALFORMADAS[nome]))
+
+
+def test_lxml_igual_bs4_na_pagina_inteira():
+    itens = "".join(list(_VARIANTES.values()) + list(_MALFORMADAS.values()))
+    capitulos = _comparar(_PAGINA.format(itens=itens))
+    assert capitulos
+    assert "1" not in {cap["post_id"] for cap in capitulos}
+
+
+def test_lxml_igual_bs4_sem_capitulos():
+    assert _comparar("") == []
+    assert _comparar("<html><body><p>Nada aqui</p></body></html>") == []
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from centralnovel import manifest, scraper
+from centralnovel.scraper import LeitorPostId
+
+PAGINAS = [
+    b'<html>' + b'x' * 500 + b'<script>var dados = {"post_id": 987654};</script></html>',
+    b'<div data-id="1234">' + b'y' * 300 + b'</div>',
+    # data-id aparece antes, mas "post_id" tem prioridade em qualquer ponto da pagina.
+    b'<div data-id="1111"></div>' + b'z' * 700 + b'"post_id":   2222',
+    b'"post_id": 55',
+    b'<p>sem id</p>',
+]
+
+
+def _esperado(pagina):
+    match = scraper._RE_POST_ID.search(pagina) or scraper._RE_DATA_ID.search(pagina)
+    return match.group(1).decode("ascii") if match else None
+
+
+def _ler_em_blocos(pagina, tamanho):
+    leitor = LeitorPostId()
+    for posicao in range(0, len(pagina), tamanho):
+        post_id = leitor.alimentar(pagina[posicao : posicao + tamanho])
+        if post_id:
+            return post_id, leitor.lidos
+    return leitor.finalizar(), leitor.lidos
+
+
+@pytest.mark.parametrize("pagina", PAGINAS)
+def test_qualquer_fronteira_de_bloco(pagina):
+    for tamanho in list(range(1, 40)) + [255, 256, 257, 4096]:
+        assert _ler_em_blocos(pagina, tamanho)[0] == _esperado(pagina), tamanho
+
+
+def test_para_de_ler_quando_acha_o_post_id():
+    pagina = b'"post_id": 42,' + b"x" * (1024 * 1024)
+    post_id, lidos = _ler_em_blocos(pagina, scraper.BLOCO_POST_ID)
+    assert post_id == "42"
+    assert lidos == scraper.BLOCO_POST_ID
+
+
+def test_post_id_salvo_reusa_uma_conexao(pasta, tmp_path_factory, monkeypatch):
+    monkeypatch.setattr(manifest, "_COMPARTILHADO", None)
+    scraper.salvar_post_id("https://c/cap-1/", "77")
+    aberto = manifest.manifesto_compartilhado()
+
+    assert scraper.post_id_salvo("https://c/cap-1/") == "77"
+    assert manifest.manifesto_compartilhado() is aberto
+
+    # Outro diretorio de trabalho, outro biblioteca.sqlite3.
+    os.chdir(tmp_path_factory.mktemp("outra"))
+    assert scraper.post_id_salvo("https://c/cap-1/") is None
+    manifest.manifesto_compartilhado().fechar()
@@ -0,0 +1,88 @@
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from centralnovel import rate_limit
+from centralnovel.config import AUMENTO_ADITIVO, DELAY_ENTRE_DOWNLOADS
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = SimpleNamespace(agora=1000.0, jitter=0.0)
+    monkeypatch.setattr(
+        rate_limit,
+        "time",
+        SimpleNamespace(monotonic=lambda: relogio.agora, time=lambda: relogio.agora),
+    )
+    monkeypatch.setattr(rate_limit, "random", SimpleNamespace(uniform=lambda a, b: relogio.jitter))
+    monkeypatch.setattr(rate_limit, "_LIMITADORES", {})
+    return relogio
+
+
+def test_token_bucket_espaca_pelo_ritmo(relogio):
+    balde = rate_limit.TokenBucket(2.0)
+    assert balde.reservar() == 0
+    assert balde.reservar() == pytest.approx(0.5)
+    assert balde.reservar() == pytest.approx(1.0)
+    # Parado nao acumula mais que a capacidade.
+    relogio.agora += 60
+    assert balde.reservar() == 0
+    assert balde.reservar() == pytest.approx(0.5)
+
+
+def test_aumento_aditivo_ate_o_teto(relogio):
+    limitador = rate_limit.LimitadorAdaptativo(2.0, taxa_maxima=2.0 + 2.5 * AUMENTO_ADITIVO)
+    limitador.registrar_sucesso()
+    assert limitador.taxa == pytest.approx(2.0 + AUMENTO_ADITIVO)
+    for _ in range(10):
+        limitador.registrar_sucesso()
+    assert limitador.taxa == pytest.approx(2.0 + 2.5 * AUMENTO_ADITIVO)
+
+
+def test_rajada_de_429_reduz_uma_vez(relogio):
+    limitador = rate_limit.LimitadorAdaptativo(4.0, taxa_minima=0.5)
+    for _ in range(5):
+        limitador.registrar_limitacao(0)
+    assert limitador.taxa == 2.0
+
+    # Passado um intervalo do ritmo novo, outro 429 e um evento novo.
+    relogio.agora += 0.6
+    limitador.registrar_limitacao(0)
+    assert limitador.taxa == 1.0
+    for _ in range(3):
+        relogio.agora += 10
+        limitador.registrar_limitacao(0)
+    assert limitador.taxa == 0.5
+
+
+def test_pausa_pelo_retry_after_com_jitter(relogio):
+    relogio.jitter = 0.25
+    limitador = rate_limit.LimitadorAdaptativo(2.0)
+    limitador.registrar_limitacao(5)
+    # Pausa de 5 s + jitter, mais um token no ritmo reduzido (1/s).
+    assert limitador.reservar() == pytest.approx(5.25 + 1.0)
+
+
+def test_sem_retry_after_usa_o_atraso_padrao(relogio):
+    limitador = rate_limit.LimitadorAdaptativo(2.0)
+    limitador.registrar_limitacao()
+    relogio.agora += DELAY_ENTRE_DOWNLOADS
+    assert limitador.reservar() == 0
+
+
+def test_registrar_resposta_por_host(relogio):
+    rate_limit.registrar_resposta("https://a.com/x", 429, "3")
+    rate_limit.registrar_resposta("https://b.com/x", 200)
+    assert rate_limit.limitador_para("https://a.com/y").reservar() > 3
+    assert rate_limit.limitador_para("https://b.com/y").reservar() == 0
+
+
+def test_interpretar_retry_after(relogio):
+    daqui_a_30 = formatdate(relogio.agora + 30, usegmt=True)
+    ha_30 = formatdate(relogio.agora - 30, usegmt=True)
+    assert rate_limit.interpretar_retry_after("7") == 7.0
+    assert rate_limit.interpretar_retry_after(daqui_a_30) == pytest.approx(30)
+    assert rate_limit.interpretar_retry_after(ha_30) == 0.0
+    assert rate_limit.interpretar_retry_after("amanha") is None
+    assert rate_limit.interpretar_retry_after(None) is None
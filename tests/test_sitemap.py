@@ -0,0 +1,98 @@
+import gzip
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from centralnovel import scraper, sitemap
+
+_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def _urlset(locs):
+    corpo = "".join(f"<url><loc>{loc}</loc><lastmod>2024-01-01</lastmod></url>" for loc in locs)
+    return f'<?xml version="1.0"?><urlset xmlns="{_NS}">{corpo}</urlset>'.encode()
+
+
+def _indice(filhos):
+    corpo = "".join(f"<sitemap><loc>{filho}</loc></sitemap>" for filho in filhos)
+    return f'<?xml version="1.0"?><sitemapindex xmlns="{_NS}">{corpo}</sitemapindex>'.encode()
+
+
+def _em_blocos(dados, tamanho, primeiro=None):
+    blocos = []
+    if primeiro is not None:
+        blocos.append(dados[:primeiro])
+        dados = dados[primeiro:]
+    blocos.extend(dados[posicao : posicao + tamanho] for posicao in range(0, len(dados), tamanho))
+    return blocos
+
+
+@pytest.mark.parametrize("primeiro", [None, 0, 1, 2, 3])
+@pytest.mark.parametrize("tamanho", [1, 2, 7, 4096])
+def test_descompactar_qualquer_fronteira_de_bloco(primeiro, tamanho):
+    xml = _urlset([f"https://centralnovel.com/series/novel-{numero}/" for numero in range(300)])
+    for corpo in (xml, gzip.compress(xml)):
+        blocos = _em_blocos(corpo, tamanho, primeiro)
+        assert b"".join(sitemap._descompactar(blocos)) == xml
+
+
+def test_descompactar_corpo_vazio_ou_de_um_byte():
+    assert b"".join(sitemap._descompactar([])) == b""
+    assert b"".join(sitemap._descompactar([b"", b"<"])) == b"<"
+
+
+@pytest.fixture
+def site(monkeypatch):
+    corpos = {}
+    atrasos = {}
+    falhas = set()
+
+    @contextmanager
+    def abrir(url, revalidar, verboso):
+        time.sleep(atrasos.get(url, 0))
+        if url in falhas:
+            raise ConnectionError(f"falhou: {url}")
+        yield iter(_em_blocos(corpos[url], 64))
+
+    monkeypatch.setattr(sitemap, "_abrir", abrir)
+    monkeypatch.setattr(scraper, "_SITEMAP_CACHE", None)
+    monkeypatch.setattr(scraper, "_com_dados_do_catalogo", lambda novels, verboso=True: novels)
+    return corpos, atrasos, falhas
+
+
+def _montar_indice(corpos, partes, por_parte, url="https://centralnovel.com/indice.xml"):
+    esperado = []
+    filhos = []
+    for parte in range(partes):
+        filho = f"https://centralnovel.com/parte-{parte}.xml.gz"
+        locs = [f"https://centralnovel.com/series/novel-{parte}-{numero}/" for numero in range(por_parte)]
+        corpos[filho] = gzip.compress(_urlset(locs))
+        filhos.append(filho)
+        esperado.extend(locs)
+    corpos[url] = _indice(filhos)
+    return filhos, esperado
+
+
+def test_filhos_saem_na_ordem_do_indice(site):
+    corpos, atrasos, _ = site
+    filhos, esperado = _montar_indice(corpos, 5, 50)
+    # Os primeiros filhos demoram mais: numa leitura intercalada eles sairiam por ultimo.
+    for posicao, filho in enumerate(filhos):
+        atrasos[filho] = 0.05 * (len(filhos) - posicao)
+
+    obtido = list(sitemap.iterar_urls("https://centralnovel.com/indice.xml", simultaneos=5))
+    assert obtido == esperado
+
+
+def test_filho_com_falha_nao_vira_catalogo_parcial(site):
+    corpos, _, falhas = site
+    filhos, esperado = _montar_indice(corpos, 3, 10, scraper.SERIES_SITEMAP_URL)
+    assert [novel["url"] for novel in scraper.iterar_novels_sitemap()] == esperado
+    falhas.add(filhos[1])
+
+    with pytest.raises(RuntimeError, match="parte-1"):
+        list(scraper.iterar_novels_sitemap())
+
+    assert scraper.listar_novels_sitemap(verboso=False) == []
+    assert scraper._SITEMAP_CACHE is None
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+from conftest import RespostaFalsa, capitulo, pdf_falso
+
+from centralnovel import downloader, sync, token_cache
+from centralnovel.manifest import Manifesto
+
+
+@pytest.fixture
+def site(pasta, monkeypatch):
+    estado = {"capitulos": [], "pdfs": []}
+    monkeypatch.setattr(
+        sync,
+        "obter_pagina_serie",
+        lambda url, etag=None, ultima_modificacao=None: {
+            "status": 200, "html": "", "etag": None, "last_modified": None
+        },
+    )
+    monkeypatch.setattr(
+        sync, "extrair_capitulos_do_html", lambda html: [dict(cap) for cap in estado["capitulos"]]
+    )
+    monkeypatch.setattr(sync, "extrair_titulo_do_html", lambda html, url: "Novel")
+    for modulo in (downloader, token_cache):
+        monkeypatch.setattr(modulo, "obter_token_pdf", lambda post_id, url: f"https://cdn/{post_id}.pdf")
+    monkeypatch.setattr(
+        downloader.http_client, "get", lambda url, **kwargs: RespostaFalsa(estado["pdfs"].pop(0))
+    )
+    return estado
+
+
+def _pdf_do_capitulo():
+    caminho = downloader._montar_caminho_pdf(capitulo(1), downloader.nome_pasta_novel("Novel"))
+    with open(caminho, "rb") as file_obj:
+        return file_obj.read()
+
+
+def test_mudanca_so_na_data_nao_baixa_de_novo(site):
+    v1 = pdf_falso(marca=b"1")
+    site["capitulos"] = [capitulo(1)]
+    site["pdfs"] = [v1]
+    assert sync.sincronizar_novel("https://centralnovel.com/series/novel/") == (1, 0)
+
+    site["capitulos"] = [capitulo(1, data="2 de janeiro de 2024")]
+    assert sync.sincronizar_novel("https://centralnovel.com/series/novel/") == (0, 0)
+    assert _pdf_do_capitulo() == v1
+
+
+def test_versao_nova_invalida_mantem_a_antiga_e_tenta_de_novo(site):
+    v1, v2 = pdf_falso(marca=b"1"), pdf_falso(marca=b"2")
+    site["capitulos"] = [capitulo(1)]
+    site["pdfs"] = [v1]
+    sync.sincronizar_novel("https://centralnovel.com/series/novel/")
+
+    site["capitulos"] = [capitulo(1, url="https://centralnovel.com/capitulo-1-revisado/")]
+    site["pdfs"] = [b"<html>manutencao</html>" * 100] * downloader.MAX_RETRIES
+    assert sync.sincronizar_novel("https://centralnovel.com/series/novel/") == (0, 1)
+    assert _pdf_do_capitulo() == v1
+
+    # A falha nao foi esquecida: a proxima execucao ainda ve o capitulo como alterado.
+    site["pdfs"] = [v2]
+    assert sync.sincronizar_novel("https://centralnovel.com/series/novel/") == (1, 0)
+    assert _pdf_do_capitulo() == v2
+    assert not [nome for _, _, nomes in os.walk(".") for nome in nomes if nome.endswith(".part")]
+
+
+def test_primeira_sincronizacao_so_baixa_depois_do_ultimo_baixado(site):
+    capitulos = [capitulo(numero) for numero in range(1, 6)]
+    site["pdfs"] = [pdf_falso(), pdf_falso()]
+    # Selecao feita antes pelo menu: 1 e 3, o 2 foi pulado de proposito.
+    downloader.download_capitulos_novel([capitulos[0], capitulos[2]], "Novel")
+
+    site["capitulos"] = capitulos
+    site["pdfs"] = [pdf_falso(), pdf_falso()]
+    assert sync.sincronizar_novel("https://centralnovel.com/series/novel/") == (2, 0)
+    assert sync.sincronizar_novel("https://centralnovel.com/series/novel/") == (0, 0)
+    with Manifesto() as manifesto:
+        assert set(manifesto.capitulos_baixados("Novel")) == {"1001", "1003", "1004", "1005"}
+
+
+def test_capitulo_novo_que_falhou_e_tentado_de_novo(site):
+    site["capitulos"] = [capitulo(1)]
+    site["pdfs"] = [pdf_falso()]
+    sync.sincronizar_novel("https://centralnovel.com/series/novel/")
+
+    site["capitulos"] = [capitulo(1), capitulo(2)]
+    site["pdfs"] = [b"<html>manutencao</html>" * 100] * downloader.MAX_RETRIES
+    assert sync.sincronizar_novel("https://centralnovel.com/series/novel/") == (0, 1)
+    site["pdfs"] = [pdf_falso()]
+    assert sync.sincronizar_novel("https://centralnovel.com/series/novel/") == (1, 0)
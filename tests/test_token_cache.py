@@ -0,0 +1,17 @@
+from centralnovel.token_cache import _expiracao_do_token
+
+AGORA = 1_700_000_000
+
+
+def test_le_expires_da_url_assinada():
+    url = f"https://cdn/a.pdf?expires={AGORA + 600}&sig=x"
+    assert _expiracao_do_token(url, AGORA) == AGORA + 600
+
+
+def test_parametro_de_uma_letra_nao_e_expiracao():
+    assert _expiracao_do_token(f"https://cdn/a.pdf?e={AGORA + 600}", AGORA) is None
+
+
+def test_valor_implausivel_usa_validade_configurada():
+    assert _expiracao_do_token("https://cdn/a.pdf?exp=1", AGORA) is None
+    assert _expiracao_do_token(f"https://cdn/a.pdf?exp={AGORA * 2}", AGORA) is None
@@ -0,0 +1,69 @@
+import os
+
+from conftest import RespostaFalsa, pdf_falso
+
+from centralnovel import downloader
+
+
+def _servir(monkeypatch, *respostas):
+    fila = list(respostas)
+    pedidos = []
+
+    def get(url, headers=None, **kwargs):
+        pedidos.append(headers or {})
+        return fila.pop(0)
+
+    monkeypatch.setattr(downloader.http_client, "get", get)
+    monkeypatch.setattr(downloader, "obter_token_pdf", lambda post_id, url: "https://cdn/arquivo.pdf")
+    return pedidos
+
+
+def test_baixa_valida_e_move_para_o_destino(pasta, monkeypatch):
+    corpo = pdf_falso()
+    _servir(monkeypatch, RespostaFalsa(corpo))
+    destino = os.path.join("PDF", "cap.pdf")
+
+    resultado = downloader.baixar_pdf("1", "https://site/cap", destino)
+
+    assert resultado.caminho == destino
+    assert open(destino, "rb").read() == corpo
+    assert not os.path.exists(destino + ".part")
+
+
+def test_pdf_invalido_nao_toca_versao_anterior(pasta, monkeypatch):
+    os.makedirs("PDF")
+    destino = os.path.join("PDF", "cap.pdf")
+    antigo = pdf_falso(marca=b"v")
+    with open(destino, "wb") as file_obj:
+        file_obj.write(antigo)
+    _servir(monkeypatch, *[RespostaFalsa(b"<html>erro</html>" * 100) for _ in range(downloader.MAX_RETRIES)])
+
+    assert downloader.baixar_pdf("1", "https://site/cap", destino, sobrescrever=True) is False
+    assert open(destino, "rb").read() == antigo
+    assert not os.path.exists(destino + ".part")
+
+
+def test_retoma_parcial_com_range(pasta, monkeypatch):
+    corpo = pdf_falso()
+    os.makedirs("PDF")
+    destino = os.path.join("PDF", "cap.pdf")
+    with open(destino + ".part", "wb") as file_obj:
+        file_obj.write(corpo[:1000])
+    resto = corpo[1000:]
+    pedidos = _servir(
+        monkeypatch,
+        RespostaFalsa(
+            resto,
+            status=206,
+            headers={
+                "Content-Length": str(len(resto)),
+                "Content-Range": f"bytes 1000-{len(corpo) - 1}/{len(corpo)}",
+            },
+        ),
+    )
+
+    resultado = downloader.baixar_pdf("1", "https://site/cap", destino)
+
+    assert pedidos[0]["Range"] == "bytes=1000-"
+    assert resultado
+    assert open(destino, "rb").read() == corpo